@@ -2,14 +2,36 @@ import os
 import re
 import sys
 import time
+import zlib
+import struct
 import shutil
+import bisect
+import collections
+import fnmatch
 import zipfile
+import json
+import gzip
+import queue
+import logging
+import logging.handlers
+import hashlib
 import datetime
 import threading
 import subprocess
+import http.client
+import urllib.error
 import urllib.request
 import ctypes
+import argparse
+import contextlib
+import concurrent.futures
+import multiprocessing
 import tempfile
+import socket
+import http.server
+import urllib.parse
+import mmap
+import select
 import atexit
 import signal
 
@@ -22,6 +44,14 @@ try:
 except ImportError:
     HAS_COLORAMA = False
 
+# Optional native AES backend. The ScsC decoder falls back to a pure-Python
+# implementation when it is not installed.
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    HAS_CRYPTOGRAPHY = True
+except ImportError:
+    HAS_CRYPTOGRAPHY = False
+
 # ---------------------------------------------------------------------------
 # COLORS (Soft Palette)
 # ---------------------------------------------------------------------------
@@ -48,30 +78,113 @@ else:
     # If running as script
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Create a temporary directory for tools that will be cleaned up on exit
-TEMP_DIR = tempfile.mkdtemp(prefix="ETS2_Manager_")
+# Persistent tool cache, reused across launches
+TOOLS_DIR       = os.path.join(BASE_DIR, "Tools")
+TOOLS_MANIFEST  = os.path.join(TOOLS_DIR, "manifest.json")
 
-SII_DECRYPT_EXE = os.path.join(TEMP_DIR, "SII_Decrypt.exe")
-SII_ZIP         = os.path.join(TEMP_DIR, "SII_Decrypt.zip")
+SII_DECRYPT_EXE = os.path.join(TOOLS_DIR, "SII_Decrypt.exe")
+SII_ZIP         = os.path.join(TOOLS_DIR, "sii_tools.zip")
 LIST_FILE       = os.path.join(BASE_DIR, "list.txt")
-ETS2_PROFILES_DIR = os.path.join(os.path.expanduser("~"), "Documents", "Euro Truck Simulator 2", "profiles")
+LIST_ERRORS     = "surrogateescape"  # list.txt keeps mod name bytes that are not UTF-8 as they are
+BACKUPS_DIR     = os.path.join(BASE_DIR, "Backups")
+ETS2_DOCS_DIR     = os.path.join(os.path.expanduser("~"), "Documents", "Euro Truck Simulator 2")
+ETS2_PROFILES_DIR = os.path.join(ETS2_DOCS_DIR, "profiles")
+ETS2_STEAM_PROFILES_DIR = os.path.join(ETS2_DOCS_DIR, "steam_profiles")  # Steam Cloud profiles
+ETS2_MOD_DIR      = os.path.join(ETS2_DOCS_DIR, "mod")
+ETS2_APP_ID       = "227300"  # Steam app id, also the Workshop content folder name
+ETS2_GAME_LOG     = os.path.join(ETS2_DOCS_DIR, "game.log.txt")  # holds the game version
+LOAD_RULES        = os.path.join(BASE_DIR, "load_rules.txt")     # user rules for `sort`
+
+# Indexes rebuilt incrementally between runs
+CACHE_DIR       = os.path.join(BASE_DIR, "Cache")
+MOD_INDEX       = os.path.join(CACHE_DIR, "mod_index.json")
+FINGERPRINT_INDEX = os.path.join(CACHE_DIR, "fingerprints.json")
+PROFILE_INDEX   = os.path.join(CACHE_DIR, "profile_index.json")
+CONFLICT_INDEX  = os.path.join(CACHE_DIR, "conflict_index.json")
+VERIFY_INDEX    = os.path.join(CACHE_DIR, "verified.json")
 
 SII_TOOLS_URL = (
     "https://www.dropbox.com/scl/fi/95lxm718dh54fgbth3gkn/sii_tools.zip"
     "?rlkey=05hnsrgz1txfj1l3wdh1q47x1&st=sgmls9ar&dl=1"
 )
 
+# Pinned SHA-256 of sii_tools.zip and of the extracted SII_Decrypt.exe
+# (lowercase hex). Nothing downloaded is trusted on first use: the bundle is
+# refused unless it matches, and so is a cached exe. Set both when the
+# bundle behind SII_TOOLS_URL changes.
+SII_TOOLS_SHA256   = None
+SII_DECRYPT_SHA256 = None
+
+DOWNLOAD_TIMEOUT = 30   # seconds per request
+DOWNLOAD_RETRIES = 4
+DOWNLOAD_BACKOFF = 1.5  # seconds, multiplied by the attempt number
+DOWNLOAD_SEGMENTS    = 4                # parallel Range requests per file
+DOWNLOAD_MIN_SEGMENT = 1024 * 1024      # smaller files are fetched in one request
+
 GAME_PROCESS_NAME = "eurotrucks2.exe"
+GAME_EXIT_TIMEOUT = 10  # seconds to wait for the game to exit once killed
+
+# Watch mode: a burst of writes to list.txt is applied once it has been
+# quiet for WATCH_DEBOUNCE seconds
+WATCH_DEBOUNCE       = 1.5
+WATCH_WAKE_INTERVAL  = 1.0   # how often an idle watcher checks for stop/game exit
+WATCH_POLL_INTERVAL  = 1.0   # stat interval of the polling fallback
+
+# Sync server (serve/pull): default TCP port and the ETag kept per pulled URL
+SYNC_PORT  = 27300
+SYNC_STATE = os.path.join(CACHE_DIR, "sync.json")
+
+# Backup retention: an entry is kept while it is among the newest
+# BACKUP_KEEP_LAST *and* younger than BACKUP_MAX_AGE_DAYS (None disables a
+# rule). The newest backup is always kept.
+BACKUP_KEEP_LAST      = 20
+BACKUP_MAX_AGE_DAYS   = 60
+BACKUP_COMPRESSLEVEL  = 6
+# Before a write, which always replaces profile.sii through a rename, the old
+# file is kept by reflink (Btrfs, XFS, APFS) or hardlink instead of a copy.
+# False always stores compressed copies.
+BACKUP_LINKS          = True
+FICLONE               = 0x40049409  # Linux ioctl that clones a file's extents
+
+# Mod fingerprints: files are hashed in segments on a thread pool (hashlib
+# releases the GIL on large buffers)
+HASH_WORKERS      = min(16, (os.cpu_count() or 1) * 2)
+HASH_SEGMENT_SIZE = 16 * 1024 * 1024
+
+# Archive verification: entries are decompressed and CRC-checked in worker
+# processes (inflate holds the GIL); archives are split into parts of about
+# VERIFY_PART_SIZE compressed bytes so one big mod spreads over every core
+VERIFY_WORKERS   = os.cpu_count() or 1
+VERIFY_PART_SIZE = 64 * 1024 * 1024
+
+# Upper bound of profiles processed at once in batch mode
+BATCH_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+
+# profile.sii container formats
+SII_TEXT_SIGNATURE = b"SiiNunit"
+SII_BSII_SIGNATURE = b"BSII"
+SII_SCSC_SIGNATURE = b"ScsC"
+SII_SCSC_HEADER    = struct.Struct("<4s32s16sI")  # signature, HMAC, IV, data size
+SII_SCSC_CHUNK     = 64 * 1024                     # must be a multiple of the AES block size
+SII_KEY = bytes([
+    0x2a, 0x5f, 0xcb, 0x17, 0x91, 0xd2, 0x2f, 0xb6, 0x02, 0x45, 0xb3, 0xd8, 0x36, 0x9e, 0xd0, 0xb2,
+    0xc2, 0x73, 0x71, 0x56, 0x3f, 0xbf, 0x1f, 0x3c, 0x9e, 0xdf, 0x6b, 0x11, 0x82, 0x5a, 0x5d, 0x0a,
+])
 
 # Structured logging configuration
 LOGS_DIR = os.path.join(BASE_DIR, "Logs")
-os.makedirs(LOGS_DIR, exist_ok=True)
 
 MAIN_LOG    = os.path.join(LOGS_DIR, "main.log")
 ERROR_LOG   = os.path.join(LOGS_DIR, "errors.log")
 WARN_LOG    = os.path.join(LOGS_DIR, "warnings.log")
 FATAL_LOG   = os.path.join(LOGS_DIR, "fatal_errors.log")
 
+LOG_ROTATION     = "size"        # "size" or "time"
+LOG_MAX_BYTES    = 1024 * 1024   # size rotation threshold per file
+LOG_ROTATE_WHEN  = "midnight"    # time rotation interval (TimedRotatingFileHandler "when")
+LOG_BACKUP_COUNT = 5             # rotated files kept, gzip compressed
+LOG_JSON         = False         # write JSON lines instead of text
+
 # ---------------------------------------------------------------------------
 # BILINGUAL TEXTS
 # ---------------------------------------------------------------------------
@@ -83,27 +196,39 @@ LOCALIZATION = {
         "option_apply"       : "Aplicar lista de Mods",
         "option_backups"     : "Eliminar todos los Backups",
         "option_open_folder" : "Abrir carpeta de list.txt",
+        "option_profiles"    : "Cambiar de perfil",
+        "option_watch"       : "Vigilar list.txt (aplicar al cambiar)",
         "option_exit"        : "Salir",
         "choose"             : "Elige una opción: ",
-        "invalid_choice"     : "Opción no válida. Elige de 1 a 5.",
+        "invalid_choice"     : "Opción no válida. Elige de 1 a 7.",
         "setting_up"         : "Configurando entorno",
         "game_running"       : "ETS2 está abierto. Ciérralo antes de continuar.",
         "list_not_found"     : "No se encontró list.txt en la carpeta del script.",
-        "tools_ready"        : "Herramientas de descifrado listas.",
         "downloading_tools"  : "Descargando herramientas...",
         "extracting_files"   : "Extrayendo archivos...",
         "invalid_zip"        : "El archivo descargado no es válido.",
         "sii_error"          : "No se pudo preparar SII_Decrypt.exe.",
         "download_error"     : "Error al descargar herramientas.",
+        "tools_unpinned"     : "Las herramientas SII no tienen hash fijado; no se descargan sin verificar.",
         "profiles_not_found" : "No se encontró la carpeta de perfiles de ETS2.",
         "no_profiles"        : "No se encontró ningún perfil de usuario.",
         "no_sii_file"        : "El perfil seleccionado no tiene profile.sii.",
         "profile_loaded"     : "Perfil cargado con éxito",
+        "ask_profile"        : "Elige un perfil (Enter = mantener el actual): ",
+        "watch_started"      : "Vigilando list.txt. Pulsa Ctrl+C para salir.",
+        "watch_queued"       : "ETS2 está abierto: la lista se aplicará cuando se cierre.",
+        "watch_applied"      : "Lista aplicada",
+        "sync_serving"       : "Compartiendo list.txt en",
+        "sync_unchanged"     : "La lista del servidor no ha cambiado.",
+        "sync_downloaded"    : "Lista nueva descargada",
+        "sync_error"         : "No se pudo descargar la lista",
+        "profile_unknown"    : "No existe ese perfil.",
         "backup_created"     : "Copia de seguridad creada",
         "already_editable"   : "El archivo ya es editable directamente.",
         "decrypting_profile" : "Descifrando perfil para edición...",
         "decrypted_ok"       : "Perfil descifrado.",
         "decrypt_failed"     : "Error crítico al usar SII_Decrypt.exe.",
+        "decode_failed"      : "No se pudo descodificar profile.sii.",
         "mods_extracted_count": "mods detectados en lista",
         "mods_applied_count" : "mods aplicados al perfil.",
         "no_mods_found"      : "No hay mods válidos en la lista.",
@@ -127,7 +252,25 @@ LOCALIZATION = {
         "confirm_delete"     : "¿Estás seguro de que quieres eliminar TODOS los backups? (s/n): ",
         "deleting_backups"   : "Borrando copias de seguridad",
         "backups_deleted"    : "Backups eliminados correctamente.",
-        "no_backups"         : "No se encontraron backups para eliminar."
+        "no_backups"         : "No se encontraron backups para eliminar.",
+        "backup_not_found"   : "No se encontró ese backup.",
+        "backup_changed"     : "El backup se modificó después de guardarse y no se puede restaurar.",
+        "mods_missing"       : "mods de la lista no están instalados",
+        "ask_apply_missing"  : "¿Aplicar la lista de todos modos? (s/n): ",
+        "mods_mismatch"      : "mods tienen una versión distinta a la de la lista",
+        "list_unchanged"     : "El perfil ya tiene este orden de mods. No hay nada que cambiar.",
+        "diff_summary"       : "Cambios",
+        "merge_ok"           : "Listas combinadas",
+        "merge_conflicts"    : "conflictos; revisa los bloques CONFLICT de",
+        "sort_ok"            : "Orden de carga resuelto",
+        "sort_missing"       : "dependencias no están en la lista",
+        "sort_incompatible"  : "mods no declaran compatibilidad con la versión",
+        "sort_cycles"        : "reglas circulares (se mantiene su orden actual)",
+        "conflicts_none"     : "Ningún archivo está en más de un mod",
+        "conflicts_found"    : "archivos están en más de un mod; gana el que está más arriba",
+        "conflicts_unread"   : "mods HashFS no se pueden comprobar",
+        "verify_ok"          : "Todos los mods están íntegros",
+        "verify_bad"         : "mods están dañados; vuelve a descargarlos"
     },
     "en": {
         "title"              : "ETS2 - Mod Manager",
@@ -135,27 +278,39 @@ LOCALIZATION = {
         "option_apply"       : "Apply Mod List",
         "option_backups"     : "Delete all Backups",
         "option_open_folder" : "Open list.txt folder",
+        "option_profiles"    : "Change profile",
+        "option_watch"       : "Watch list.txt (apply on change)",
         "option_exit"        : "Exit",
         "choose"             : "Choose an option: ",
-        "invalid_choice"     : "Invalid option. Choose 1 to 5.",
+        "invalid_choice"     : "Invalid option. Choose 1 to 7.",
         "setting_up"         : "Setting up environment",
         "game_running"       : "ETS2 is running. Please close it first.",
         "list_not_found"     : "list.txt not found in folder.",
-        "tools_ready"        : "Decryption tools are ready.",
         "downloading_tools"  : "Downloading tools...",
         "extracting_files"   : "Extracting files...",
         "invalid_zip"        : "Downloaded file is invalid.",
         "sii_error"          : "Could not set up SII_Decrypt.exe.",
         "download_error"     : "Error downloading tools.",
+        "tools_unpinned"     : "The SII tools have no pinned hash; they are not downloaded unverified.",
         "profiles_not_found" : "ETS2 profiles folder not found.",
         "no_profiles"        : "No user profile found.",
         "no_sii_file"        : "Selected profile has no profile.sii.",
         "profile_loaded"     : "Profile loaded successfully",
+        "ask_profile"        : "Choose a profile (Enter = keep the current one): ",
+        "watch_started"      : "Watching list.txt. Press Ctrl+C to exit.",
+        "watch_queued"       : "ETS2 is running: the list will be applied once it closes.",
+        "watch_applied"      : "List applied",
+        "sync_serving"       : "Sharing list.txt at",
+        "sync_unchanged"     : "The server list has not changed.",
+        "sync_downloaded"    : "New list downloaded",
+        "sync_error"         : "Could not fetch the list",
+        "profile_unknown"    : "No such profile.",
         "backup_created"     : "Backup copy created",
         "already_editable"   : "File is already editable.",
         "decrypting_profile" : "Decrypting profile for editing...",
         "decrypted_ok"       : "Profile decrypted.",
         "decrypt_failed"     : "Critical error with SII_Decrypt.exe.",
+        "decode_failed"      : "Could not decode profile.sii.",
         "mods_extracted_count": "mods detected in list",
         "mods_applied_count" : "mods applied to profile.",
         "no_mods_found"      : "No valid mods found in the list.",
@@ -179,44 +334,189 @@ LOCALIZATION = {
         "confirm_delete"     : "Are you sure you want to delete ALL backups? (y/n): ",
         "deleting_backups"   : "Deleting backup copies",
         "backups_deleted"    : "Backups deleted successfully.",
-        "no_backups"         : "No backups found to delete."
+        "no_backups"         : "No backups found to delete.",
+        "backup_not_found"   : "Backup not found.",
+        "backup_changed"     : "The backup was modified after it was saved and cannot be restored.",
+        "mods_missing"       : "mods in the list are not installed",
+        "ask_apply_missing"  : "Apply the list anyway? (y/n): ",
+        "mods_mismatch"      : "mods differ from the version in the list",
+        "list_unchanged"     : "The profile already has this mod order. Nothing to change.",
+        "diff_summary"       : "Changes",
+        "merge_ok"           : "Lists merged",
+        "merge_conflicts"    : "conflicts; check the CONFLICT blocks in",
+        "sort_ok"            : "Load order solved",
+        "sort_missing"       : "dependencies are not in the list",
+        "sort_incompatible"  : "mods do not declare support for game version",
+        "sort_cycles"        : "circular rules (their current order is kept)",
+        "conflicts_none"     : "No file is in more than one mod",
+        "conflicts_found"    : "files are in more than one mod; the one higher up wins",
+        "conflicts_unread"   : "HashFS mods cannot be checked",
+        "verify_ok"          : "Every mod archive is intact",
+        "verify_bad"         : "mods are damaged; download them again"
     },
 }
 
 current_lang = "es"
+headless     = False  # CLI mode: never prompt the user
+quiet        = False  # --json: keep stdout clean for the result document
+
+class ManagerError(Exception):
+    """Raised instead of exiting when a fatal error happens in headless mode."""
 
 # ---------------------------------------------------------------------------
 # CONSOLE HELPERS
 # ---------------------------------------------------------------------------
 
+# Our level names -> logging levels. Files only ever get the levels listed
+# for them, so each record is routed in one pass by the listener thread.
+LOG_LEVELS = {"INFO": logging.INFO, "WARN": logging.WARNING, "ERROR": logging.ERROR, "FATAL": logging.CRITICAL}
+LOG_ROUTES = (
+    (MAIN_LOG,  None),
+    (WARN_LOG,  {"WARN"}),
+    (ERROR_LOG, {"ERROR", "FATAL"}),
+    (FATAL_LOG, {"FATAL"}),
+)
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+class _LogFormatter(logging.Formatter):
+    """Formats records in the background thread: strips colors, text or JSON lines."""
+
+    def format(self, record):
+        msg = record.getMessage()
+        if "\x1b" in msg:
+            msg = ANSI_PATTERN.sub("", msg)
+        level = getattr(record, "tag", record.levelname)
+        if LOG_JSON:
+            return json.dumps({
+                "time"   : datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+                "level"  : level,
+                "thread" : record.threadName,
+                "msg"    : msg,
+            }, ensure_ascii=False)
+        timestamp = datetime.datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S")
+        return f"[{timestamp}] [{level}] {msg}"
+
+def _gzip_rotator(source, dest):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+class _BatchFlush:
+    """Handler mixin: per-record flushes are skipped, _LogWriter flushes once per batch."""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+class _SizeRotatingLog(_BatchFlush, logging.handlers.RotatingFileHandler):
+    pass
+
+class _TimeRotatingLog(_BatchFlush, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+def _make_log_handler(path, levels):
+    # Mod names read with LIST_ERRORS may carry surrogates for bytes that are
+    # not UTF-8; they are logged as \udcXX instead of failing the record
+    if LOG_ROTATION == "time":
+        handler = _TimeRotatingLog(path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8",
+                                   errors="backslashreplace", delay=True)
+    else:
+        handler = _SizeRotatingLog(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8",
+                                   errors="backslashreplace", delay=True)
+    handler.namer = lambda name: name + ".gz"
+    handler.rotator = _gzip_rotator
+    handler.setFormatter(_LogFormatter())
+    if levels:
+        handler.addFilter(lambda record: getattr(record, "tag", None) in levels)
+    return handler
+
+class _LogWriter:
+    """
+    Background thread that owns the log files. It drains every queued record,
+    routes each one to its files and flushes once per batch, so callers (and
+    the console) never wait on disk I/O.
+    """
+
+    def __init__(self, handlers):
+        self.records  = queue.SimpleQueue()
+        self.handlers = handlers
+        self._thread  = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.records.get()]
+            try:
+                while True: batch.append(self.records.get_nowait())
+            except queue.Empty:
+                pass
+            for record in batch:
+                if record is None:
+                    self._flush()
+                    return
+                for handler in self.handlers:
+                    try:
+                        handler.handle(record)
+                    except Exception:
+                        pass
+            self._flush()
+
+    def _flush(self):
+        for handler in self.handlers:
+            try:
+                handler.flush_batch()
+            except Exception:
+                pass
+
+    def stop(self):
+        """Writes everything still queued and closes the files."""
+        if not self._thread.is_alive():
+            return
+        self.records.put(None)
+        self._thread.join()
+        for handler in self.handlers:
+            handler.close()
+
+def _setup_logging():
+    logger = logging.getLogger("ets2_manager")
+    if logger.handlers:
+        # Loaded twice in one process (as __main__ and as Manager): a second
+        # writer would write every record again
+        return logger
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    for path, _levels in LOG_ROUTES:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    writer = _LogWriter([_make_log_handler(path, levels) for path, levels in LOG_ROUTES])
+    logger.addHandler(logging.handlers.QueueHandler(writer.records))
+    # Signals end in sys.exit (see signal_handler), so this also runs on Ctrl+C
+    atexit.register(writer.stop)
+    return logger
+
+# Started by the first record rather than at import, so worker processes
+# that import this module (verify) get no writer thread of their own
+_LOGGER = None
+_LOGGER_LOCK = threading.Lock()
+
+def _get_logger():
+    global _LOGGER
+    if _LOGGER is None:
+        with _LOGGER_LOCK:
+            if _LOGGER is None:
+                _LOGGER = _setup_logging()
+    return _LOGGER
+
 def log(message, level="INFO"):
     """
     Structured logging system.
     Levels: INFO, WARN, ERROR, FATAL
     """
     try:
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        # Remove ANSI escape sequences (colors) from the message
-        clean_msg = re.sub(r'\x1b\[[0-9;]*m', '', str(message))
-        log_entry = f"[{timestamp}] [{level.upper()}] {clean_msg}\n"
-        
-        # All logs go to main.log
-        with open(MAIN_LOG, "a", encoding="utf-8") as f:
-            f.write(log_entry)
-            
-        # Specific routing based on level
-        if level.upper() == "ERROR":
-            with open(ERROR_LOG, "a", encoding="utf-8") as f:
-                f.write(log_entry)
-        elif level.upper() == "WARN":
-            with open(WARN_LOG, "a", encoding="utf-8") as f:
-                f.write(log_entry)
-        elif level.upper() == "FATAL":
-            with open(FATAL_LOG, "a", encoding="utf-8") as f:
-                f.write(log_entry)
-            with open(ERROR_LOG, "a", encoding="utf-8") as f:
-                f.write(log_entry)
-    except:
+        level = level.upper()
+        _get_logger().log(LOG_LEVELS.get(level, logging.INFO), "%s", message, extra={"tag": level})
+    except Exception:
         pass # Never let logging crash the app
 
 def translate(key):
@@ -239,23 +539,29 @@ def draw_title_box(text):
 
 def print_ok(msg):
     log(f"OK: {msg}")
+    if quiet: return
     print(f"  {Color.OK}✓  {Color.RESET}{msg}")
 
 def print_info(msg):
     log(f"INFO: {msg}")
+    if quiet: return
     print(f"  {Color.INFO}→  {Color.RESET}{msg}")
 
 def print_warn(msg):
     log(f"WARN: {msg}")
+    if quiet: return
     print(f"  {Color.WARN}⚠  {Color.RESET}{msg}")
 
 def print_error_msg(msg):
     log(f"ERROR: {msg}", level="ERROR")
+    if quiet: return
     print(f"\n  {Color.ERROR}✗  {msg}{Color.RESET}")
 
 def handle_fatal(key_or_msg):
     msg = translate(key_or_msg) if key_or_msg in LOCALIZATION[current_lang] else key_or_msg
     log(f"FATAL: {msg}", level="FATAL")
+    if headless:
+        raise ManagerError(msg)
     print(f"\n  {Color.ERROR}[ {translate('fatal_error')} ]{Color.RESET}")
     print(f"  {Color.ERROR}» {msg}{Color.RESET}")
     input(f"{Color.GRAY}{translate('press_enter')}{Color.RESET}")
@@ -266,28 +572,16 @@ def handle_fatal(key_or_msg):
 # CLEANUP HELPERS
 # ---------------------------------------------------------------------------
 
-def cleanup_temp():
-    """Removes the temporary tools directory on exit."""
-    if os.path.exists(TEMP_DIR):
-        try:
-            # We use rmtree to delete the folder and its contents
-            shutil.rmtree(TEMP_DIR, ignore_errors=True)
-            log(f"Temp directory cleaned: {TEMP_DIR}")
-        except Exception as e:
-            log(f"Error cleaning temp directory: {e}", level="ERROR")
-
 def signal_handler(sig, frame):
     """Handles signals to ensure clean exit."""
     sys.exit(0)
 
-# Register the cleanup function to run when the script exits
-atexit.register(cleanup_temp)
-
-# Catch common exit signals to ensure atexit is triggered
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
-if hasattr(signal, 'SIGBREAK'):
-    signal.signal(signal.SIGBREAK, signal_handler)
+def install_signal_handlers():
+    """Catches common exit signals so atexit runs. Called by the entry points, not at import."""
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    if hasattr(signal, 'SIGBREAK'):
+        signal.signal(signal.SIGBREAK, signal_handler)
 
 # ---------------------------------------------------------------------------
 # LOADING SPINNER
@@ -298,21 +592,29 @@ class LoadingSpinner:
 
     def __init__(self, text):
         self.text    = text
+        self.detail  = ""
         self._active  = False
         self._thread  = None
 
+    def update(self, done, total=None):
+        """Shows byte progress next to the text: 1.2/3.4 MB (35%)."""
+        mb = done / (1024 * 1024)
+        self.detail = f" {mb:.1f}/{total / (1024 * 1024):.1f} MB ({done * 100 // total}%)" if total else f" {mb:.1f} MB"
+
     def _animate(self):
         i = 0
         while self._active:
             frame = self.FRAMES[i % len(self.FRAMES)]
-            sys.stdout.write(f"\r  {Color.INFO}{frame}{Color.RESET}  {Color.GRAY}{self.text}...{Color.RESET}")
+            sys.stdout.write(f"\r  {Color.INFO}{frame}{Color.RESET}  {Color.GRAY}{self.text}...{self.detail}{Color.RESET}")
             sys.stdout.flush()
             time.sleep(0.08)
             i += 1
-        sys.stdout.write("\r" + " " * 65 + "\r")
+        sys.stdout.write("\r" + " " * 90 + "\r")
         sys.stdout.flush()
 
     def __enter__(self):
+        if quiet:
+            return self
         self._active = True
         self._thread = threading.Thread(target=self._animate, daemon=True)
         self._thread.start()
@@ -320,7 +622,124 @@ class LoadingSpinner:
 
     def __exit__(self, *args):
         self._active = False
-        self._thread.join()
+        if self._thread:
+            self._thread.join()
+
+class PhaseTimer:
+    """
+    Collects wall-clock durations (ms) of the named phases of a pipeline.
+    Every phase is also a trace span when tracing is on.
+    """
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            self.phases[name] = round(self.phases.get(name, 0) + (end - start) / 1e6, 3)
+            if tracer.enabled:
+                tracer.record(name, start, end)
+
+# Tracing is off unless --trace or the ETS2_TRACE environment variable turns
+# it on (a file name, or 1 for Logs/trace_<time>.json). Spans are exported as
+# Chrome trace JSON (chrome://tracing, ui.perfetto.dev) with a summary table
+# in the log. While off, span() hands out one shared no-op object.
+TRACE_ENV = "ETS2_TRACE"
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def __setitem__(self, key, value): pass
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer, self.name, self.args = tracer, name, args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+    def __setitem__(self, key, value):
+        """Attaches a value (byte count, path...) to the span: span["bytes"] = n."""
+        self.args[key] = value
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.events = []
+        self.origin = time.perf_counter_ns()
+        self.lock = threading.Lock()
+
+    def span(self, name, **args):
+        return _Span(self, name, args) if self.enabled else _NULL_SPAN
+
+    def record(self, name, start_ns, end_ns, args=None):
+        with self.lock:
+            self.events.append((name, start_ns, end_ns, threading.get_ident(), args or {}))
+
+    def enable(self, path=None):
+        if not self.enabled:
+            # atexit runs last-in first-out: the writer has to be registered
+            # first so the summary export() logs is still written
+            _get_logger()
+            atexit.register(self.export)
+        self.enabled = True
+        if not path or path == "1":
+            path = os.path.join(LOGS_DIR, f"trace_{datetime.datetime.now():%Y%m%d_%H%M%S}.json")
+        self.path = path
+
+    def summary(self):
+        """Rows of (name, count, total ms, max ms, bytes), slowest total first."""
+        rows = {}
+        for name, start, end, _tid, args in self.events:
+            row = rows.setdefault(name, [name, 0, 0.0, 0.0, 0])
+            ms = (end - start) / 1e6
+            row[1] += 1
+            row[2] += ms
+            row[3] = max(row[3], ms)
+            row[4] += args.get("bytes", 0)
+        return sorted((tuple(r) for r in rows.values()), key=lambda r: r[2], reverse=True)
+
+    def export(self):
+        if not self.enabled or not self.events:
+            return
+        with self.lock:
+            events = list(self.events)
+        pid = os.getpid()
+        trace = {
+            "displayTimeUnit": "ms",
+            "traceEvents": [{
+                "name": name, "cat": name.split(".", 1)[0], "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start - self.origin) / 1000, "dur": (end - start) / 1000, "args": args,
+            } for name, start, end, tid, args in events],
+        }
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(trace, f, ensure_ascii=False, default=str)
+        except OSError as e:
+            log(f"Could not write the trace: {e}", level="WARN")
+            return
+        lines = [f"Trace written to {self.path}", f"{'span':<28}{'count':>7}{'total ms':>12}{'max ms':>10}{'bytes':>14}"]
+        for name, count, total, peak, nbytes in self.summary():
+            lines.append(f"{name:<28}{count:>7}{total:>12.1f}{peak:>10.1f}{nbytes or '':>14}")
+        log("\n".join(lines))
+
+tracer = Tracer()
 
 # ---------------------------------------------------------------------------
 # INITIAL PHASE
@@ -354,17 +773,12 @@ def initial_setup():
 
     profile_file = None
     errors = []
+    start = time.perf_counter()
 
-    with LoadingSpinner(translate("setting_up")):
-        if not os.path.isfile(SII_DECRYPT_EXE):
-            _download_tools(errors)
-            _extract_tools(errors)
-
-        if not errors:
-            profile_file = _find_active_profile(errors)
-        
-        # Reduced sleep time for better UX
-        time.sleep(1.5)
+    with LoadingSpinner(translate("setting_up")), tracer.span("find_profile"):
+        # SII_Decrypt.exe is only fetched on demand, for BSII profiles
+        profile_file = _find_active_profile(errors)
+        log(f"Startup finished in {(time.perf_counter() - start) * 1000:.1f} ms")
 
     if errors:
         for e in errors:
@@ -372,60 +786,370 @@ def initial_setup():
         input(translate("press_enter"))
         sys.exit(1)
 
-    print_ok(translate("tools_ready"))
     if profile_file:
-        profile_name = os.path.basename(os.path.dirname(profile_file))
+        profile_name = _profile_display_name(profile_file)
         print_info(f"{translate('profile_loaded')}: {Color.BOLD}{profile_name}{Color.RESET}")
     print()
-    time.sleep(0.5)
     return profile_file
 
-def _download_tools(errors):
+_TOOLS_LOCK = threading.Lock()
+
+def _ensure_tools():
+    """Makes SII_Decrypt.exe available, reusing the verified copy in the tool cache."""
+    with _TOOLS_LOCK:  # batch workers must not download the bundle twice
+        start = time.perf_counter()
+        if _tools_cached():
+            log(f"Tool cache hit ({(time.perf_counter() - start) * 1000:.1f} ms)")
+            return
+        errors = []
+        with LoadingSpinner(translate("downloading_tools")) as spinner:
+            with tracer.span("tools.download") as span:
+                _download_tools(errors, progress=spinner.update)
+                if os.path.isfile(SII_ZIP): span["bytes"] = os.path.getsize(SII_ZIP)
+            with tracer.span("tools.extract"):
+                _extract_tools(errors)
+        if errors: handle_fatal(errors[0])
+        log(f"Tool cache miss, tools downloaded in {time.perf_counter() - start:.2f} s")
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _tools_cached():
+    """True when the cached exe matches the pinned hash."""
+    if not SII_DECRYPT_SHA256 or not os.path.isfile(SII_DECRYPT_EXE):
+        return False
+    return _sha256_file(SII_DECRYPT_EXE) == SII_DECRYPT_SHA256
+
+DOWNLOAD_ERRORS = (urllib.error.URLError, http.client.HTTPException, OSError)
+
+class _DownloadProgress:
+    """Thread-safe byte counter that forwards (done, total) to a callback such as LoadingSpinner.update."""
+
+    def __init__(self, callback, total=None):
+        self.callback, self.total, self.done = callback, total, 0
+        self.lock = threading.Lock()
+
+    def add(self, count):
+        with self.lock:
+            self.done += count
+            done = self.done
+        if self.callback:
+            self.callback(done, self.total)
+
+def _probe_download(url, timeout):
+    """
+    Asks for the first byte only. Returns (total size, ranges supported);
+    the size is None when the server does not say.
+    """
+    with urllib.request.urlopen(urllib.request.Request(url, headers={"Range": "bytes=0-0"}), timeout=timeout) as resp:
+        if resp.status == 206:
+            m = re.match(r"bytes 0-0/(\d+)", resp.headers.get("Content-Range", ""))
+            if m:
+                return int(m.group(1)), True
+        length = resp.headers.get("Content-Length")
+        return (int(length) if length is not None and resp.status == 200 else None), False
+
+def _fetch_range(url, part, first, last, timeout, retries, progress):
+    """
+    Downloads bytes first..last (inclusive; last None = to the end) into
+    part, appending to what is already there. A dropped or stalled
+    connection is retried with backoff from the bytes on disk.
+    Returns True once the range is complete.
+    """
+    for attempt in range(1, retries + 1):
+        have = os.path.getsize(part) if os.path.isfile(part) else 0
+        if last is not None and first + have > last:
+            return True
+        start = first + have
+        headers = {"Range": f"bytes={start}-{'' if last is None else last}"} if start or last is not None else {}
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as resp:
+                if headers and resp.status != 206:
+                    if last is not None:
+                        raise OSError("server ignored the Range request")
+                    progress.add(-have)  # whole-file download: start over
+                    have = 0
+                length = resp.headers.get("Content-Length")
+                expected = have + int(length) if length is not None else None
+                with open(part, "ab" if have else "wb") as f:
+                    for block in iter(lambda: resp.read(64 * 1024), b""):
+                        f.write(block)
+                        progress.add(len(block))
+            size = os.path.getsize(part)
+            if last is not None and size != last - first + 1:
+                raise OSError(f"range closed at {size} of {last - first + 1} bytes")
+            if expected is not None and size != expected:
+                raise OSError(f"connection closed at {size} of {expected} bytes")
+            return True
+        except urllib.error.HTTPError as e:
+            if e.code == 416 and have:
+                return True  # nothing left to fetch: the previous attempt got it all
+            log(f"Download attempt {attempt}/{retries} of {os.path.basename(part)} failed: {e}", level="WARN")
+        except DOWNLOAD_ERRORS as e:
+            log(f"Download attempt {attempt}/{retries} of {os.path.basename(part)} failed: {e}", level="WARN")
+        if attempt < retries:
+            time.sleep(DOWNLOAD_BACKOFF * attempt)
+    return False
+
+def _remove_stale_parts(dest, total, segments):
+    """Deletes parts of dest left by a download with another total or segment layout."""
+    dest = os.path.abspath(dest)
+    if segments == 1:
+        keep = {dest + ".part"}
+    else:
+        keep = {f"{dest}.{total}-{n}.part" for n in range(segments)}
+    folder, prefix = os.path.dirname(dest), os.path.basename(dest) + "."
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if name.startswith(prefix) and name.endswith(".part") and path not in keep:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+def _download_file(url, dest, timeout=DOWNLOAD_TIMEOUT, retries=DOWNLOAD_RETRIES, progress=None,
+                   sha256=None, segments=DOWNLOAD_SEGMENTS):
+    """
+    Downloads url to dest. When the server accepts Range requests the file
+    is split into parallel segments, each resumable on its own; otherwise
+    it comes in one resumable stream through dest.part. progress(done,
+    total) receives the byte count; with sha256 the result is verified
+    before it replaces dest. Returns True on success.
+    """
     try:
-        urllib.request.urlretrieve(SII_TOOLS_URL, SII_ZIP)
-    except Exception:
-        errors.append(translate("download_error"))
-    if not os.path.isfile(SII_ZIP):
+        total, ranged = _probe_download(url, timeout)
+    except DOWNLOAD_ERRORS as e:
+        log(f"Download probe failed ({e}), trying a single stream", level="WARN")
+        total, ranged = None, False
+
+    counter = _DownloadProgress(progress, total)
+    segments = max(1, min(segments, (total or 0) // DOWNLOAD_MIN_SEGMENT)) if ranged else 1
+    _remove_stale_parts(dest, total, segments)
+    if segments == 1:
+        part = dest + ".part"
+        if os.path.isfile(part): counter.add(os.path.getsize(part))
+        if not _fetch_range(url, part, 0, None, timeout, retries, counter):
+            return False
+        parts = [part]
+    else:
+        # Part names carry the total so a changed file never mixes with old parts
+        step = -(-total // segments)
+        bounds = [(i, min(i + step, total) - 1) for i in range(0, total, step)]
+        parts = [f"{dest}.{total}-{n}.part" for n in range(len(bounds))]
+        counter.add(sum(os.path.getsize(p) for p in parts if os.path.isfile(p)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(bounds)) as pool:
+            done = list(pool.map(lambda args: _fetch_range(url, args[0], args[1][0], args[1][1], timeout, retries, counter),
+                                 zip(parts, bounds)))
+        if not all(done):
+            return False
+        log(f"Downloaded {total} bytes in {len(bounds)} segments")
+
+    # Join the parts into dest, hashing on the way
+    digest = hashlib.sha256()
+    tmp_path = dest + ".tmp"
+    with open(tmp_path, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+                    out.write(block)
+    if total is not None and os.path.getsize(tmp_path) != total:
+        log(f"Download size mismatch: {os.path.getsize(tmp_path)} of {total} bytes", level="WARN")
+        os.remove(tmp_path)
+        return False
+    for part in parts: os.remove(part)
+    if sha256 and digest.hexdigest() != sha256:
+        log(f"Download hash mismatch for {url}: {digest.hexdigest()}", level="WARN")
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, dest)
+    return True
+
+def _download_tools(errors, url=SII_TOOLS_URL, progress=None):
+    if not SII_TOOLS_SHA256 or not SII_DECRYPT_SHA256:
+        log("SII tools are not pinned (SII_TOOLS_SHA256 / SII_DECRYPT_SHA256), refusing to download them", level="ERROR")
+        errors.append(translate("tools_unpinned"))
+        return
+    os.makedirs(TOOLS_DIR, exist_ok=True)
+    if not _download_file(url, SII_ZIP, progress=progress, sha256=SII_TOOLS_SHA256) or not os.path.isfile(SII_ZIP):
         errors.append(translate("download_error"))
 
 def _extract_tools(errors):
     if errors or not os.path.isfile(SII_ZIP): return
+    zip_sha256 = _sha256_file(SII_ZIP)
     try:
         with zipfile.ZipFile(SII_ZIP, "r") as zf:
-            zf.extractall(TEMP_DIR)
+            zf.extractall(TOOLS_DIR)
     except zipfile.BadZipFile:
         errors.append(translate("invalid_zip"))
     finally:
         if os.path.isfile(SII_ZIP): os.remove(SII_ZIP)
+    if errors: return
     if not os.path.isfile(SII_DECRYPT_EXE):
         errors.append(translate("sii_error"))
+        return
+
+    exe_sha256 = _sha256_file(SII_DECRYPT_EXE)
+    if exe_sha256 != SII_DECRYPT_SHA256:
+        log(f"SII_Decrypt.exe hash mismatch: {exe_sha256}", level="ERROR")
+        os.remove(SII_DECRYPT_EXE)
+        errors.append(translate("sii_error"))
+        return
+    manifest = {
+        "url"        : SII_TOOLS_URL,
+        "zip_sha256" : zip_sha256,
+        "exe_sha256" : exe_sha256,
+        "downloaded" : datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(TOOLS_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
 
 def _find_active_profile(errors):
-    if not os.path.isdir(ETS2_PROFILES_DIR):
-        errors.append(translate("profiles_not_found"))
-        return None
-    
-    # Find all profile.sii files and detect the most recently modified one
-    profiles = []
+    profiles = _find_all_profiles(errors)
+    return profiles[0] if profiles else None
+
+def _find_all_profiles(errors):
+    """Returns the profile.sii of every profile, most recently modified first."""
+    return [p["path"] for p in list_profiles(errors)]
+
+# ---------------------------------------------------------------------------
+# PROFILE INDEX
+# ---------------------------------------------------------------------------
+# Profile folders are named after the hex of the UTF-8 profile name. The
+# display name and mod count come from the user_profile unit at the top of
+# profile.sii and are cached in Cache/profile_index.json by size and mtime,
+# so a warm start costs one stat per profile.
+
+PROFILE_ESCAPE_PATTERN = re.compile(rb'\\(x[0-9a-fA-F]{2}|.)')
+
+_PROFILE_INDEX_LOCK = threading.Lock()
+
+def _decode_profile_folder(name):
+    """'4A6F73C3A9' -> 'José'; folders that are not hex are returned as they are."""
     try:
-        for entry in os.scandir(ETS2_PROFILES_DIR):
-            if entry.is_dir():
-                sii_path = os.path.join(entry.path, "profile.sii")
-                if os.path.isfile(sii_path):
-                    # Get modification time
-                    mtime = os.path.getmtime(sii_path)
-                    profiles.append((sii_path, mtime))
-    except Exception as e:
-        errors.append(f"Error accessing profiles: {e}")
-        return None
+        return bytes.fromhex(name).decode("utf-8")
+    except ValueError:
+        return name
+
+def _sii_unquote(value):
+    """'"Jos\\xc3\\xa9"' (text SII bytes) -> 'José'."""
+    value = value.strip()
+    if value[:1] == b'"' and value[-1:] == b'"':
+        value = value[1:-1]
+    def unescape(m):
+        esc = m.group(1)
+        return bytes([int(esc[1:], 16)]) if len(esc) == 3 else esc
+    return PROFILE_ESCAPE_PATTERN.sub(unescape, value).decode("utf-8", errors="replace")
+
+def _read_profile_header(profile_file):
+    """
+    Returns (profile name, active mod count) from the user_profile unit,
+    stopping at the end of that unit. Either may be None.
+    """
+    fmt, chunks = _open_profile_payload(profile_file)
+    if fmt == "bsii":
+        values = _read_bsii_unit(chunks, "user_profile", ("profile_name", "active_mods"))
+        name = values.get("profile_name")
+        mods = values.get("active_mods")
+        return (name.decode("utf-8", errors="replace") if name is not None else None,
+                len(mods) if mods is not None else None)
+    with SiiDocument(profile_file, (fmt, chunks)) as doc:
+        unit = doc.find("user_profile")
+        if unit is None:
+            return None, None
+        name = unit.get("profile_name")
+        return (_sii_unquote(name) if name is not None else None,
+                len(unit.array("active_mods")) if "active_mods" in unit else None)
+
+def list_profiles(errors=None):
+    """
+    Every profile of profiles/ and steam_profiles/, most recently saved
+    first, as dicts with path (profile.sii), folder, name, mods, source and
+    mtime. Problems are appended to errors when a list is given.
+    """
+    errors = [] if errors is None else errors
+    roots = [d for d in (ETS2_PROFILES_DIR, ETS2_STEAM_PROFILES_DIR) if os.path.isdir(d)]
+    if not roots:
+        errors.append(translate("profiles_not_found"))
+        return []
+
+    with _PROFILE_INDEX_LOCK:
+        try:
+            with open(PROFILE_INDEX, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        profiles, fresh, changed = [], {}, False
+        try:
+            for root in roots:
+                for entry in os.scandir(root):
+                    if not entry.is_dir():
+                        continue
+                    sii_path = os.path.join(entry.path, "profile.sii")
+                    try:
+                        st = os.stat(sii_path)  # one stat answers both "exists" and "when"
+                    except OSError:
+                        continue
+                    cached = index.get(sii_path)
+                    if not cached or cached["size"] != st.st_size or cached["mtime_ns"] != st.st_mtime_ns:
+                        try:
+                            name, mods = _read_profile_header(sii_path)
+                        except (OSError, ValueError, zlib.error):
+                            name = mods = None  # unreadable: fall back to the folder name
+                        cached = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "name": name, "mods": mods}
+                        changed = True
+                    fresh[sii_path] = cached
+                    profiles.append({
+                        "path"   : sii_path,
+                        "folder" : entry.name,
+                        "name"   : cached["name"] or _decode_profile_folder(entry.name),
+                        "mods"   : cached["mods"],
+                        "source" : os.path.basename(root),
+                        "mtime"  : st.st_mtime,
+                    })
+        except OSError as e:
+            errors.append(f"Error accessing profiles: {e}")
+            return []
+        if changed or len(fresh) != len(index):
+            try:
+                _save_json_atomic(PROFILE_INDEX, fresh)
+            except OSError as e:
+                log(f"Could not save the profile index: {e}", level="WARN")
 
     if not profiles:
         errors.append(translate("no_profiles"))
-        return None
-    
-    # Sort by modification time (newest first)
-    profiles.sort(key=lambda x: x[1], reverse=True)
-    return profiles[0][0]
+        return []
+    profiles.sort(key=lambda p: p["mtime"], reverse=True)
+    return profiles
+
+def select_profile(profiles, ref):
+    """
+    Picks a profile from list_profiles() by 1-based position, folder name,
+    display name (case-insensitive) or path. Returns None when nothing matches.
+    """
+    ref = str(ref).strip()
+    if ref.isdigit() and 1 <= int(ref) <= len(profiles):
+        return profiles[int(ref) - 1]
+    for p in profiles:
+        if ref in (p["folder"], p["path"], os.path.dirname(p["path"])):
+            return p
+    matches = [p for p in profiles if p["name"].casefold() == ref.casefold()]
+    return matches[0] if matches else None
+
+def _profile_display_name(profile_file):
+    return _decode_profile_folder(os.path.basename(os.path.dirname(profile_file)))
+
+def _print_profile_table(profiles, current=None):
+    width = max([len(p["name"]) for p in profiles] + [7])
+    print(f"  {Color.BOLD}{'#':>3}  {'Profile':<{width}}  {'Mods':>5}  {'Saved':<16}  Source{Color.RESET}")
+    draw_separator(width + 44)
+    for i, p in enumerate(profiles, 1):
+        saved = datetime.datetime.fromtimestamp(p["mtime"]).strftime("%Y-%m-%d %H:%M")
+        mods = "" if p["mods"] is None else p["mods"]
+        mark = f"{Color.OK}*{Color.RESET}" if p["path"] == current else " "
+        print(f" {mark}{Color.INFO}{i:>3}{Color.RESET}  {p['name']:<{width}}  {mods!s:>5}  {saved:<16}  {Color.GRAY}{p['source']}{Color.RESET}")
 
 # ---------------------------------------------------------------------------
 # MAIN MENU
@@ -440,8 +1164,11 @@ def main_menu(profile_file):
         print(f"  {Color.INFO}[2]{Color.RESET} {translate('option_apply')}")
         print(f"  {Color.INFO}[3]{Color.RESET} {translate('option_open_folder')}")
         print(f"  {Color.WARN}[4]{Color.RESET} {translate('option_backups')}")
-        print(f"  {Color.ERROR}[5]{Color.RESET} {translate('option_exit')}")
+        print(f"  {Color.INFO}[5]{Color.RESET} {translate('option_profiles')}")
+        print(f"  {Color.INFO}[6]{Color.RESET} {translate('option_watch')}")
+        print(f"  {Color.ERROR}[7]{Color.RESET} {translate('option_exit')}")
         print()
+        print(f"  {Color.GRAY}{translate('profile_loaded')}: {_profile_display_name(profile_file)}{Color.RESET}")
         draw_separator()
         choice = input(f"  {Color.BOLD}{translate('choose')}{Color.RESET}").strip()
 
@@ -454,6 +1181,10 @@ def main_menu(profile_file):
         elif choice == "4":
             action_clean_backups(profile_file)
         elif choice == "5":
+            profile_file = action_select_profile(profile_file)
+        elif choice == "6":
+            action_watch(profile_file)
+        elif choice == "7":
             clear_screen()
             print(f"\n  {Color.OK}{translate('goodbye')}{Color.RESET}\n")
             time.sleep(1)
@@ -474,20 +1205,9 @@ def action_extract(profile_file):
     if not _handle_game_running():
         return
 
-    _create_profile_backup(profile_file)
-    was_encrypted = _decrypt_if_needed(profile_file)
-    mods = _get_mods_from_profile(profile_file)
-
-    if was_encrypted:
-        _run_sii_decrypt(profile_file)
+    result = run_extract(profile_file)
 
-    with open(LIST_FILE, "w", encoding="utf-8") as f:
-        for line in mods: f.write(line + "\n")
-
-    with LoadingSpinner(translate("option_extract")):
-        time.sleep(2)
-
-    if was_encrypted:
+    if result["encrypted"]:
         print_ok(translate("decrypted_ok"))
         print_ok(translate("profile_saved")) # Reuse key if available
     else:
@@ -496,7 +1216,7 @@ def action_extract(profile_file):
     print()
     draw_separator()
     print(f"  {Color.OK}{translate('extract_success')}{Color.RESET}")
-    print_info(f"{Color.BOLD}{len(mods)}{Color.RESET} {translate('mods_exported')}")
+    print_info(f"{Color.BOLD}{result['mods']}{Color.RESET} {translate('mods_exported')}")
     draw_separator()
     input(translate("press_enter"))
 
@@ -513,30 +1233,30 @@ def action_apply(profile_file):
         input(translate("press_enter"))
         return
 
-    backup_path = _create_profile_backup(profile_file)
-    was_encrypted = _decrypt_if_needed(profile_file)
-    new_mods = _load_mods_from_list_file()
-    print_info(f"{translate('mods_extracted_count')}: {Color.BOLD}{len(new_mods)}{Color.RESET}")
-
-    try:
-        content = _read_file_lines(profile_file)
-        new_content = _replace_mod_block(content, new_mods)
-        _write_file_lines(profile_file, new_content)
-    except Exception as exc:
-        print_error_msg(f"{translate('unexpected_error')} ({exc})")
-        shutil.copy2(backup_path, profile_file)
-        print_ok(translate("restore_ok"))
-        if was_encrypted: _run_sii_decrypt(profile_file)
+    # An unchanged list needs neither the mod catalog scan nor a confirmation
+    new_mods = _load_mods_from_list_file(LIST_FILE)
+    changes = _profile_changes(profile_file, new_mods)
+    if not any(changes.values()):
+        print_ok(translate("list_unchanged"))
         input(translate("press_enter"))
         return
 
-    if was_encrypted:
-        _run_sii_decrypt(profile_file)
-    
-    with LoadingSpinner(translate("option_apply")):
-        time.sleep(2)
+    missing = _check_list_mods(new_mods)
+    if missing:
+        _print_missing_mods(missing)
+        confirm = input(f"  {Color.BOLD}{translate('ask_apply_missing')}{Color.RESET}").strip().lower()
+        if confirm not in ("s", "si", "y", "yes"):
+            return
+
+    result = run_apply(profile_file, LIST_FILE, verify_mods="fingerprints", changes=changes)
+    if not result["ok"]:
+        input(translate("press_enter"))
+        return
+    if result["unchanged"]:
+        input(translate("press_enter"))
+        return
 
-    if was_encrypted:
+    if result["encrypted"]:
         print_ok(translate("decrypted_ok"))
         print_ok(translate("profile_saved"))
     else:
@@ -545,18 +1265,56 @@ def action_apply(profile_file):
     print()
     draw_separator()
     print(f"  {Color.OK}{translate('success_apply')}{Color.RESET}")
-    print_info(f"{Color.BOLD}{len(new_mods)}{Color.RESET} {translate('mods_applied_count')}")
-    print(f"  {Color.GRAY}{translate('backup_info')}: {os.path.basename(backup_path)}{Color.RESET}")
+    print_info(f"{Color.BOLD}{result['mods']}{Color.RESET} {translate('mods_applied_count')}")
+    print(f"  {Color.GRAY}{translate('backup_info')}: {result['backup']}{Color.RESET}")
     draw_separator()
     input(translate("press_enter"))
 
+def action_select_profile(profile_file):
+    """Lets the user switch profile; returns the (possibly unchanged) profile.sii."""
+    clear_screen()
+    draw_title_box(translate("option_profiles"))
+    print()
+    errors = []
+    profiles = list_profiles(errors)
+    if errors:
+        print_error_msg(errors[0])
+        input(translate("press_enter"))
+        return profile_file
+
+    _print_profile_table(profiles, current=profile_file)
+    print()
+    while True:
+        choice = input(f"  {Color.BOLD}{translate('ask_profile')}{Color.RESET}").strip()
+        if not choice:
+            return profile_file
+        picked = select_profile(profiles, choice)
+        if picked:
+            log(f"Profile selected: {picked['folder']} ({picked['name']})")
+            print_ok(f"{translate('profile_loaded')}: {Color.BOLD}{picked['name']}{Color.RESET}")
+            time.sleep(1)
+            return picked["path"]
+        print_warn(translate("profile_unknown"))
+
+def action_watch(profile_file):
+    """Applies list.txt every time it changes, until Ctrl+C closes the manager."""
+    global headless
+    clear_screen()
+    draw_title_box(translate("option_watch"))
+    print()
+    # A failed apply must not stop the watch with a "press enter" prompt
+    headless = True
+    try:
+        run_watch([profile_file], verify_mods="fingerprints")
+    finally:
+        headless = False
+
 def action_clean_backups(profile_file):
     clear_screen()
     draw_title_box(translate("option_backups"))
     print()
 
-    profile_dir = os.path.dirname(profile_file)
-    backups = [f for f in os.listdir(profile_dir) if f.startswith("profile_backup_") and f.endswith(".sii")]
+    backups = _list_profile_backups(profile_file) + _list_legacy_backups(profile_file)
 
     if not backups:
         print_info(translate("no_backups"))
@@ -568,12 +1326,7 @@ def action_clean_backups(profile_file):
 
     if confirm in ("s", "si", "y", "yes"):
         with LoadingSpinner(translate("deleting_backups")):
-            for b in backups:
-                try:
-                    os.remove(os.path.join(profile_dir, b))
-                except:
-                    pass
-            time.sleep(4)
+            _delete_profile_backups(profile_file)
         print_ok(translate("backups_deleted"))
     
     input(translate("press_enter"))
@@ -593,118 +1346,2939 @@ def action_open_folder():
         time.sleep(2)
 
 # ---------------------------------------------------------------------------
-# CORE LOGIC
+# SII FORMATS
 # ---------------------------------------------------------------------------
+# profile.sii is stored in one of three formats:
+#   SiiNunit - plain text, editable directly
+#   ScsC     - AES-256-CBC encrypted, zlib compressed payload (text or BSII)
+#   BSII     - binary SII, still converted to text with SII_Decrypt.exe
 
-def _get_mods_from_profile(profile_file):
-    pattern = re.compile(r"^\s*active_mods\[\d+\]:\s*(.+)")
-    mods = []
-    with open(profile_file, "r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            m = pattern.match(line)
-            if m:
-                val = m.group(1).strip()
-                mods.append(f" active_mods[{len(mods)}]: {val}")
-    if not mods: handle_fatal("no_mods_found")
-    return mods
+_AES_TABLES = None
 
-def _load_mods_from_list_file():
-    pattern = re.compile(r"active_mods\[\d+\]:\s*(.+)")
-    mods = []
-    with open(LIST_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith(("#", "::")): continue
-            m = pattern.match(line)
-            if m:
-                val = m.group(1).strip()
-                mods.append(f" active_mods[{len(mods)}]: {val}")
-    if not mods: handle_fatal("no_mods_found")
-    return mods
+def _aes_tables():
+    """Builds (once) the inverse S-box and the decryption T-tables."""
+    global _AES_TABLES
+    if _AES_TABLES is not None:
+        return _AES_TABLES
 
-def _replace_mod_block(content, new_mods):
-    entry_pattern = re.compile(r"^\s*active_mods\[\d+\]")
-    count_pattern = re.compile(r"^\s*active_mods:\s*\d+")
-    result, inserted = [], False
-    for line in content:
-        if entry_pattern.match(line): continue
-        if count_pattern.match(line):
-            result.append(f" active_mods: {len(new_mods)}\n")
-            for mod in new_mods: result.append(mod + "\n")
-            inserted = True
-            continue
-        result.append(line)
-    if not inserted: handle_fatal("format_error")
-    return result
+    sbox, inv_sbox = [0] * 256, [0] * 256
+    p = q = 1
+    while True:
+        # p walks GF(2^8) multiplying by 3, q walks dividing by 3
+        p = p ^ ((p << 1) & 0xFF) ^ (0x1B if p & 0x80 else 0)
+        q ^= q << 1
+        q ^= q << 2
+        q ^= q << 4
+        q &= 0xFF
+        if q & 0x80: q ^= 0x09
+        x = q ^ ((q << 1 | q >> 7) & 0xFF) ^ ((q << 2 | q >> 6) & 0xFF) \
+              ^ ((q << 3 | q >> 5) & 0xFF) ^ ((q << 4 | q >> 4) & 0xFF) ^ 0x63
+        sbox[p], inv_sbox[x] = x, p
+        if p == 1: break
+    sbox[0], inv_sbox[0x63] = 0x63, 0
 
-def _is_game_running():
-    res = subprocess.run(["tasklist", "/FI", f"IMAGENAME eq {GAME_PROCESS_NAME}"], capture_output=True, text=True)
-    return GAME_PROCESS_NAME.lower() in res.stdout.lower()
+    def mul(a, b):
+        r = 0
+        while b:
+            if b & 1: r ^= a
+            a = ((a << 1) ^ 0x1B) & 0xFF if a & 0x80 else a << 1
+            b >>= 1
+        return r
 
-def _handle_game_running():
-    if not _is_game_running():
-        return True
-    
-    print_warn(translate("game_running"))
-    confirm = input(f"  {Color.BOLD}{translate('ask_close_game')}{Color.RESET}").strip().lower()
-    
-    if confirm in ("s", "si", "y", "yes"):
-        with LoadingSpinner(translate("closing_game")):
-            subprocess.run(["taskkill", "/F", "/IM", GAME_PROCESS_NAME], capture_output=True)
-            time.sleep(2)
-        
-        if not _is_game_running():
-            print_ok(translate("game_closed_ok"))
-            return True
-        else:
-            print_error_msg(translate("game_close_failed"))
-            input(translate("press_enter"))
-            return False
-    else:
-        return False
+    td0 = []
+    for x in range(256):
+        s = inv_sbox[x]
+        td0.append((mul(s, 0x0E) << 24) | (mul(s, 0x09) << 16) | (mul(s, 0x0D) << 8) | mul(s, 0x0B))
+    td1 = [((w >> 8) | (w << 24)) & 0xFFFFFFFF for w in td0]
+    td2 = [((w >> 16) | (w << 16)) & 0xFFFFFFFF for w in td0]
+    td3 = [((w >> 24) | (w << 8)) & 0xFFFFFFFF for w in td0]
+    _AES_TABLES = (sbox, inv_sbox, td0, td1, td2, td3)
+    return _AES_TABLES
 
-def _create_profile_backup(profile_file):
-    ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    name = f"profile_backup_{ts}.sii"
-    path = os.path.join(os.path.dirname(profile_file), name)
-    shutil.copy2(profile_file, path)
-    print_ok(translate("backup_created"))
-    return path
+class _AesCbcDecryptor:
+    """Pure-Python AES-256-CBC decryptor. Call update() with chunks whose size is a multiple of 16."""
 
-def _decrypt_if_needed(profile_file):
-    encrypted = _is_encrypted(profile_file)
-    if encrypted:
-        print_info(translate("decrypting_profile"))
-        _run_sii_decrypt(profile_file)
-        # We don't print "Decryption complete" here to avoid line conflicts with Spinner later, 
-        # or we print it after the spinner finishes.
-    else:
-        print_ok(translate("already_editable"))
-    return encrypted
+    def __init__(self, key, iv):
+        sbox, _, td0, td1, td2, td3 = _aes_tables()
+        nk, self.rounds = len(key) // 4, len(key) // 4 + 6
+        words = list(struct.unpack(f">{nk}I", key))
+        rcon = 1
+        for i in range(nk, 4 * (self.rounds + 1)):
+            t = words[i - 1]
+            if i % nk == 0:
+                t = ((t << 8) | (t >> 24)) & 0xFFFFFFFF
+                t = (sbox[t >> 24] << 24) | (sbox[(t >> 16) & 0xFF] << 16) | (sbox[(t >> 8) & 0xFF] << 8) | sbox[t & 0xFF]
+                t ^= rcon << 24
+                rcon = ((rcon << 1) ^ 0x1B) & 0xFF if rcon & 0x80 else rcon << 1
+            elif nk > 6 and i % nk == 4:
+                t = (sbox[t >> 24] << 24) | (sbox[(t >> 16) & 0xFF] << 16) | (sbox[(t >> 8) & 0xFF] << 8) | sbox[t & 0xFF]
+            words.append(words[i - nk] ^ t)
 
-def _is_encrypted(file_path):
-    with open(file_path, "rb") as f: return f.read(8) != b"SiiNunit"
+        # Equivalent inverse cipher: reversed round keys, InvMixColumns on the inner ones
+        self.round_keys = []
+        for r in range(self.rounds, -1, -1):
+            rk = words[4 * r:4 * r + 4]
+            if 0 < r < self.rounds:
+                rk = [td0[sbox[w >> 24]] ^ td1[sbox[(w >> 16) & 0xFF]] ^ td2[sbox[(w >> 8) & 0xFF]] ^ td3[sbox[w & 0xFF]] for w in rk]
+            self.round_keys.append(rk)
+        self.prev = struct.unpack(">4I", iv)
 
-def _run_sii_decrypt(file_path):
-    if subprocess.run([SII_DECRYPT_EXE, file_path], capture_output=True).returncode != 0: handle_fatal("decrypt_failed")
+    def update(self, data):
+        _, isb, td0, td1, td2, td3 = _aes_tables()
+        rks, rounds = self.round_keys, self.rounds
+        words = struct.unpack(f">{len(data) // 4}I", data)
+        out = []
+        p0, p1, p2, p3 = self.prev
+        for i in range(0, len(words), 4):
+            c0, c1, c2, c3 = words[i:i + 4]
+            k = rks[0]
+            s0, s1, s2, s3 = c0 ^ k[0], c1 ^ k[1], c2 ^ k[2], c3 ^ k[3]
+            for r in range(1, rounds):
+                k = rks[r]
+                s0, s1, s2, s3 = (
+                    td0[s0 >> 24] ^ td1[(s3 >> 16) & 0xFF] ^ td2[(s2 >> 8) & 0xFF] ^ td3[s1 & 0xFF] ^ k[0],
+                    td0[s1 >> 24] ^ td1[(s0 >> 16) & 0xFF] ^ td2[(s3 >> 8) & 0xFF] ^ td3[s2 & 0xFF] ^ k[1],
+                    td0[s2 >> 24] ^ td1[(s1 >> 16) & 0xFF] ^ td2[(s0 >> 8) & 0xFF] ^ td3[s3 & 0xFF] ^ k[2],
+                    td0[s3 >> 24] ^ td1[(s2 >> 16) & 0xFF] ^ td2[(s1 >> 8) & 0xFF] ^ td3[s0 & 0xFF] ^ k[3],
+                )
+            k = rks[rounds]
+            out.append((isb[s0 >> 24] << 24 | isb[(s3 >> 16) & 0xFF] << 16 | isb[(s2 >> 8) & 0xFF] << 8 | isb[s1 & 0xFF]) ^ k[0] ^ p0)
+            out.append((isb[s1 >> 24] << 24 | isb[(s0 >> 16) & 0xFF] << 16 | isb[(s3 >> 8) & 0xFF] << 8 | isb[s2 & 0xFF]) ^ k[1] ^ p1)
+            out.append((isb[s2 >> 24] << 24 | isb[(s1 >> 16) & 0xFF] << 16 | isb[(s0 >> 8) & 0xFF] << 8 | isb[s3 & 0xFF]) ^ k[2] ^ p2)
+            out.append((isb[s3 >> 24] << 24 | isb[(s2 >> 16) & 0xFF] << 16 | isb[(s1 >> 8) & 0xFF] << 8 | isb[s0 & 0xFF]) ^ k[3] ^ p3)
+            p0, p1, p2, p3 = c0, c1, c2, c3
+        self.prev = (p0, p1, p2, p3)
+        return struct.pack(f">{len(out)}I", *out)
 
-def _read_file_lines(file_path):
-    with open(file_path, "r", encoding="utf-8", errors="replace") as f: return f.readlines()
+def _aes_cbc_decryptor(key, iv):
+    if HAS_CRYPTOGRAPHY:
+        return Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor().update
+    return _AesCbcDecryptor(key, iv).update
 
-def _write_file_lines(file_path, lines):
-    with open(file_path, "w", encoding="utf-8", newline="\n") as f: f.writelines(lines)
+def _detect_format(file_path):
+    """Returns 'text', 'scsc' or 'bsii' depending on the file signature."""
+    with open(file_path, "rb") as f: head = f.read(len(SII_TEXT_SIGNATURE))
+    if head.startswith(SII_TEXT_SIGNATURE): return "text"
+    if head.startswith(SII_SCSC_SIGNATURE): return "scsc"
+    if head.startswith(SII_BSII_SIGNATURE): return "bsii"
+    return "unknown"
 
-def is_admin():
+def _iter_scsc_payload(file_path, chunk_size=SII_SCSC_CHUNK):
+    """Decrypts and inflates a ScsC file, yielding the payload in chunks."""
+    with open(file_path, "rb") as f:
+        header = f.read(SII_SCSC_HEADER.size)
+        if len(header) != SII_SCSC_HEADER.size:
+            raise ValueError("truncated ScsC header")
+        signature, _hmac, iv, data_size = SII_SCSC_HEADER.unpack(header)
+        if signature != SII_SCSC_SIGNATURE:
+            raise ValueError("not a ScsC file")
+
+        update = _aes_cbc_decryptor(SII_KEY, iv)
+        inflater = zlib.decompressobj()
+        produced = 0
+        while not inflater.eof:
+            block = f.read(chunk_size)
+            if not block: break
+            if len(block) % 16:
+                raise ValueError("ScsC payload is not block aligned")
+            data = inflater.decompress(update(block))
+            produced += len(data)
+            if data: yield data
+        tail = inflater.flush()
+        produced += len(tail)
+        if tail: yield tail
+        if not inflater.eof or produced != data_size:
+            raise ValueError("ScsC payload is incomplete")
+
+def _iter_file_chunks(file_path, chunk_size=SII_SCSC_CHUNK):
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block: break
+            yield block
+
+def _payload_format(head):
+    if head.startswith(SII_TEXT_SIGNATURE): return "text"
+    if head.startswith(SII_BSII_SIGNATURE): return "bsii"
+    return "unknown"
+
+def _open_profile_payload(file_path, chunk_size=SII_SCSC_CHUNK):
+    """
+    Returns (format, chunks) where chunks yields the profile payload
+    (SiiNunit text or BSII) with any ScsC layer already removed.
+    """
+    fmt = _detect_format(file_path)
+    if fmt == "scsc":
+        chunks = _iter_scsc_payload(file_path, chunk_size)
+    elif fmt in ("text", "bsii"):
+        chunks = _iter_file_chunks(file_path, chunk_size)
+    else:
+        raise ValueError(f"unsupported profile format: {fmt}")
+
+    first = next(chunks, b"")
+    def payload():
+        yield first
+        yield from chunks
+    return _payload_format(first), payload()
+
+def _profile_needs_tool(file_path):
+    """True when the profile can only be rewritten as text with SII_Decrypt.exe."""
     try:
-        return ctypes.windll.shell32.IsUserAnAdmin()
-    except:
-        return False
+        fmt, chunks = _open_profile_payload(file_path, chunk_size=4096)
+        chunks.close()
+    except (ValueError, zlib.error):
+        return True
+    return fmt != "text"
 
-def request_admin():
-    if not is_admin():
-        # Determine the correct executable and parameters for relaunch
-        if getattr(sys, 'frozen', False):
-            # If running as an EXE
+# ---------------------------------------------------------------------------
+# BSII READER
+# ---------------------------------------------------------------------------
+# Binary SII is a sequence of blocks. Block type 0 declares a structure
+# (name + typed fields), any other value is a unit of that structure id
+# whose values follow in declaration order with no length prefix, so the
+# reader has to walk every value but only decodes the requested ones.
+
+BSII_ID_CHARS = "0123456789abcdefghijklmnopqrstuvwxyz_"
+
+# value type -> size in bytes of one element (scalars and arrays of scalars)
+BSII_FIXED_SIZES = {
+    0x03: 8,  0x05: 4,  0x07: 8,  0x09: 12, 0x11: 12, 0x17: 16, 0x19: 32,
+    0x25: 4,  0x27: 4,  0x29: 2,  0x2B: 2,  0x2F: 4,  0x31: 8,  0x33: 8,
+    0x35: 1,  0x37: 4,
+}
+BSII_FIXED_ARRAYS = {
+    0x04: 0x03, 0x06: 0x05, 0x08: 0x07, 0x0A: 0x09, 0x12: 0x11, 0x18: 0x17, 0x1A: 0x19,
+    0x26: 0x25, 0x28: 0x27, 0x2A: 0x29, 0x2C: 0x2B, 0x32: 0x31, 0x34: 0x33, 0x36: 0x35,
+}
+BSII_SCALAR_FORMATS = {0x25: "<i", 0x27: "<I", 0x29: "<h", 0x2B: "<H", 0x2F: "<I", 0x31: "<q", 0x33: "<Q", 0x35: "<?"}
+BSII_STRING, BSII_STRING_ARRAY = 0x01, 0x02
+BSII_ORDINAL = 0x37
+BSII_IDS, BSII_ID_ARRAYS = (0x39, 0x3B, 0x3D), (0x3A, 0x3C)
+
+class _ChunkReader:
+    """Sequential reader over an iterator of byte chunks; keeps at most one chunk buffered."""
+
+    __slots__ = ("_chunks", "_buf", "_pos")
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buf = b""
+        self._pos = 0
+
+    def _fill(self, n):
+        while len(self._buf) - self._pos < n:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                raise ValueError("unexpected end of BSII data")
+            self._buf = self._buf[self._pos:] + chunk
+            self._pos = 0
+
+    def read(self, n):
+        self._fill(n)
+        data = self._buf[self._pos:self._pos + n]
+        self._pos += n
+        return data
+
+    def skip(self, n):
+        available = len(self._buf) - self._pos
+        while n > available:
+            n -= available
+            self._buf, self._pos = b"", 0
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                raise ValueError("unexpected end of BSII data")
+            self._buf, available = chunk, len(chunk)
+        self._pos += n
+
+    def u8(self):
+        return self.read(1)[0]
+
+    def u32(self):
+        return struct.unpack("<I", self.read(4))[0]
+
+    def u64(self):
+        return struct.unpack("<Q", self.read(8))[0]
+
+    def string(self):
+        return self.read(self.u32())
+
+def _bsii_decode_token(value):
+    chars = []
+    while value:
+        value, idx = divmod(value, 38)
+        if idx: chars.append(BSII_ID_CHARS[idx - 1])
+    return "".join(chars)
+
+def _bsii_read_id(reader):
+    parts = reader.u8()
+    if parts == 0xFF:
+        value = reader.u64()
+        groups = [(value >> shift) & 0xFFFF for shift in (48, 32, 16, 0)]
+        while len(groups) > 1 and not groups[0]: groups.pop(0)
+        return "_nameless." + ".".join(f"{g:x}" for g in groups)
+    if parts == 0:
+        return "null"
+    return ".".join(_bsii_decode_token(reader.u64()) for _ in range(parts))
+
+def _bsii_skip_value(reader, value_type):
+    if value_type in BSII_FIXED_SIZES:
+        reader.skip(BSII_FIXED_SIZES[value_type])
+    elif value_type in BSII_FIXED_ARRAYS:
+        reader.skip(reader.u32() * BSII_FIXED_SIZES[BSII_FIXED_ARRAYS[value_type]])
+    elif value_type == BSII_STRING:
+        reader.skip(reader.u32())
+    elif value_type == BSII_STRING_ARRAY:
+        for _ in range(reader.u32()): reader.skip(reader.u32())
+    elif value_type in BSII_IDS:
+        _bsii_read_id(reader)
+    elif value_type in BSII_ID_ARRAYS:
+        for _ in range(reader.u32()): _bsii_read_id(reader)
+    else:
+        raise ValueError(f"unknown BSII value type 0x{value_type:02x}")
+
+def _bsii_read_value(reader, value_type, ordinals):
+    """Decodes one value. Strings stay as raw bytes so names are never re-encoded."""
+    if value_type == BSII_STRING:
+        return reader.string()
+    if value_type == BSII_STRING_ARRAY:
+        return [reader.string() for _ in range(reader.u32())]
+    if value_type == 0x03:
+        return _bsii_decode_token(reader.u64())
+    if value_type == 0x04:
+        return [_bsii_decode_token(reader.u64()) for _ in range(reader.u32())]
+    if value_type == BSII_ORDINAL:
+        return ordinals.get(reader.u32(), b"")
+    if value_type in BSII_SCALAR_FORMATS:
+        fmt = BSII_SCALAR_FORMATS[value_type]
+        return struct.unpack(fmt, reader.read(struct.calcsize(fmt)))[0]
+    if value_type in BSII_IDS:
+        return _bsii_read_id(reader)
+    if value_type in BSII_ID_ARRAYS:
+        return [_bsii_read_id(reader) for _ in range(reader.u32())]
+    if value_type in BSII_FIXED_ARRAYS:
+        size = BSII_FIXED_SIZES[BSII_FIXED_ARRAYS[value_type]]
+        return reader.read(reader.u32() * size)
+    return reader.read(BSII_FIXED_SIZES[value_type])
+
+def _iter_bsii_units(chunks, wanted):
+    """
+    Walks a BSII payload and yields (structure_name, unit_id, values) for
+    every unit whose structure is a key of `wanted`. `wanted` maps a
+    structure name to the field names to decode (None decodes all of them).
+    The caller can stop iterating at any point; nothing after it is read.
+    """
+    reader = _ChunkReader(chunks)
+    if reader.read(4) != SII_BSII_SIGNATURE:
+        raise ValueError("not a BSII payload")
+    reader.u32()  # format version; value layouts used here are shared by 1-3
+
+    structures = {}
+    while True:
+        block_type = reader.u32()
+        if block_type == 0:
+            if not reader.u8():
+                return  # end of file marker
+            struct_id = reader.u32()
+            name = reader.string().decode("ascii", errors="replace")
+            fields = []
+            while True:
+                value_type = reader.u32()
+                if value_type == 0: break
+                field = reader.string().decode("ascii", errors="replace")
+                ordinals = {}
+                if value_type == BSII_ORDINAL:
+                    for _ in range(reader.u32()):
+                        key = reader.u32()
+                        ordinals[key] = reader.string()
+                fields.append((field, value_type, ordinals))
+            structures[struct_id] = (name, fields)
+            continue
+
+        if block_type not in structures:
+            raise ValueError(f"BSII unit references undeclared structure {block_type}")
+        name, fields = structures[block_type]
+        unit_id = _bsii_read_id(reader)
+        decode = wanted[name] if name in wanted else ()
+        values = {}
+        for field, value_type, ordinals in fields:
+            if decode is None or field in decode:
+                values[field] = _bsii_read_value(reader, value_type, ordinals)
+            else:
+                _bsii_skip_value(reader, value_type)
+        if name in wanted:
+            yield name, unit_id, values
+
+def _read_bsii_unit(chunks, structure, fields=None):
+    """Returns the requested fields of the first `structure` unit, stopping right after it."""
+    units = _iter_bsii_units(chunks, {structure: fields})
+    try:
+        for _name, _unit_id, values in units:
+            return values
+    finally:
+        units.close()
+    return {}
+
+def _sii_quote(raw):
+    """Formats raw string bytes the way text SII writes them (quoted, non-ASCII as \\xNN)."""
+    out = []
+    for b in raw:
+        if b in (0x22, 0x5C):
+            out.append("\\" + chr(b))
+        elif 0x20 <= b < 0x7F:
+            out.append(chr(b))
+        else:
+            out.append(f"\\x{b:02x}")
+    return '"' + "".join(out) + '"'
+
+# ---------------------------------------------------------------------------
+# SII DOCUMENT
+# ---------------------------------------------------------------------------
+# Text SII as units ("user_profile : _nameless.1 {" ... "}"). Unit
+# boundaries are indexed in one forward pass that stops as soon as the
+# wanted unit is found; a unit body is only split into attributes when it is
+# accessed. Saving copies untouched units byte for byte, so an edit costs
+# the size of the unit it changes (plus one sequential copy of the file).
+# ScsC payloads are decrypted only as far as the indexed units reach; saving
+# streams the rest of the payload straight to the output.
+
+SII_UNIT_HEADER = re.compile(rb"^[ \t]*([A-Za-z0-9_]+)[ \t]*:[ \t]*([A-Za-z0-9_.]+)[ \t]*\{[ \t]*\r?\n", re.M)
+SII_UNIT_END    = re.compile(rb"^[ \t]*\}[ \t]*(?:\r?\n|\Z)", re.M)
+
+class SiiAttribute:
+    """One "name: value" line. raw is the original line, None once edited."""
+    __slots__ = ("name", "value", "raw")
+
+    def __init__(self, name, value, raw=None):
+        self.name, self.value, self.raw = name, value, raw
+
+    def serialize(self, newline):
+        if self.raw is not None:
+            return self.raw
+        return b" " + self.name + b": " + self.value + newline
+
+class SiiArray:
+    """
+    "name: N" followed by N "name[i]: value" lines (or "name[]: value").
+    raw holds the original lines, None once edited.
+    """
+    __slots__ = ("name", "items", "raw")
+
+    def __init__(self, name, items, raw=None):
+        self.name, self.items, self.raw = name, items, raw
+
+    def serialize(self, newline):
+        if self.raw is not None:
+            return self.raw
+        lines = [b" %s: %d" % (self.name, len(self.items))]
+        lines += [b" %s[%d]: %s" % (self.name, i, item) for i, item in enumerate(self.items)]
+        return newline.join(lines) + newline
+
+class SiiUnit:
+    """A unit of a SiiDocument. Values are the raw bytes after "name:" (quotes included)."""
+    __slots__ = ("doc", "kind", "unit_id", "start", "body_start", "body_end", "end", "_nodes", "dirty")
+
+    def __init__(self, doc, kind, unit_id, start, body_start, body_end, end):
+        self.doc, self.kind, self.unit_id = doc, kind, unit_id
+        self.start, self.body_start, self.body_end, self.end = start, body_start, body_end, end
+        self._nodes = None
+        self.dirty = False
+
+    @property
+    def nodes(self):
+        if self._nodes is None:
+            self._nodes = self._parse(bytes(self.doc.buffer[self.body_start:self.body_end]))
+        return self._nodes
+
+    @staticmethod
+    def _parse(body):
+        nodes, by_name, raw_lines = [], {}, {}
+        for line in body.splitlines(keepends=True):
+            key, sep, value = line.partition(b":")
+            name, index, _ = key.strip().partition(b"[")
+            if not sep or not name.replace(b"_", b"").isalnum():
+                nodes.append(SiiAttribute(None, None, line))  # blank line or comment
+                continue
+            value = value.strip()
+            node = by_name.get(name)
+            if not index:
+                node = SiiAttribute(name, value, line)
+                nodes.append(node)
+                by_name[name] = node
+                continue
+            if isinstance(node, SiiAttribute):
+                # The "name: N" count line turns out to start an array
+                array = SiiArray(name, [])
+                raw_lines[name] = [node.raw]
+                nodes[nodes.index(node)] = array
+                by_name[name] = node = array
+            elif node is None:
+                node = SiiArray(name, [])
+                raw_lines[name] = []
+                nodes.append(node)
+                by_name[name] = node
+            node.items.append(value)
+            raw_lines[name].append(line)
+        for name, lines in raw_lines.items():
+            by_name[name].raw = b"".join(lines)
+        return nodes
+
+    def _node(self, name):
+        name = name.encode("ascii") if isinstance(name, str) else name
+        for node in self.nodes:
+            if node.name == name:
+                return node
+        return None
+
+    def __contains__(self, name):
+        return self._node(name) is not None
+
+    def get(self, name, default=None):
+        node = self._node(name)
+        if node is None:
+            return default
+        return list(node.items) if isinstance(node, SiiArray) else node.value
+
+    def array(self, name):
+        """Items of an array attribute; a bare "name: 0" is an empty array."""
+        node = self._node(name)
+        if isinstance(node, SiiArray):
+            return list(node.items)
+        if node is not None and node.value.strip() == b"0":
+            return []
+        raise KeyError(name)
+
+    def __getitem__(self, name):
+        node = self._node(name)
+        if node is None:
+            raise KeyError(name)
+        return list(node.items) if isinstance(node, SiiArray) else node.value
+
+    def __setitem__(self, name, value):
+        """unit["profile_name"] = b'"Name"' sets a value, a list of bytes sets an array."""
+        name = name.encode("ascii") if isinstance(name, str) else name
+        new = SiiArray(name, list(value)) if isinstance(value, list) else SiiAttribute(name, value)
+        nodes = self.nodes
+        for i, node in enumerate(nodes):
+            if node.name == name:
+                nodes[i] = new
+                break
+        else:
+            nodes.append(new)
+        self.dirty = True
+
+    def serialize(self):
+        buf = self.doc.buffer
+        if not self.dirty:
+            return buf[self.start:self.end]
+        newline = self.doc.newline
+        return (bytes(buf[self.start:self.body_start])
+                + b"".join(node.serialize(newline) for node in self.nodes)
+                + bytes(buf[self.body_end:self.end]))
+
+class SiiDocument:
+    """
+    A text SII file (plain or ScsC) opened for lazy reading and editing.
+    Plain files are memory mapped; ScsC payloads are decrypted into memory
+    up to the last unit indexed so far. BSII raises ValueError. Use as a
+    context manager, or call close().
+    """
+
+    def __init__(self, path, payload=None):
+        """payload: the (format, chunks) of _open_profile_payload(path), when already opened."""
+        self.path = path
+        self._file = self._map = None
+        self._data = self._rest = None
+        fmt = _detect_format(path)
+        if fmt == "text":
+            if payload: payload[1].close()
+            self._file = open(path, "rb")
+            try:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.buffer = memoryview(self._map)
+            except ValueError:  # empty file
+                self.buffer = memoryview(b"")
+        else:
+            payload_fmt, chunks = payload or _open_profile_payload(path)
+            if payload_fmt != "text":
+                chunks.close()
+                raise ValueError(f"profile payload is not text: {payload_fmt}")
+            self._data, self._rest = bytearray(), chunks
+            self.buffer = memoryview(self._data)
+            while len(self._data) < 256 and self._read_more():
+                pass
+        self.source_format = fmt
+        first_line = bytes(self.buffer[:256])
+        self.newline = b"\r\n" if b"\r\n" in first_line else b"\n"
+        self.units = []
+        self._scan_pos = 0
+        self._scan_done = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        if self._rest is not None:
+            self._rest.close()
+            self._rest = None
+        if self.buffer is not None:
+            self.buffer.release()
+            self.buffer = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_more(self, size=1):
+        """Appends at least size bytes of the ScsC payload (less at its end); False if nothing was left."""
+        if self._rest is None:
+            return False
+        self.buffer.release()  # a bytearray cannot grow while a view is exported
+        before = len(self._data)
+        target = before + size
+        try:
+            while len(self._data) < target:
+                chunk = next(self._rest, None)
+                if chunk is None:
+                    self._rest = None
+                    break
+                self._data += chunk
+        finally:
+            self.buffer = memoryview(self._data)
+        return len(self._data) > before
+
+    def _index_next(self):
+        """Indexes one more unit; returns it, or None at the end of the file."""
+        if self._scan_done:
+            return None
+        while True:
+            data = self._map if self._map is not None else self._data if self._data is not None else self.buffer.obj
+            header = SII_UNIT_HEADER.search(data, self._scan_pos)
+            end = SII_UNIT_END.search(data, header.end()) if header else None
+            # A closing line at the very end may still be cut before its newline
+            if end and (self._rest is None or end.end() < len(data)):
+                break
+            # Grow by at least the unscanned tail, so a long unit is rescanned O(log n) times
+            if not self._read_more(max(len(data) - self._scan_pos, 1)):
+                if end:
+                    break
+                self._scan_done = True
+                return None
+        unit = SiiUnit(self, header.group(1).decode("ascii"), header.group(2).decode("ascii"),
+                       header.start(), header.end(), end.start(), end.end())
+        self.units.append(unit)
+        self._scan_pos = end.end()
+        return unit
+
+    def iter_units(self):
+        """Every unit in file order, indexing lazily as the caller advances."""
+        i = 0
+        while True:
+            if i == len(self.units) and self._index_next() is None:
+                return
+            yield self.units[i]
+            i += 1
+
+    def find(self, kind):
+        """First unit of that kind ("user_profile"), or None."""
+        for unit in self.iter_units():
+            if unit.kind == kind:
+                return unit
+        return None
+
+    def write_to(self, out):
+        """Writes the document to a binary file object; returns the byte count."""
+        written, pos = 0, 0
+        for unit in self.units:
+            if not unit.dirty:
+                continue
+            data = unit.serialize()
+            out.write(self.buffer[pos:unit.start])
+            out.write(data)
+            written += unit.start - pos + len(data)
+            pos = unit.end
+        out.write(self.buffer[pos:])
+        written += len(self.buffer) - pos
+        if self._rest is not None:
+            for chunk in self._rest:  # ScsC: the part never indexed goes straight through
+                out.write(chunk)
+                written += len(chunk)
+            self._rest = None
+        return written
+
+    def save(self, path=None):
+        """
+        Writes the document to path (default: over the source, as text)
+        through a fsynced temp file and an atomic rename, then closes the
+        document. Returns the number of bytes written.
+        """
+        path = path or self.path
+        target_dir = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".profile_", suffix=".tmp", dir=target_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                written = self.write_to(out)
+                out.flush()
+                os.fsync(out.fileno())
+            self.close()  # Windows cannot replace a mapped file
+            if os.path.exists(path):
+                shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+        _fsync_dir(target_dir)
+        return written
+
+# ---------------------------------------------------------------------------
+# ACTIVE_MODS FAST PATH
+# ---------------------------------------------------------------------------
+# Extract only needs the active_mods block of user_profile, the first unit of
+# the file. It is located with bytes.find on the memory-mapped file (or on
+# the ScsC payload as it is decrypted, which then stops early), and only its
+# item lines are sliced out; nothing after the unit is read or decoded.
+
+ACTIVE_MODS_COUNT = re.compile(rb"^[ \t]*active_mods[ \t]*:[ \t]*(\d+)[ \t]*\r?$", re.M)
+
+def _scan_active_mods(data, pos=0, final=True):
+    """
+    Raw active_mods values of the user_profile unit in SiiNunit text.
+    Returns (values, resume): values is None when data ends before the
+    unit (call again from resume with more data) or when the block is not
+    a plain "active_mods: N" list (left to SiiDocument).
+    """
+    while True:
+        at = data.find(b"user_profile", pos)
+        if at < 0:
+            return None, max(pos, len(data) - len(b"user_profile"))
+        line_start = data.rfind(b"\n", 0, at) + 1
+        header = SII_UNIT_HEADER.match(data, line_start)
+        if header and header.group(1) == b"user_profile":
+            break
+        if header is None and data.find(b"\n", at) < 0 and not final:
+            return None, line_start  # header line not complete yet
+        pos = at + len(b"user_profile")
+
+    end = SII_UNIT_END.search(data, header.end())
+    if end is None or (not final and end.end() == len(data)):
+        return None, line_start
+    count = ACTIVE_MODS_COUNT.search(data, header.end(), end.start())
+    if count is None:
+        return (None if data.find(b"active_mods", header.end(), end.start()) >= 0 else []), end.end()
+    total = int(count.group(1))
+    lines = bytes(data[count.end():end.start()]).split(b"\n", total + 1)[1:total + 1]
+    values = []
+    for line in lines:
+        name, sep, value = line.partition(b":")
+        if not sep or not name.strip().startswith(b"active_mods["):
+            return None, line_start  # not a plain numbered block; let SiiDocument parse it
+        values.append(value.strip())
+    if len(values) != total:
+        return None, line_start
+    return values, end.end()
+
+def _read_text_active_mods(profile_file, payload):
+    """active_mods of a text or ScsC profile via _scan_active_mods; None if the block is not plain."""
+    if _detect_format(profile_file) == "text":
+        payload[1].close()
+        with open(profile_file, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _scan_active_mods(data)[0]
+    buffer, resume = bytearray(), 0
+    chunks = payload[1]
+    try:
+        for chunk in chunks:
+            buffer += chunk
+            values, resume = _scan_active_mods(buffer, resume, final=False)
+            if values is not None:
+                return values
+    finally:
+        chunks.close()
+    return _scan_active_mods(buffer, resume)[0]
+
+# ---------------------------------------------------------------------------
+# PIPELINES
+# ---------------------------------------------------------------------------
+# Shared by the interactive menu and the headless CLI. They only talk to the
+# user through print_* helpers, so --json runs stay silent.
+
+def run_extract(profile_file, list_file=LIST_FILE, timer=None, fingerprints=False):
+    """Exports the profile mod order. With fingerprints, a content hash of each installed mod is added."""
+    timer = timer or PhaseTimer()
+    with timer.phase("backup"):
+        backup_id = _create_profile_backup(profile_file, "extract")
+    with timer.phase("decrypt"):
+        was_encrypted = _decrypt_if_needed(profile_file)
+    with timer.phase("parse"):
+        mods = _get_mods_from_profile(profile_file)
+    prints = {}
+    if fingerprints:
+        with timer.phase("fingerprints"):
+            prints = fingerprint_mods([_mod_key(m) for m in mods])
+    with timer.phase("write"):
+        with open(list_file, "w", encoding="utf-8", errors=LIST_ERRORS) as f:
+            for line in mods: f.write(line + "\n")
+            for key, digest in prints.items():
+                f.write(f"# fingerprint: {digest} {key}\n")
+    return {
+        "ok"           : True,
+        "profile"      : profile_file,
+        "list"         : list_file,
+        "mods"         : len(mods),
+        "fingerprints" : len(prints),
+        "encrypted"    : was_encrypted,
+        "backup"       : backup_id,
+    }
+
+def run_apply(profile_file, list_file=LIST_FILE, timer=None, verify_mods="warn", verify_archives=False, changes=None):
+    """
+    Applies list_file to the profile. On a write failure the backup is
+    restored and ok is False. verify_mods checks the list against the mod
+    catalog first: "warn" reports missing mods and fingerprint mismatches,
+    "strict" refuses to apply with missing mods, "fingerprints" only
+    compares fingerprints and "off" skips every check. verify_archives
+    also CRC-checks the listed mods and refuses to apply if one is damaged.
+    changes is the _profile_changes of list_file when the caller already
+    has it, so the profile is not parsed twice.
+    """
+    timer = timer or PhaseTimer()
+    with timer.phase("parse"):
+        new_mods = _load_mods_from_list_file(list_file)
+    print_info(f"{translate('mods_extracted_count')}: {Color.BOLD}{len(new_mods)}{Color.RESET}")
+
+    # Nothing to do when the profile already has this exact order
+    if changes is None:
+        with timer.phase("diff"):
+            changes = _profile_changes(profile_file, new_mods)
+    result = {
+        "ok"        : True,
+        "profile"   : profile_file,
+        "list"      : list_file,
+        "mods"      : len(new_mods),
+        "unchanged" : not any(changes.values()),
+        "changes"   : {op: len(items) for op, items in changes.items()},
+    }
+    if result["unchanged"]:
+        log(f"{profile_file}: mod order unchanged, nothing written")
+        print_ok(translate("list_unchanged"))
+        return result
+    _print_mod_diff(changes)
+
+    missing = []
+    if verify_mods in ("warn", "strict"):
+        with timer.phase("verify_mods"):
+            missing = _check_list_mods(new_mods)
+        if missing:
+            _print_missing_mods(missing)
+            if verify_mods == "strict":
+                handle_fatal(f"{len(missing)} {translate('mods_missing')}: {', '.join(missing[:10])}")
+
+    mismatched = []
+    if verify_mods != "off":
+        theirs = _load_list_fingerprints(list_file)
+        if theirs:
+            with timer.phase("fingerprints"):
+                mismatched = _compare_fingerprints(theirs)
+            if mismatched:
+                print_warn(f"{len(mismatched)} {translate('mods_mismatch')}: {', '.join(mismatched[:10])}")
+
+    if verify_archives:
+        with timer.phase("verify_archives"):
+            verified = run_verify(list_file)
+        if not verified["ok"]:
+            _print_verify(verified)
+            handle_fatal(verified["error"])
+
+    with timer.phase("backup"):
+        backup_id = _create_profile_backup(profile_file, "apply", replacing=True)
+    with timer.phase("decrypt"):
+        was_encrypted = _decrypt_if_needed(profile_file, for_write=True)
+
+    result.update(missing=missing, mismatched=mismatched, encrypted=was_encrypted, backup=backup_id)
+    try:
+        with timer.phase("write"):
+            _splice_mod_block(profile_file, new_mods)
+    except LookupError:
+        # SII_Decrypt may already have converted a BSII profile to text
+        with timer.phase("restore"):
+            _restore_profile_backup(profile_file, backup_id)
+        handle_fatal("format_error")
+    except Exception as exc:
+        print_error_msg(f"{translate('unexpected_error')} ({exc})")
+        with timer.phase("restore"):
+            _restore_profile_backup(profile_file, backup_id)
+        print_ok(translate("restore_ok"))
+        result.update(ok=False, error=str(exc), restored=True)
+    return result
+
+def _profile_changes(profile_file, new_mods):
+    """Edit script from the profile's active_mods to new_mods (no change means nothing to apply)."""
+    current = [_mod_value(m) for m in _get_mods_from_profile(profile_file, required=False)]
+    return _diff_mod_lists(current, [_mod_value(m) for m in new_mods])
+
+def run_mods(list_file=LIST_FILE, timer=None):
+    """Scans the mod catalog and checks list_file (when present) against it."""
+    timer = timer or PhaseTimer()
+    with timer.phase("scan"):
+        catalog = scan_mod_catalog()
+    result = {"ok": True, "count": len(catalog), "mods": sorted(catalog.values(), key=lambda e: e["key"])}
+    if os.path.isfile(list_file):
+        with timer.phase("check"):
+            keys = [_mod_key(m) for m in _load_mods_from_list_file(list_file)]
+        result["missing"] = [k for k in keys if k not in catalog]
+    return result
+
+def _print_mod_table(result):
+    for entry in result["mods"]:
+        manifest = entry["manifest"]
+        name = manifest.get("display_name", entry["key"])
+        version = manifest.get("package_version", "")
+        print(f"  {Color.INFO}{entry['source']:<8}{Color.RESET} {name} {Color.GRAY}{version} ({entry['key']}){Color.RESET}")
+    if result.get("missing"):
+        _print_missing_mods(result["missing"], limit=len(result["missing"]))
+
+def run_backups(profile_file, action="list", ref="latest", timer=None):
+    """list / restore <id|timestamp|latest> / prune / clean the backups of one profile."""
+    timer = timer or PhaseTimer()
+    result = {"ok": True, "profile": profile_file, "action": action}
+    with timer.phase(action):
+        if action == "list":
+            entries = _list_profile_backups(profile_file)
+            result.update(count=len(entries), backups=entries)
+        elif action == "restore":
+            entry = _restore_profile_backup(profile_file, ref)
+            print_ok(translate("restore_ok"))
+            result.update(count=1, restored=entry["id"], time=entry["time"])
+        elif action == "prune":
+            result["count"] = _prune_profile_backups(profile_file)
+        else:
+            result["count"] = _delete_profile_backups(profile_file)
+    return result
+
+def _batch_list_path(list_file, profile_file):
+    """list.txt -> list_<profile folder>.txt, so batch extracts do not overwrite each other."""
+    root, ext = os.path.splitext(list_file)
+    return f"{root}_{os.path.basename(os.path.dirname(profile_file))}{ext}"
+
+def run_batch(command, profile_files, list_file=LIST_FILE, jobs=BATCH_WORKERS, backup_action="list", backup_ref="latest",
+              verify_mods="warn", fingerprints=False):
+    """
+    Runs extract/apply/backups on several profiles with a bounded thread
+    pool. Each profile gets its own backup and rollback; a failure in one
+    profile never stops the others. Must run headless (errors are raised,
+    not prompted). Returns one result dict per profile, in input order.
+    """
+    def worker(profile_file):
+        timer = PhaseTimer()
+        start = time.perf_counter()
+        entry = {"profile": profile_file, "ok": False}
+        try:
+            if command == "extract":
+                entry.update(run_extract(profile_file, _batch_list_path(list_file, profile_file), timer, fingerprints))
+            elif command == "apply":
+                entry.update(run_apply(profile_file, list_file, timer, verify_mods))
+            else:
+                entry.update(run_backups(profile_file, backup_action, backup_ref, timer))
+        except ManagerError as e:
+            entry["error"] = str(e)
+        except Exception as e:
+            log(f"Batch {command} failed for {profile_file}: {e}", level="ERROR")
+            entry["error"] = str(e)
+        entry["timings_ms"] = timer.phases
+        entry["total_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return entry
+
+    workers = max(1, min(jobs, len(profile_files)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(worker, profile_files))
+
+def _print_batch_table(results):
+    width = max([len(_profile_display_name(r["profile"])) for r in results] + [7])
+    print(f"  {Color.BOLD}{'Profile':<{width}}  {'Result':<6}  {'Mods':>5}  {'Time':>9}{Color.RESET}")
+    draw_separator(width + 28)
+    for r in results:
+        name = _profile_display_name(r["profile"])
+        status = f"{Color.OK}OK    {Color.RESET}" if r["ok"] else f"{Color.ERROR}FAIL  {Color.RESET}"
+        count = r.get("mods", r.get("count", ""))
+        print(f"  {name:<{width}}  {status}  {count!s:>5}  {r['total_ms']:>7.0f}ms")
+        if not r["ok"]:
+            print(f"  {Color.GRAY}{'':<{width}}  {r.get('error', '')}{Color.RESET}")
+
+# ---------------------------------------------------------------------------
+# BACKUP STORE
+# ---------------------------------------------------------------------------
+# Backups/<profiles folder>/<profile>/objects/<sha256>.gz holds each distinct
+# profile.sii once, gzip compressed. index.json lists the backups (newest
+# last) so listing never has to open the objects.
+
+BACKUP_TIME_FORMAT = "%Y%m%d_%H%M%S"
+
+def _backup_store_dir(profile_file):
+    profile_dir = os.path.dirname(os.path.abspath(profile_file))
+    return os.path.join(BACKUPS_DIR, os.path.basename(os.path.dirname(profile_dir)), os.path.basename(profile_dir))
+
+def _load_backup_index(store):
+    try:
+        with open(os.path.join(store, "index.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+def _save_backup_index(store, entries):
+    fd, tmp_path = tempfile.mkstemp(prefix=".index_", suffix=".tmp", dir=store)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=1)
+    os.replace(tmp_path, os.path.join(store, "index.json"))
+
+def _store_backup_object(store, source):
+    """Hashes and compresses source in one pass. Returns (sha256, size, stored size)."""
+    objects = os.path.join(store, "objects")
+    os.makedirs(objects, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=objects)
+    digest, size = hashlib.sha256(), 0
+    try:
+        with open(source, "rb") as src, os.fdopen(fd, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=BACKUP_COMPRESSLEVEL, mtime=0) as gz:
+                for block in iter(lambda: src.read(1024 * 1024), b""):
+                    digest.update(block)
+                    gz.write(block)
+                    size += len(block)
+        sha256 = digest.hexdigest()
+        dest = os.path.join(objects, sha256 + ".gz")
+        if os.path.exists(dest):
+            os.remove(tmp_path)  # same content already stored
+        else:
+            os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+    return sha256, size, os.path.getsize(dest)
+
+def _reflink(source, dest):
+    """Creates dest as a copy-on-write clone of source. False where the file system cannot."""
+    if sys.platform == "darwin":
+        clonefile = ctypes.CDLL(None, use_errno=True).clonefile
+        return clonefile(os.fsencode(source), os.fsencode(dest), 0) == 0
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    with open(source, "rb") as src, open(dest, "xb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return True
+        except OSError:
+            pass
+    os.remove(dest)
+    return False
+
+def _link_backup_object(source, dest, hardlink):
+    """
+    Keeps source at dest without copying it. Returns "reflink", "hardlink"
+    or None when neither works (other volume, FAT, no permission).
+    """
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(dest)
+    try:
+        if _reflink(source, dest):
+            return "reflink"
+        if hardlink:
+            os.link(source, dest)
+            return "hardlink"
+    except (OSError, AttributeError):
+        pass
+    return None
+
+def _backup_object_path(store, entry):
+    """Stored file of an entry: a compressed copy named by hash, or a link named by id."""
+    if entry.get("kind", "gzip") == "gzip":
+        return os.path.join(store, "objects", entry["sha256"] + ".gz")
+    return os.path.join(store, "objects", entry["id"] + ".sii")
+
+def _create_profile_backup(profile_file, reason="", replacing=False):
+    """
+    Stores the current profile.sii and returns the backup id. replacing
+    means the caller is about to write the profile (through a rename), so
+    a hardlink to the current file stays unchanged; without it only a
+    reflink or a compressed copy is taken.
+    """
+    store = _backup_store_dir(profile_file)
+    os.makedirs(os.path.join(store, "objects"), exist_ok=True)
+    entries = _load_backup_index(store)
+    st = os.stat(profile_file)
+
+    # Unchanged since the last backup (same size and mtime): nothing to read
+    if entries and entries[-1]["size"] == st.st_size and entries[-1]["mtime_ns"] == st.st_mtime_ns:
+        print_ok(translate("backup_created"))
+        return entries[-1]["id"]
+
+    entry = {
+        "time"     : datetime.datetime.now().strftime(BACKUP_TIME_FORMAT),
+        "size"     : st.st_size,
+        "mtime_ns" : st.st_mtime_ns,
+        "reason"   : reason,
+    }
+    kind = None
+    if BACKUP_LINKS:
+        with tracer.span("backup.link") as span:
+            # Linked objects are never read, so the id comes from the file's identity
+            stamp = f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}".encode()
+            entry["id"] = hashlib.blake2b(stamp, digest_size=6).hexdigest()
+            dest = _backup_object_path(store, {"id": entry["id"], "kind": "link"})
+            kind = span["kind"] = _link_backup_object(profile_file, dest, replacing)
+    if kind:
+        entry.update(sha256=None, kind=kind, stored=0, object_mtime_ns=os.stat(dest).st_mtime_ns)
+    else:
+        with tracer.span("backup.store") as span:
+            sha256, size, stored = _store_backup_object(store, profile_file)
+            span["bytes"], span["stored"] = size, stored
+        if entries and entries[-1].get("sha256") == sha256:
+            entries[-1]["mtime_ns"] = st.st_mtime_ns
+            _save_backup_index(store, entries)
+            print_ok(translate("backup_created"))
+            return entries[-1]["id"]
+        entry.update(id=sha256[:12], sha256=sha256, kind="gzip", size=size, stored=stored)
+    entries.append(entry)
+    entries = _apply_backup_retention(store, entries)
+    _save_backup_index(store, entries)
+    print_ok(translate("backup_created"))
+    return entry["id"]
+
+def _apply_backup_retention(store, entries, keep_last=BACKUP_KEEP_LAST, max_age_days=BACKUP_MAX_AGE_DAYS):
+    """Drops entries outside the retention policy and the objects no entry uses anymore."""
+    now = datetime.datetime.now()
+    kept = []
+    for age_rank, entry in enumerate(reversed(entries)):
+        age = now - datetime.datetime.strptime(entry["time"], BACKUP_TIME_FORMAT)
+        if age_rank == 0 or ((keep_last is None or age_rank < keep_last)
+                             and (max_age_days is None or age.days < max_age_days)):
+            kept.append(entry)
+    kept.reverse()
+    if len(kept) != len(entries):
+        referenced = {_backup_object_path(store, e) for e in kept}
+        for e in entries:
+            path = _backup_object_path(store, e)
+            if path not in referenced:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    return kept
+
+def _find_backup(entries, ref):
+    """Resolves 'latest', an id (prefix) or a timestamp (YYYYmmdd_HHMMSS, prefix allowed)."""
+    if not entries: return None
+    if ref in (None, "", "latest"): return entries[-1]
+    for entry in reversed(entries):
+        if entry["id"].startswith(ref) or (entry.get("sha256") or "").startswith(ref) or entry["time"].startswith(ref):
+            return entry
+    return None
+
+def _restore_profile_backup(profile_file, ref="latest"):
+    """
+    Atomically replaces profile.sii with a stored backup and returns its
+    entry. A linked backup is cloned back in where the file system can
+    (constant time) and copied otherwise; it is never hardlinked, since the
+    game may later write the restored profile in place.
+    """
+    store = _backup_store_dir(profile_file)
+    entry = _find_backup(_load_backup_index(store), ref)
+    if entry is None:
+        handle_fatal("backup_not_found")
+    profile_dir = os.path.dirname(os.path.abspath(profile_file))
+    source = _backup_object_path(store, entry)
+    if entry.get("kind", "gzip") == "gzip":
+        fd, tmp_path = tempfile.mkstemp(prefix=".profile_", suffix=".tmp", dir=profile_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                with gzip.open(source, "rb") as src:
+                    shutil.copyfileobj(src, out, 1024 * 1024)
+                out.flush()
+                os.fsync(out.fileno())
+            if os.path.exists(profile_file):
+                shutil.copymode(profile_file, tmp_path)  # mkstemp creates it 0600
+            os.replace(tmp_path, profile_file)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+    else:
+        # A hardlink backup shares its inode with the profile until apply renames
+        # over it; if something wrote to the profile in place before that, the
+        # stored copy changed with it
+        try:
+            st = os.stat(source)
+        except OSError:
+            handle_fatal("backup_not_found")
+        if st.st_size != entry["size"] or st.st_mtime_ns != entry["object_mtime_ns"]:
+            log(f"Backup {entry['id']} of {profile_file} changed since it was stored", level="ERROR")
+            handle_fatal("backup_changed")
+        tmp_path = os.path.join(profile_dir, f".profile_{entry['id']}.tmp")
+        try:
+            if not _link_backup_object(source, tmp_path, hardlink=False):
+                shutil.copy2(source, tmp_path)
+                with open(tmp_path, "rb+") as f:
+                    os.fsync(f.fileno())
+            if os.path.exists(profile_file):
+                shutil.copymode(profile_file, tmp_path)
+            os.replace(tmp_path, profile_file)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+    _fsync_dir(profile_dir)
+    log(f"Backup {entry['id']} ({entry['time']}) restored to {profile_file}")
+    return entry
+
+def _list_profile_backups(profile_file):
+    return _load_backup_index(_backup_store_dir(profile_file))
+
+def _list_legacy_backups(profile_file):
+    """profile_backup_*.sii copies written next to profile.sii by older versions."""
+    profile_dir = os.path.dirname(profile_file)
+    return [f for f in os.listdir(profile_dir) if f.startswith("profile_backup_") and f.endswith(".sii")]
+
+def _prune_profile_backups(profile_file):
+    store = _backup_store_dir(profile_file)
+    entries = _load_backup_index(store)
+    kept = _apply_backup_retention(store, entries)
+    if len(kept) != len(entries):
+        _save_backup_index(store, kept)
+    return len(entries) - len(kept)
+
+def _delete_profile_backups(profile_file):
+    """Removes the whole store of the profile plus legacy copies. Returns how many backups were deleted."""
+    store = _backup_store_dir(profile_file)
+    count = len(_load_backup_index(store))
+    shutil.rmtree(store, ignore_errors=True)
+    profile_dir = os.path.dirname(profile_file)
+    for name in _list_legacy_backups(profile_file):
+        try:
+            os.remove(os.path.join(profile_dir, name))
+            count += 1
+        except OSError:
+            pass
+    return count
+
+def _print_backup_table(entries):
+    print(f"  {Color.BOLD}{'Id':<12}  {'Time':<15}  {'Size':>10}  {'Stored':>10}  Reason{Color.RESET}")
+    draw_separator()
+    for e in reversed(entries):
+        print(f"  {e['id']:<12}  {e['time']:<15}  {e['size']:>10}  {e['stored']:>10}  {e.get('reason', '')}")
+
+# ---------------------------------------------------------------------------
+# MOD CATALOG
+# ---------------------------------------------------------------------------
+# Index of the installed mods, keyed by the name active_mods uses (archive or
+# folder name for local mods, mod_workshop_package.<hex id> for Workshop
+# items). Only the zip central directory and manifest.sii are read, and an
+# entry is re-read only when its path, size or mtime changed.
+
+MOD_ARCHIVE_EXTS = (".scs", ".zip")
+HASHFS_SIGNATURE = b"SCS#"
+
+_CATALOG_LOCK = threading.Lock()
+
+def _steam_library_dirs():
+    """Steam library roots: the install folder plus those in libraryfolders.vdf."""
+    roots = []
+    if os.name == "nt":
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Valve\Steam") as key:
+                roots.append(winreg.QueryValueEx(key, "SteamPath")[0])
+        except OSError:
+            pass
+        roots.append(r"C:\Program Files (x86)\Steam")
+    else:
+        roots += [os.path.expanduser("~/.steam/steam"), os.path.expanduser("~/.local/share/Steam")]
+
+    libraries = []
+    for root in roots:
+        vdf = os.path.join(root, "steamapps", "libraryfolders.vdf")
+        candidates = [root]
+        try:
+            with open(vdf, "r", encoding="utf-8", errors="replace") as f:
+                candidates += [p.replace("\\\\", "\\") for p in re.findall(r'"path"\s+"([^"]+)"', f.read())]
+        except OSError:
+            pass
+        for path in candidates:
+            path = os.path.normcase(os.path.realpath(path))
+            if path not in libraries and os.path.isdir(path):
+                libraries.append(path)
+    return libraries
+
+def _workshop_dirs():
+    dirs = []
+    for library in _steam_library_dirs():
+        path = os.path.join(library, "steamapps", "workshop", "content", ETS2_APP_ID)
+        if os.path.isdir(path): dirs.append(path)
+    return dirs
+
+def _parse_manifest(text):
+    """
+    Reads the attributes of manifest.sii into a dict; name[] entries become
+    lists, replacing the "name: N" count line that precedes them.
+    """
+    attrs = {}
+    for m in re.finditer(r'^\s*(\w+)(\[\d*\])?\s*:\s*(.+?)\s*$', text, re.M):
+        name, is_array, value = m.groups()
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            value = value[1:-1].replace('\\"', '"')
+        if is_array is not None:
+            if not isinstance(attrs.get(name), list):
+                attrs[name] = []
+            attrs[name].append(value)
+        elif not isinstance(attrs.get(name), list):
+            attrs[name] = value
+    return attrs
+
+def _manifest_list(manifest, name):
+    """Array attribute of a parsed manifest; a count line with no items ("name: 0") is empty."""
+    value = manifest.get(name, [])
+    if isinstance(value, list):
+        return value
+    return [] if value.strip().isdigit() else [value]
+
+def _read_mod_archive(path):
+    """Returns (format, file count, manifest) reading only the central directory and manifest.sii."""
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if head == HASHFS_SIGNATURE:
+        return "hashfs", None, {}  # names are hashed, nothing to read cheaply
+    with zipfile.ZipFile(path) as zf:
+        manifest = {}
+        names = zf.namelist()
+        if "manifest.sii" in names:
+            manifest = _parse_manifest(zf.read("manifest.sii").decode("utf-8", errors="replace"))
+        return "zip", len(names), manifest
+
+def _read_mod_folder(path):
+    """Unpacked or Workshop mod folder: manifest.sii on disk or in one of its archives."""
+    manifest, count = {}, 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            count += 1
+            full = os.path.join(root, name)
+            if manifest: continue
+            if name == "manifest.sii":
+                with open(full, "r", encoding="utf-8", errors="replace") as f:
+                    manifest = _parse_manifest(f.read())
+            elif name.lower().endswith(MOD_ARCHIVE_EXTS):
+                try:
+                    manifest = _read_mod_archive(full)[2]
+                except (OSError, zipfile.BadZipFile):
+                    pass
+    return "dir", count, manifest
+
+def _folder_signature(path):
+    """(total size, newest mtime) of a folder, used as its change stamp."""
+    size, mtime = 0, 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            size += st.st_size
+            mtime = max(mtime, st.st_mtime_ns)
+    return size, mtime
+
+def _iter_mod_sources():
+    """Yields (key, path, source, is_folder) for every installed mod."""
+    if os.path.isdir(ETS2_MOD_DIR):
+        for entry in os.scandir(ETS2_MOD_DIR):
+            if entry.is_dir():
+                yield entry.name, entry.path, "local", True
+            elif entry.name.lower().endswith(MOD_ARCHIVE_EXTS):
+                yield os.path.splitext(entry.name)[0], entry.path, "local", False
+    for workshop in _workshop_dirs():
+        for entry in os.scandir(workshop):
+            if entry.is_dir() and entry.name.isdigit():
+                yield f"mod_workshop_package.{int(entry.name):016X}", entry.path, "workshop", True
+
+def _load_mod_index():
+    try:
+        with open(MOD_INDEX, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_json_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(path))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def scan_mod_catalog():
+    """
+    Returns {active_mods key: entry}, re-reading only new or changed mods.
+    Entries hold path, source, size, mtime_ns, format, files and manifest.
+    """
+    with _CATALOG_LOCK:
+        index = _load_mod_index()
+        catalog, changed = {}, False
+        for key, path, source, is_folder in _iter_mod_sources():
+            try:
+                if is_folder:
+                    size, mtime_ns = _folder_signature(path)
+                else:
+                    st = os.stat(path)
+                    size, mtime_ns = st.st_size, st.st_mtime_ns
+                cached = index.get(path)
+                if cached and cached["size"] == size and cached["mtime_ns"] == mtime_ns:
+                    catalog[key] = cached
+                    continue
+                fmt, files, manifest = _read_mod_folder(path) if is_folder else _read_mod_archive(path)
+            except (OSError, zipfile.BadZipFile) as e:
+                log(f"Skipping unreadable mod {path}: {e}", level="WARN")
+                continue
+            catalog[key] = {
+                "key"      : key,
+                "path"     : path,
+                "source"   : source,
+                "size"     : size,
+                "mtime_ns" : mtime_ns,
+                "format"   : fmt,
+                "files"    : files,
+                "manifest" : manifest,
+            }
+            changed = True
+        if changed or len(catalog) != len(index):
+            _save_json_atomic(MOD_INDEX, {entry["path"]: entry for entry in catalog.values()})
+        return catalog
+
+def _mod_key(mod_line):
+    """' active_mods[3]: "name|Display"' -> 'name'."""
+    value = mod_line.split(":", 1)[1].strip().strip('"')
+    return value.split("|", 1)[0]
+
+def _check_list_mods(mods):
+    """Returns the keys of list entries that are not installed. Empty when no mod folder can be found."""
+    if not os.path.isdir(ETS2_MOD_DIR) and not _workshop_dirs():
+        return []
+    catalog = scan_mod_catalog()
+    return [key for key in map(_mod_key, mods) if key not in catalog]
+
+def _print_missing_mods(missing, limit=10):
+    print_warn(f"{len(missing)} {translate('mods_missing')}:")
+    if quiet: return
+    for key in missing[:limit]:
+        print(f"      {Color.GRAY}{key}{Color.RESET}")
+    if len(missing) > limit:
+        print(f"      {Color.GRAY}... (+{len(missing) - limit}){Color.RESET}")
+
+# ---------------------------------------------------------------------------
+# MOD FINGERPRINTS
+# ---------------------------------------------------------------------------
+# A fingerprint is a BLAKE2b content hash of a mod (of every file for folder
+# mods), written to list.txt as "# fingerprint: <hash> <mod>" comments so
+# older versions simply ignore them. File hashes are cached by
+# (path, size, mtime): only new or changed archives are read again.
+
+FINGERPRINT_PATTERN = re.compile(r"^#\s*fingerprint:\s*([0-9a-f]+)\s+(.+?)\s*$")
+
+def _hash_segment(path, offset, length):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while remaining:
+            block = f.read(min(remaining, 1024 * 1024))
+            if not block: break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.digest()
+
+def _mod_files(entry):
+    """(relative name, path) of the files that make up a catalog entry, in a stable order."""
+    if entry["format"] != "dir":
+        return [(os.path.basename(entry["path"]), entry["path"])]
+    files = []
+    for root, _dirs, names in os.walk(entry["path"]):
+        for name in names:
+            full = os.path.join(root, name)
+            files.append((os.path.relpath(full, entry["path"]).replace(os.sep, "/"), full))
+    return sorted(files)
+
+def _hash_files(paths, workers=HASH_WORKERS):
+    """
+    Returns {path: hex digest}. Files above HASH_SEGMENT_SIZE are split into
+    segments hashed in parallel; the file digest is the hash of the segment
+    digests, so the result does not depend on scheduling.
+    """
+    with _CATALOG_LOCK:
+        try:
+            with open(FINGERPRINT_INDEX, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+    digests, stats, segments = {}, {}, []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stats[path] = st
+        cached = cache.get(path)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            digests[path] = cached["hash"]
+            continue
+        for offset in range(0, max(st.st_size, 1), HASH_SEGMENT_SIZE):
+            segments.append((path, offset, min(HASH_SEGMENT_SIZE, st.st_size - offset)))
+
+    if segments:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(lambda seg: _hash_segment(*seg), segments))
+        by_file = {}
+        for (path, _offset, _length), part in zip(segments, parts):
+            by_file.setdefault(path, []).append(part)
+        for path, file_parts in by_file.items():
+            digest = file_parts[0] if len(file_parts) == 1 else hashlib.blake2b(b"".join(file_parts), digest_size=16).digest()
+            st = stats[path]
+            digests[path] = digest.hex()
+            cache[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digests[path]}
+        with _CATALOG_LOCK:
+            _save_json_atomic(FINGERPRINT_INDEX, cache)
+    return digests
+
+def fingerprint_mods(keys):
+    """Returns {mod key: fingerprint} for the installed mods among keys (same order)."""
+    catalog = scan_mod_catalog()
+    entries = [catalog[k] for k in keys if k in catalog]
+    files = {entry["key"]: _mod_files(entry) for entry in entries}
+    digests = _hash_files([path for items in files.values() for _name, path in items])
+
+    prints = {}
+    for entry in entries:
+        items = files[entry["key"]]
+        if entry["format"] != "dir":
+            prints[entry["key"]] = digests.get(items[0][1], "")
+            continue
+        combined = hashlib.blake2b(digest_size=16)
+        for name, path in items:
+            combined.update(f"{name}\0{digests.get(path, '')}\n".encode("utf-8"))
+        prints[entry["key"]] = combined.hexdigest()
+    return prints
+
+def _load_list_fingerprints(list_file):
+    prints = {}
+    with open(list_file, "r", encoding="utf-8", errors=LIST_ERRORS) as f:
+        for line in f:
+            m = FINGERPRINT_PATTERN.match(line.strip())
+            if m: prints[m.group(2)] = m.group(1)
+    return prints
+
+def _compare_fingerprints(theirs):
+    """Keys whose local content differs from the fingerprint in the list (missing mods are not included)."""
+    mine = fingerprint_mods(list(theirs))
+    return [key for key, digest in theirs.items() if key in mine and mine[key] != digest]
+
+# ---------------------------------------------------------------------------
+# MOD LIST DIFF
+# ---------------------------------------------------------------------------
+
+def _mod_value(mod_line):
+    """' active_mods[3]: "name|Display"' -> '"name|Display"' (index dropped)."""
+    return mod_line.split(":", 1)[1].strip()
+
+def _tag_occurrences(items):
+    """Makes repeated entries distinct: [a, b, a] -> [(a, 0), (b, 0), (a, 1)]."""
+    seen = {}
+    tagged = []
+    for item in items:
+        n = seen.get(item, 0)
+        seen[item] = n + 1
+        tagged.append((item, n))
+    return tagged
+
+def _lcs_indices(old, new):
+    """
+    Index pairs (i, j) of a longest common subsequence of two lists. Entries
+    are made unique first, so the LCS is the longest increasing run of old
+    positions taken in new order (patience sorting): O(n log n), which keeps
+    full reorders of thousands of mods instant.
+    """
+    old_pos = {item: i for i, item in enumerate(_tag_occurrences(old))}
+    pairs = [(old_pos[item], j) for j, item in enumerate(_tag_occurrences(new)) if item in old_pos]
+
+    tails, tail_idx, prev = [], [], [None] * len(pairs)
+    for k, (i, _j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, i)
+        if pos == len(tails):
+            tails.append(i)
+            tail_idx.append(k)
+        else:
+            tails[pos] = i
+            tail_idx[pos] = k
+        prev[k] = tail_idx[pos - 1] if pos else None
+
+    result = []
+    k = tail_idx[-1] if tail_idx else None
+    while k is not None:
+        result.append(pairs[k])
+        k = prev[k]
+    result.reverse()
+    return result
+
+def _diff_mod_lists(old, new):
+    """
+    Minimal edit script turning old into new:
+      remove: [(old index, mod)]   insert: [(new index, mod)]
+      move:   [(old index, new index, mod)]
+    Mods kept in place are the LCS; every other shared mod counts as one move.
+    """
+    kept = _lcs_indices(old, new)
+    kept_old = {i for i, _ in kept}
+    kept_new = {j for _, j in kept}
+    old_tagged, new_tagged = _tag_occurrences(old), _tag_occurrences(new)
+    new_pos = {item: j for j, item in enumerate(new_tagged)}
+    old_pos = {item: i for i, item in enumerate(old_tagged)}
+    return {
+        "remove": [(i, old[i]) for i, item in enumerate(old_tagged) if item not in new_pos],
+        "insert": [(j, new[j]) for j, item in enumerate(new_tagged) if item not in old_pos],
+        "move"  : [(i, new_pos[item], old[i]) for i, item in enumerate(old_tagged)
+                   if item in new_pos and i not in kept_old and new_pos[item] not in kept_new],
+    }
+
+def _print_mod_diff(changes, limit=10):
+    counts = ", ".join(f"{op} {len(items)}" for op, items in changes.items())
+    print_info(f"{translate('diff_summary')}: {counts}")
+    lines = [f"- [{i}] {mod}" for i, mod in changes["remove"]]
+    lines += [f"+ [{j}] {mod}" for j, mod in changes["insert"]]
+    lines += [f"~ [{i} -> {j}] {mod}" for i, j, mod in changes["move"]]
+    for line in lines: log(f"diff: {line}")
+    if quiet: return
+    for line in lines[:limit]:
+        print(f"      {Color.GRAY}{line}{Color.RESET}")
+    if limit and len(lines) > limit:
+        print(f"      {Color.GRAY}... (+{len(lines) - limit}){Color.RESET}")
+
+def merge_mod_lists(base, mine, theirs, prefer="mine"):
+    """
+    Three-way merge of mod lists (values, as from _mod_value). A mod either
+    side removed is gone; mods both sides kept in place (their LCS with
+    base) are the skeleton, and every mod one side added or moved goes after
+    the mod before it on that side. Adds at the same spot come out mine
+    first. A mod both sides added or moved after different mods is a
+    conflict: it takes the prefer side's place and is reported as
+    {"mod", "at", "mine", "theirs"}, with the mod each side puts it after
+    (None for the top) and "at" its index in the merged list.
+
+    Returns (merged, conflicts).
+    """
+    base_t, mine_t, theirs_t = _tag_occurrences(base), _tag_occurrences(mine), _tag_occurrences(theirs)
+    in_base, in_mine, in_theirs = set(base_t), set(mine_t), set(theirs_t)
+    kept_mine = {base_t[i] for i, _ in _lcs_indices(base, mine)}
+    kept_theirs = {base_t[i] for i, _ in _lcs_indices(base, theirs)}
+    moved_mine = [item for item in mine_t if item not in kept_mine and (item in in_theirs or item not in in_base)]
+    moved_theirs = [item for item in theirs_t if item not in kept_theirs and (item in in_mine or item not in in_base)]
+
+    def anchors(side, own):
+        """Each moved mod of one side -> the mod before it there (skeleton or own moves only)."""
+        result, prev = {}, None
+        for item in side:
+            if item in own:
+                result[item] = prev
+                prev = item
+            elif item in kept_mine and item in kept_theirs:
+                prev = item
+        return result
+
+    after_mine = anchors(mine_t, set(moved_mine))
+    after_theirs = anchors(theirs_t, set(moved_theirs))
+
+    # Singly linked list from a None head: inserting after an anchor is O(1)
+    following = {}
+    tail = None
+    for item in base_t:
+        if item in kept_mine and item in kept_theirs:
+            following[tail] = item
+            tail = item
+    following.setdefault(tail, None)
+
+    # Theirs is linked first, so adds at the same spot end up mine first. A
+    # mod both sides place is linked then, unless it clashes and mine is
+    # preferred; until it is linked, mods after it hang on the one before
+    shared = after_mine.keys() & after_theirs.keys()
+    clashes = [item for item in mine_t if item in shared and after_mine[item] != after_theirs[item]]
+    skip_theirs = set(clashes) if prefer == "mine" else set()
+    skip_mine = shared - skip_theirs
+    for side, after, skip in ((theirs_t, after_theirs, skip_theirs), (mine_t, after_mine, skip_mine)):
+        for item in side:
+            if item not in after or item in skip: continue
+            anchor = after[item]
+            while anchor is not None and anchor not in following: anchor = after[anchor]
+            following[item] = following.get(anchor)
+            following[anchor] = item
+
+    merged, position = [], {}
+    item = following.get(None)
+    while item is not None:
+        position[item] = len(merged)
+        merged.append(item[0])
+        item = following.get(item)
+    conflicts = [{
+        "mod"    : item[0],
+        "at"     : position[item],
+        "mine"   : after_mine[item] and after_mine[item][0],
+        "theirs" : after_theirs[item] and after_theirs[item][0],
+    } for item in clashes]
+    conflicts.sort(key=lambda c: c["at"])
+    return merged, conflicts
+
+def _write_mod_list(list_file, mods, conflicts=()):
+    """
+    Writes mod values as a list.txt. Each conflict is marked with comment
+    lines around its mod saying where each side puts it, so the list still
+    loads as-is and the line can be moved by hand.
+    """
+    marks = {c["at"]: (n, c) for n, c in enumerate(conflicts, 1)}
+    with open(list_file, "w", encoding="utf-8", errors=LIST_ERRORS) as f:
+        for i, mod in enumerate(mods):
+            if i in marks:
+                n, c = marks[i]
+                where = {side: f"after {c[side]}" if c[side] else "first" for side in ("mine", "theirs")}
+                f.write(f"# <<<<<<< CONFLICT {n}: mine {where['mine']}, theirs {where['theirs']}\n")
+            f.write(f" active_mods[{i}]: {mod}\n")
+            if i in marks:
+                f.write(f"# >>>>>>> CONFLICT {marks[i][0]}\n")
+
+def _load_mod_source(source):
+    """Mod lines of a list.txt, a profile.sii (any format) or a profile folder, number or name."""
+    path = os.path.join(source, "profile.sii") if os.path.isdir(source) else source
+    if not os.path.isfile(path):
+        path = _resolve_profile(source)
+    if _detect_format(path) != "unknown":
+        return _get_mods_from_profile(path)
+    return _load_mods_from_list_file(path)
+
+def run_diff(old_source, new_source, timer=None):
+    """Edit script from one mod list to another; each side is a list.txt or a profile."""
+    timer = timer or PhaseTimer()
+    with timer.phase("parse"):
+        old = [_mod_value(m) for m in _load_mod_source(old_source)]
+        new = [_mod_value(m) for m in _load_mod_source(new_source)]
+    with timer.phase("diff"):
+        changes = _diff_mod_lists(old, new)
+    return {
+        "ok"        : True,
+        "old"       : old_source,
+        "new"       : new_source,
+        "unchanged" : not any(changes.values()),
+        "changes"   : changes,
+    }
+
+def run_merge(base_source, mine_source, theirs_source, list_file=LIST_FILE, prefer="mine", timer=None):
+    """
+    Merges the changes mine and theirs made to base into list_file (any of
+    them may be a list.txt or a profile). ok is False when there are
+    conflicts; the list is still written, with the conflicts marked.
+    """
+    timer = timer or PhaseTimer()
+    with timer.phase("parse"):
+        base, mine, theirs = ([_mod_value(m) for m in _load_mod_source(source)]
+                              for source in (base_source, mine_source, theirs_source))
+    with timer.phase("merge"):
+        merged, conflicts = merge_mod_lists(base, mine, theirs, prefer)
+    with timer.phase("write"):
+        _write_mod_list(list_file, merged, conflicts)
+    result = {
+        "ok"        : not conflicts,
+        "list"      : list_file,
+        "mods"      : len(merged),
+        "changes"   : {op: len(items) for op, items in _diff_mod_lists(base, merged).items()},
+        "conflicts" : conflicts,
+    }
+    if conflicts:
+        result["error"] = f"{len(conflicts)} {translate('merge_conflicts')} {list_file}"
+        log(f"merge: {result['error']}")
+    else:
+        print_ok(f"{translate('merge_ok')}: {len(merged)} mods")
+    return result
+
+# ---------------------------------------------------------------------------
+# LOAD ORDER
+# ---------------------------------------------------------------------------
+# active_mods[0] is the top of the in-game list: it loads last and wins every
+# file it shares with the mods below it, so a mod must sit above the mods it
+# depends on. Constraints come from manifest.sii (dependencies[]) and from
+# LOAD_RULES, one "<mod> above <mod>" or "<mod> below <mod>" per line, where
+# either side may be a glob such as promods_*.
+
+LOAD_RULE_PATTERN = re.compile(r"^(\S+)\s+(above|below)\s+(\S+)$")
+GAME_VERSION_PATTERN = re.compile(rb"init ver\.(\d+(?:\.\d+)+)")
+
+def _load_load_rules(rules_file=LOAD_RULES):
+    """[(upper pattern, lower pattern)] from the rules file; a missing file means no rules."""
+    rules = []
+    try:
+        with open(rules_file, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"): continue
+                m = LOAD_RULE_PATTERN.match(line)
+                if not m:
+                    print_warn(f"{os.path.basename(rules_file)}:{number}: {line}")
+                    continue
+                first, where, second = m.groups()
+                rules.append((first, second) if where == "above" else (second, first))
+    except FileNotFoundError:
+        pass
+    return rules
+
+def _game_version():
+    """Game version from the head of game.log.txt (e.g. '1.49.2.23'), or None."""
+    try:
+        with open(ETS2_GAME_LOG, "rb") as f:
+            m = GAME_VERSION_PATTERN.search(f.read(64 * 1024))
+    except OSError:
+        return None
+    return m.group(1).decode() if m else None
+
+def _dependency_key(dependency):
+    """manifest dependency -> active_mods key; a bare Workshop id is expanded, DLCs give None."""
+    dependency = dependency.strip()
+    if dependency.startswith("dlc_"): return None
+    if dependency.isdigit(): return f"mod_workshop_package.{int(dependency):016X}"
+    return dependency
+
+def _stable_topological_order(count, below):
+    """
+    Order of range(count) in which every i comes before the indices in
+    below[i], keeping the current order wherever the constraints allow:
+    each index is emitted right after the ones that must precede it (DFS,
+    O(V + E)). Constraints that close a cycle are ignored.
+    Returns (order, cycles), each cycle the sorted indices of a strongly
+    connected component.
+    """
+    above = [[] for _ in range(count)]
+    for upper in range(count):
+        for lower in below.get(upper, ()):
+            above[lower].append(upper)  # filled in index order, so already sorted
+
+    state = [0] * count  # 0 new, 1 on the stack, 2 emitted
+    order, looped = [], False
+    for root in range(count):
+        if state[root]: continue
+        state[root] = 1
+        stack = [(root, iter(above[root]))]
+        while stack:
+            node, pending = stack[-1]
+            for upper in pending:
+                if state[upper] == 0:
+                    state[upper] = 1
+                    stack.append((upper, iter(above[upper])))
+                    break
+                if state[upper] == 1:
+                    looped = True
+            else:
+                stack.pop()
+                state[node] = 2
+                order.append(node)
+    return order, _cyclic_components(count, above) if looped else []
+
+def _cyclic_components(count, edges):
+    """Strongly connected components with more than one index (iterative Tarjan, O(V + E))."""
+    index, low = [None] * count, [0] * count
+    on_stack, stack, components, counter = [False] * count, [], [], 0
+    for root in range(count):
+        if index[root] is not None: continue
+        work = [(root, iter(edges[root]))]
+        index[root] = low[root] = counter; counter += 1
+        stack.append(root); on_stack[root] = True
+        while work:
+            node, pending = work[-1]
+            for nxt in pending:
+                if index[nxt] is None:
+                    index[nxt] = low[nxt] = counter; counter += 1
+                    stack.append(nxt); on_stack[nxt] = True
+                    work.append((nxt, iter(edges[nxt])))
+                    break
+                if on_stack[nxt]:
+                    low[node] = min(low[node], index[nxt])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node: break
+                    if len(component) > 1:
+                        components.append(sorted(component))
+    return components
+
+def solve_load_order(keys, catalog, rules=()):
+    """
+    Orders a list of active_mods keys so every mod sits above its manifest
+    dependencies and every rule holds, otherwise keeping the given order.
+    Returns {"order": new order as indices into keys, "missing": [{"mod",
+    "requires", "installed"}], "cycles": [[keys]]}.
+    """
+    positions = {}
+    for i, key in enumerate(keys): positions.setdefault(key, []).append(i)
+    below, missing = {}, []
+
+    for i, key in enumerate(keys):
+        manifest = catalog.get(key, {}).get("manifest", {})
+        for dependency in _manifest_list(manifest, "dependencies"):
+            dep = _dependency_key(dependency)
+            if dep is None or dep == key: continue
+            if dep in positions:
+                below.setdefault(i, []).extend(positions[dep])
+            else:
+                missing.append({"mod": key, "requires": dep, "installed": dep in catalog})
+
+    def matching(pattern):
+        if not any(c in pattern for c in "*?["):
+            return positions.get(pattern, [])
+        return [i for key in fnmatch.filter(positions, pattern) for i in positions[key]]
+
+    for upper, lower in rules:
+        lowers = matching(lower)
+        for i in matching(upper):
+            below.setdefault(i, []).extend(j for j in lowers if j != i)
+
+    order, cycles = _stable_topological_order(len(keys), below)
+    return {
+        "order"   : order,
+        "missing" : missing,
+        "cycles"  : [[keys[i] for i in c] for c in cycles],
+    }
+
+def _incompatible_mods(keys, catalog, game_version):
+    """Keys whose manifest lists compatible_versions[] and none matches game_version."""
+    result = []
+    for key in keys:
+        versions = _manifest_list(catalog.get(key, {}).get("manifest", {}), "compatible_versions")
+        if not versions or not game_version: continue
+        if not any(fnmatch.fnmatchcase(game_version, v.strip()) or game_version.startswith(v.strip() + ".")
+                   for v in versions):
+            result.append(key)
+    return result
+
+def run_sort(source, list_file=LIST_FILE, rules_file=LOAD_RULES, timer=None):
+    """
+    Solves the load order of source (a list.txt or a profile) and writes it
+    to list_file. ok is False when rules or dependencies form a cycle; the
+    list is still written with the mods of the cycle in their current order.
+    """
+    timer = timer or PhaseTimer()
+    with timer.phase("parse"):
+        values = [_mod_value(m) for m in _load_mod_source(source)]
+        keys = [value.strip('"').split("|", 1)[0] for value in values]
+        rules = _load_load_rules(rules_file)
+    with timer.phase("scan"):
+        has_mods = os.path.isdir(ETS2_MOD_DIR) or _workshop_dirs()
+        catalog = scan_mod_catalog() if has_mods else {}
+    with timer.phase("solve"):
+        solved = solve_load_order(keys, catalog, rules)
+        game_version = _game_version()
+        incompatible = _incompatible_mods(keys, catalog, game_version)
+    ordered = [values[i] for i in solved["order"]]
+    changes = _diff_mod_lists(values, ordered)
+    with timer.phase("write"):
+        _write_mod_list(list_file, ordered)
+
+    result = {
+        "ok"           : not solved["cycles"],
+        "list"         : list_file,
+        "mods"         : len(ordered),
+        "rules"        : len(rules),
+        "changes"      : {op: len(items) for op, items in changes.items()},
+        "missing"      : solved["missing"],
+        "cycles"       : solved["cycles"],
+        "game_version" : game_version,
+        "incompatible" : incompatible,
+    }
+    for entry in solved["missing"]:
+        log(f"sort: {entry['mod']} requires {entry['requires']} (installed: {entry['installed']})", level="WARN")
+    if solved["missing"]:
+        print_warn(f"{len(solved['missing'])} {translate('sort_missing')}: "
+                   + ", ".join(f"{e['mod']} -> {e['requires']}" for e in solved["missing"][:5]))
+    if incompatible:
+        print_warn(f"{len(incompatible)} {translate('sort_incompatible')} {game_version}: {', '.join(incompatible[:5])}")
+    if solved["cycles"]:
+        result["error"] = f"{len(solved['cycles'])} {translate('sort_cycles')}: " + \
+                          "; ".join("(" + ", ".join(c[:5]) + ")" for c in solved["cycles"][:3])
+        log(f"sort: {result['error']}", level="WARN")
+    else:
+        _print_mod_diff(changes)
+        print_ok(translate("sort_ok"))
+    return result
+
+# ---------------------------------------------------------------------------
+# FILE CONFLICTS
+# ---------------------------------------------------------------------------
+# Two mods conflict when they ship the same internal path; the one higher in
+# active_mods wins it. File names come from the zip central directory only
+# (no entry is decompressed) and are cached per archive in CONFLICT_INDEX by
+# (size, mtime), so after the first scan only new or changed mods are read.
+# Root-level files (manifest.sii, description, icon) are package metadata
+# and never reach the game's file system, so they are left out.
+
+def _archive_names(path):
+    """Game file names in a .scs/.zip, or None for HashFS archives (names are hashed)."""
+    with open(path, "rb") as f:
+        if f.read(4) == HASHFS_SIGNATURE:
+            return None
+    with zipfile.ZipFile(path) as zf:
+        return [info.filename for info in zf.infolist() if not info.is_dir() and "/" in info.filename]
+
+def _mod_file_names(entry):
+    """Game file names of a catalog entry; folder mods add the contents of the archives inside them."""
+    if entry["format"] == "hashfs":
+        return None
+    if entry["format"] != "dir":
+        return _archive_names(entry["path"])
+    names, hashed = set(), False
+    for name, path in _mod_files(entry):
+        if name.lower().endswith(MOD_ARCHIVE_EXTS):
+            inner = _archive_names(path)
+            if inner is None: hashed = True
+            else: names.update(inner)
+        elif "/" in name:
+            names.add(name)
+    return None if hashed and not names else sorted(names)
+
+def mod_file_index(entries, workers=HASH_WORKERS):
+    """
+    Returns {mod key: [file names] or None} for catalog entries, reading the
+    archives of new or changed mods in parallel and the rest from the cache.
+    """
+    with _CATALOG_LOCK:
+        try:
+            with open(CONFLICT_INDEX, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+    files, stale = {}, []
+    for entry in entries:
+        cached = cache.get(entry["path"])
+        if cached and cached["size"] == entry["size"] and cached["mtime_ns"] == entry["mtime_ns"]:
+            files[entry["key"]] = cached["files"]
+        else:
+            stale.append(entry)
+
+    if stale:
+        def read(entry):
+            try:
+                return _mod_file_names(entry)
+            except (OSError, zipfile.BadZipFile) as e:
+                log(f"Skipping unreadable mod {entry['path']}: {e}", level="WARN")
+                return None
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            for entry, names in zip(stale, pool.map(read, stale)):
+                files[entry["key"]] = names
+                cache[entry["path"]] = {"size": entry["size"], "mtime_ns": entry["mtime_ns"], "files": names}
+        with _CATALOG_LOCK:
+            _save_json_atomic(CONFLICT_INDEX, cache)
+    return files
+
+def find_file_conflicts(keys, files):
+    """
+    Inverted index of files over the mods in keys (active_mods order, top
+    first). Returns [{"file", "winner", "overridden": [keys]}] for every
+    file shipped by more than one mod, sorted by file name.
+    """
+    owners = {}
+    for key in dict.fromkeys(keys):  # a repeated mod does not conflict with itself
+        for name in files.get(key) or ():
+            owners.setdefault(name, []).append(key)
+    return [{"file": name, "winner": mods[0], "overridden": mods[1:]}
+            for name, mods in sorted(owners.items()) if len(mods) > 1]
+
+def run_conflicts(source, timer=None):
+    """Files shared by the mods of source (a list.txt or a profile) and which mod wins each one."""
+    timer = timer or PhaseTimer()
+    with timer.phase("parse"):
+        keys = [_mod_key(m) for m in _load_mod_source(source)]
+    with timer.phase("scan"):
+        catalog = scan_mod_catalog()
+    with timer.phase("index"):
+        files = mod_file_index([catalog[k] for k in dict.fromkeys(keys) if k in catalog])
+    with timer.phase("conflicts"):
+        conflicts = find_file_conflicts(keys, files)
+        pairs = collections.Counter((c["winner"], loser) for c in conflicts for loser in c["overridden"])
+    return {
+        "ok"        : True,
+        "source"    : source,
+        "mods"      : len(keys),
+        "missing"   : [k for k in dict.fromkeys(keys) if k not in catalog],
+        "unread"    : [k for k in dict.fromkeys(keys) if k in files and files[k] is None],
+        "files"     : sum(len(names) for names in files.values() if names),
+        "pairs"     : [{"winner": w, "loser": l, "files": n} for (w, l), n in pairs.most_common()],
+        "conflicts" : conflicts,
+    }
+
+def _print_conflicts(result, limit=10):
+    if result["missing"]:
+        _print_missing_mods(result["missing"])
+    if result["unread"]:
+        print_warn(f"{len(result['unread'])} {translate('conflicts_unread')}: {', '.join(result['unread'][:limit])}")
+    if not result["conflicts"]:
+        print_ok(translate("conflicts_none"))
+        return
+    print_info(f"{Color.BOLD}{len(result['conflicts'])}{Color.RESET} {translate('conflicts_found')}")
+    for pair in result["pairs"][:limit]:
+        print(f"  {Color.OK}{pair['winner']}{Color.RESET} > {pair['loser']} {Color.GRAY}({pair['files']}){Color.RESET}")
+    if len(result["pairs"]) > limit:
+        print(f"  {Color.GRAY}... (+{len(result['pairs']) - limit}){Color.RESET}")
+
+# ---------------------------------------------------------------------------
+# ARCHIVE VERIFICATION
+# ---------------------------------------------------------------------------
+# Every entry of a mod archive is decompressed and checked against the CRC-32
+# in its zip header (zipfile raises at the end of a damaged entry). Archives
+# that pass are recorded in VERIFY_INDEX with their size, mtime and content
+# hash: an unchanged stamp skips the archive, and a touched but identical
+# file (same size and hash) is not decompressed again either.
+
+def _verify_archive_part(path, first, last):
+    """Decompresses entries first..last-1 of a zip; returns "name: error" strings."""
+    errors = []
+    try:
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist()[first:last]:
+                try:
+                    with zf.open(info) as entry:
+                        while entry.read(1024 * 1024): pass
+                except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError, RuntimeError) as e:
+                    errors.append(f"{info.filename}: {e}")
+    except (OSError, zipfile.BadZipFile) as e:
+        errors.append(str(e))
+    return errors
+
+def _plan_archive_parts(path, part_size=VERIFY_PART_SIZE):
+    """[(first, last, compressed bytes)] entry ranges of a zip, from its central directory."""
+    with zipfile.ZipFile(path) as zf:
+        infos = zf.infolist()
+    parts, first, size = [], 0, 0
+    for i, info in enumerate(infos):
+        size += info.compress_size
+        if size >= part_size:
+            parts.append((first, i + 1, size))
+            first, size = i + 1, 0
+    if first < len(infos) or not parts:
+        parts.append((first, len(infos), size))
+    return parts
+
+def _mod_archives(entry):
+    """Archive paths of a catalog entry (the archive itself, or the ones inside a folder mod)."""
+    if entry["format"] != "dir":
+        return [entry["path"]]
+    return [path for name, path in _mod_files(entry) if name.lower().endswith(MOD_ARCHIVE_EXTS)]
+
+def verify_mod_archives(entries, workers=VERIFY_WORKERS):
+    """
+    CRC-checks the archives of catalog entries. Returns {"checked",
+    "cached", "unchecked": [HashFS paths], "bad": {path: [errors]}}.
+    """
+    with _CATALOG_LOCK:
+        try:
+            with open(VERIFY_INDEX, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+    stats, touched = {}, []
+    for path in dict.fromkeys(p for entry in entries for p in _mod_archives(entry)):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stats[path] = st
+        cached = cache.get(path)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] != st.st_mtime_ns:
+            touched.append(path)
+    digests = _hash_files(touched) if touched else {}
+
+    todo, cached_count, unchecked, bad = [], 0, [], {}
+    for path, st in stats.items():
+        cached = cache.get(path)
+        if cached and cached["size"] == st.st_size and (
+                cached["mtime_ns"] == st.st_mtime_ns or cached["hash"] == digests.get(path)):
+            cached["mtime_ns"] = st.st_mtime_ns
+            cached_count += 1
+            continue
+        try:
+            with open(path, "rb") as f:
+                if f.read(4) == HASHFS_SIGNATURE:
+                    unchecked.append(path)
+                    continue
+            todo.extend((path, first, last, size) for first, last, size in _plan_archive_parts(path))
+        except (OSError, zipfile.BadZipFile) as e:
+            bad[path] = [str(e)]
+
+    if todo:
+        todo.sort(key=lambda part: -part[3])  # biggest parts first keeps every worker busy
+        if workers > 1 and len(todo) > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+                results = list(pool.map(_verify_archive_part, *zip(*(part[:3] for part in todo))))
+        else:
+            results = [_verify_archive_part(*part[:3]) for part in todo]
+        for (path, _first, _last, _size), errors in zip(todo, results):
+            if errors: bad.setdefault(path, []).extend(errors)
+
+    checked = [path for path in dict.fromkeys(part[0] for part in todo) if path not in bad]
+    digests.update(_hash_files(checked) if checked else {})
+    for path in checked:
+        st = stats[path]
+        cache[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digests[path]}
+    for path in bad:
+        cache.pop(path, None)
+    if todo or bad or touched:
+        with _CATALOG_LOCK:
+            _save_json_atomic(VERIFY_INDEX, cache)
+    return {"checked": len(checked) + len(bad), "cached": cached_count, "unchecked": unchecked, "bad": bad}
+
+def run_verify(source, timer=None, workers=VERIFY_WORKERS):
+    """Verifies the archives of the mods in source (a list.txt or a profile). ok is False if any is damaged."""
+    timer = timer or PhaseTimer()
+    with timer.phase("parse"):
+        keys = list(dict.fromkeys(_mod_key(m) for m in _load_mod_source(source)))
+    with timer.phase("scan"):
+        catalog = scan_mod_catalog()
+    entries = [catalog[k] for k in keys if k in catalog]
+    with timer.phase("verify"):
+        verified = verify_mod_archives(entries, workers)
+    owners = {path: entry["key"] for entry in entries for path in _mod_archives(entry)}
+    result = {
+        "ok"        : not verified["bad"],
+        "source"    : source,
+        "mods"      : len(keys),
+        "missing"   : [k for k in keys if k not in catalog],
+        "checked"   : verified["checked"],
+        "cached"    : verified["cached"],
+        "unchecked" : verified["unchecked"],
+        "bad"       : [{"mod": owners.get(path, ""), "path": path, "errors": errors}
+                       for path, errors in verified["bad"].items()],
+    }
+    if result["bad"]:
+        result["error"] = f"{len(result['bad'])} {translate('verify_bad')}: " + \
+                          ", ".join(entry["mod"] for entry in result["bad"][:10])
+        for entry in result["bad"]:
+            log(f"verify: {entry['path']}: {'; '.join(entry['errors'][:5])}", level="ERROR")
+    return result
+
+def _print_verify(result, limit=10):
+    if result["missing"]:
+        _print_missing_mods(result["missing"])
+    if not result["bad"]:
+        print_ok(f"{translate('verify_ok')} ({result['checked']} + {result['cached']} cached)")
+        return
+    print_warn(f"{len(result['bad'])} {translate('verify_bad')}:")
+    for entry in result["bad"][:limit]:
+        print(f"      {entry['mod']} {Color.GRAY}{entry['errors'][0]}{Color.RESET}")
+
+# ---------------------------------------------------------------------------
+# PROCESS QUERY
+# ---------------------------------------------------------------------------
+# Finds, kills and waits for processes in-process: the Toolhelp snapshot API
+# on Windows and /proc elsewhere (the game runs as eurotrucks2.exe under
+# Wine/Proton). No tasklist/taskkill subprocesses and no fixed sleeps.
+
+PROCESS_POLL_INTERVAL = 0.05  # seconds between /proc checks while waiting
+
+if os.name == "nt":
+    from ctypes import wintypes
+
+    _TH32CS_SNAPPROCESS        = 0x00000002
+    _PROCESS_TERMINATE         = 0x0001
+    _SYNCHRONIZE               = 0x00100000
+    _WAIT_OBJECT_0             = 0
+    _INVALID_HANDLE_VALUE      = ctypes.c_void_p(-1).value
+
+    class _PROCESSENTRY32W(ctypes.Structure):
+        _fields_ = [
+            ("dwSize",              wintypes.DWORD),
+            ("cntUsage",            wintypes.DWORD),
+            ("th32ProcessID",       wintypes.DWORD),
+            ("th32DefaultHeapID",   ctypes.c_size_t),
+            ("th32ModuleID",        wintypes.DWORD),
+            ("cntThreads",          wintypes.DWORD),
+            ("th32ParentProcessID", wintypes.DWORD),
+            ("pcPriClassBase",      ctypes.c_long),
+            ("dwFlags",             wintypes.DWORD),
+            ("szExeFile",           wintypes.WCHAR * 260),
+        ]
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    _kernel32.CreateToolhelp32Snapshot.argtypes = (wintypes.DWORD, wintypes.DWORD)
+    _kernel32.Process32FirstW.argtypes = (wintypes.HANDLE, ctypes.POINTER(_PROCESSENTRY32W))
+    _kernel32.Process32NextW.argtypes = (wintypes.HANDLE, ctypes.POINTER(_PROCESSENTRY32W))
+    _kernel32.OpenProcess.restype = wintypes.HANDLE
+    _kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    _kernel32.TerminateProcess.argtypes = (wintypes.HANDLE, wintypes.UINT)
+    _kernel32.WaitForSingleObject.restype = wintypes.DWORD
+    _kernel32.WaitForSingleObject.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+    _kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+
+def _iter_processes():
+    """Yields (pid, image name) for every process visible to this user."""
+    if os.name == "nt":
+        yield from _iter_processes_win32()
+    elif os.path.isdir("/proc"):
+        yield from _iter_processes_proc()
+    else:
+        # No /proc (macOS): one ps call is still far cheaper than nothing
+        try:
+            res = subprocess.run(["ps", "-axo", "pid=,comm="], capture_output=True, text=True)
+        except OSError:
+            return
+        for line in res.stdout.splitlines():
+            pid, _, name = line.strip().partition(" ")
+            if pid.isdigit():
+                yield int(pid), os.path.basename(name.strip())
+
+def _iter_processes_win32():
+    snapshot = _kernel32.CreateToolhelp32Snapshot(_TH32CS_SNAPPROCESS, 0)
+    if snapshot == _INVALID_HANDLE_VALUE:
+        return
+    try:
+        entry = _PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(entry)
+        ok = _kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while ok:
+            yield entry.th32ProcessID, entry.szExeFile
+            ok = _kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+    finally:
+        _kernel32.CloseHandle(snapshot)
+
+def _proc_is_zombie(pid):
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # "pid (comm) state ...": comm may contain spaces or parentheses
+            return f.read().rpartition(b")")[2].split()[0] == b"Z"
+    except (OSError, IndexError):
+        return True
+
+def _iter_processes_proc():
+    """
+    Wine names its processes after the Windows image in comm (cut to 15
+    bytes) and keeps the Windows path in argv[0], so both are reported.
+    """
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        pid = int(entry.name)
+        try:
+            with open(f"/proc/{pid}/comm", "rb") as f:
+                comm = f.read().strip().decode("utf-8", "replace")
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                argv0 = f.read().split(b"\0", 1)[0].decode("utf-8", "replace")
+        except OSError:
+            continue  # exited while scanning, or not ours to read
+        if _proc_is_zombie(pid):
+            continue
+        yield pid, comm
+        image = argv0.replace("\\", "/").rsplit("/", 1)[-1]
+        if image and image != comm:
+            yield pid, image
+
+def _find_processes(name):
+    """Sorted pids of the running processes whose image is name (case-insensitive)."""
+    name = name.lower()
+    own = os.getpid()
+    return sorted({pid for pid, image in _iter_processes() if image.lower() == name and pid != own})
+
+def _kill_processes(pids):
+    """Forcefully ends pids (like taskkill /F). Returns the pids that were signalled."""
+    killed = []
+    for pid in pids:
+        if os.name == "nt":
+            handle = _kernel32.OpenProcess(_PROCESS_TERMINATE, False, pid)
+            if not handle:
+                continue
+            try:
+                if _kernel32.TerminateProcess(handle, 1):
+                    killed.append(pid)
+            finally:
+                _kernel32.CloseHandle(handle)
+        else:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                killed.append(pid)
+            except OSError:
+                pass
+    return killed
+
+def _process_alive(pid):
+    if os.name == "nt":
+        handle = _kernel32.OpenProcess(_SYNCHRONIZE, False, pid)
+        if not handle:
+            return False
+        try:
+            return _kernel32.WaitForSingleObject(handle, 0) != _WAIT_OBJECT_0
+        finally:
+            _kernel32.CloseHandle(handle)
+    if os.path.isdir("/proc"):
+        return os.path.exists(f"/proc/{pid}") and not _proc_is_zombie(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists but belongs to someone else
+    return True
+
+def _wait_for_exit(pids, timeout):
+    """
+    Waits until every pid has exited or timeout seconds have passed; returns
+    True when they all exited. Windows blocks on the process handles, other
+    platforms poll every PROCESS_POLL_INTERVAL.
+    """
+    deadline = time.monotonic() + timeout
+    if os.name == "nt":
+        for pid in pids:
+            handle = _kernel32.OpenProcess(_SYNCHRONIZE, False, pid)
+            if not handle:
+                continue  # already gone
+            try:
+                remaining = max(0, int((deadline - time.monotonic()) * 1000))
+                if _kernel32.WaitForSingleObject(handle, remaining) != _WAIT_OBJECT_0:
+                    return False
+            finally:
+                _kernel32.CloseHandle(handle)
+        return True
+    pending = list(pids)
+    while True:
+        pending = [pid for pid in pending if _process_alive(pid)]
+        if not pending:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(PROCESS_POLL_INTERVAL)
+
+# ---------------------------------------------------------------------------
+# WATCH MODE
+# ---------------------------------------------------------------------------
+# Watches the folder of list.txt (sync tools and editors replace files by
+# renaming, so the file itself cannot be watched): inotify on Linux,
+# ReadDirectoryChangesW on Windows, stat polling anywhere else. Every
+# watcher has wait(timeout) -> True when list.txt may have changed.
+
+class _PollingWatcher:
+    backend = "polling"
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = self._signature()
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_size, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            signature = self._signature()
+            if signature != self.signature:
+                self.signature = signature
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(WATCH_POLL_INTERVAL, remaining))
+
+    def close(self):
+        pass
+
+class _InotifyWatcher:
+    backend = "inotify"
+
+    IN_MODIFY      = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM  = 0x00000040
+    IN_MOVED_TO    = 0x00000080
+    IN_CREATE      = 0x00000100
+    IN_DELETE      = 0x00000200
+    IN_Q_OVERFLOW  = 0x00004000
+    IN_NONBLOCK    = 0o4000
+    IN_CLOEXEC     = 0o2000000
+    EVENT          = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+    def __init__(self, path):
+        self.name = os.fsencode(os.path.basename(path))
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = (self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO
+                | self.IN_CREATE | self.IN_DELETE)
+        if libc.inotify_add_watch(self.fd, os.fsencode(os.path.dirname(os.path.abspath(path))), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            readable, _, _ = select.select([self.fd], [], [], max(0, deadline - time.monotonic()))
+            if not readable:
+                return False
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            offset = 0
+            while offset < len(data):
+                _wd, mask, _cookie, length = self.EVENT.unpack_from(data, offset)
+                offset += self.EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & self.IN_Q_OVERFLOW or name == self.name:
+                    return True
+
+    def close(self):
+        os.close(self.fd)
+
+if os.name == "nt":
+    _FILE_LIST_DIRECTORY          = 0x0001
+    _FILE_SHARE_ALL               = 0x0007  # read, write, delete
+    _OPEN_EXISTING                = 3
+    _FILE_FLAG_BACKUP_SEMANTICS   = 0x02000000
+    _FILE_FLAG_OVERLAPPED         = 0x40000000
+    _FILE_NOTIFY_CHANGE_FILE_NAME = 0x0001
+    _FILE_NOTIFY_CHANGE_SIZE      = 0x0008
+    _FILE_NOTIFY_CHANGE_LAST_WRITE = 0x0010
+
+    class _OVERLAPPED(ctypes.Structure):
+        _fields_ = [
+            ("Internal",     ctypes.c_void_p),
+            ("InternalHigh", ctypes.c_void_p),
+            ("Offset",       wintypes.DWORD),
+            ("OffsetHigh",   wintypes.DWORD),
+            ("hEvent",       wintypes.HANDLE),
+        ]
+
+    _kernel32.CreateFileW.restype = wintypes.HANDLE
+    _kernel32.CreateFileW.argtypes = (wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                                      wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE)
+    _kernel32.CreateEventW.restype = wintypes.HANDLE
+    _kernel32.CreateEventW.argtypes = (wintypes.LPVOID, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR)
+    _kernel32.ResetEvent.argtypes = (wintypes.HANDLE,)
+    _kernel32.ReadDirectoryChangesW.argtypes = (wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD, wintypes.BOOL,
+                                                wintypes.DWORD, ctypes.POINTER(wintypes.DWORD),
+                                                ctypes.POINTER(_OVERLAPPED), wintypes.LPVOID)
+    _kernel32.GetOverlappedResult.argtypes = (wintypes.HANDLE, ctypes.POINTER(_OVERLAPPED),
+                                              ctypes.POINTER(wintypes.DWORD), wintypes.BOOL)
+    _kernel32.CancelIoEx.argtypes = (wintypes.HANDLE, ctypes.POINTER(_OVERLAPPED))
+
+class _Win32DirWatcher:
+    backend = "ReadDirectoryChangesW"
+
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.name = os.path.basename(path).lower()
+        self.handle = _kernel32.CreateFileW(
+            os.path.dirname(os.path.abspath(path)), _FILE_LIST_DIRECTORY, _FILE_SHARE_ALL, None,
+            _OPEN_EXISTING, _FILE_FLAG_BACKUP_SEMANTICS | _FILE_FLAG_OVERLAPPED, None)
+        if self.handle == _INVALID_HANDLE_VALUE:
+            raise ctypes.WinError(ctypes.get_last_error())
+        self.overlapped = _OVERLAPPED()
+        self.overlapped.hEvent = _kernel32.CreateEventW(None, True, False, None)
+        self.buffer = ctypes.create_string_buffer(self.BUFFER_SIZE)
+        self._issue()
+
+    def _issue(self):
+        _kernel32.ResetEvent(self.overlapped.hEvent)
+        changes = _FILE_NOTIFY_CHANGE_FILE_NAME | _FILE_NOTIFY_CHANGE_SIZE | _FILE_NOTIFY_CHANGE_LAST_WRITE
+        if not _kernel32.ReadDirectoryChangesW(self.handle, self.buffer, self.BUFFER_SIZE, False, changes,
+                                               None, ctypes.byref(self.overlapped), None):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = max(0, int((deadline - time.monotonic()) * 1000))
+            if _kernel32.WaitForSingleObject(self.overlapped.hEvent, remaining) != _WAIT_OBJECT_0:
+                return False
+            transferred = wintypes.DWORD()
+            _kernel32.GetOverlappedResult(self.handle, ctypes.byref(self.overlapped), ctypes.byref(transferred), False)
+            data = self.buffer.raw[:transferred.value]
+            self._issue()
+            if not data:
+                return True  # buffer overflow: some change was lost, assume ours
+            offset = 0
+            while True:
+                next_offset, _action, length = struct.unpack_from("<III", data, offset)
+                name = data[offset + 12:offset + 12 + length].decode("utf-16-le")
+                if name.lower() == self.name:
+                    return True
+                if not next_offset:
+                    break
+                offset += next_offset
+
+    def close(self):
+        _kernel32.CancelIoEx(self.handle, ctypes.byref(self.overlapped))
+        _kernel32.CloseHandle(self.handle)
+        _kernel32.CloseHandle(self.overlapped.hEvent)
+
+def _open_list_watcher(path):
+    """The native watcher of this platform, or the polling one when it is unavailable."""
+    native = _Win32DirWatcher if os.name == "nt" else _InotifyWatcher if sys.platform.startswith("linux") else None
+    if native:
+        try:
+            return native(path)
+        except (OSError, AttributeError) as e:
+            log(f"{native.backend} unavailable ({e}), polling {path}", level="WARN")
+    return _PollingWatcher(path)
+
+def _list_digest(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def run_watch(profile_files, list_file=LIST_FILE, verify_mods="warn", stop=None, on_result=None):
+    """
+    Applies list_file to profile_files whenever its content changes, and
+    once at start. While the game is running the apply is queued until it
+    exits; the game is never closed from here. Runs until stop (a
+    threading.Event) is set and returns the number of applies. Must run
+    headless, like run_batch.
+    """
+    stop = stop or threading.Event()
+    watcher = _open_list_watcher(list_file)
+    log(f"Watching {list_file} ({watcher.backend}) for {len(profile_files)} profile(s)")
+    print_info(f"{translate('watch_started')} {Color.GRAY}({watcher.backend}){Color.RESET}")
+
+    applied_digest = None
+    pending = True  # apply once at start: the list may have changed while closed
+    queued = False
+    applies = 0
+    try:
+        while not stop.is_set():
+            if watcher.wait(WATCH_WAKE_INTERVAL):
+                # Debounce: wait for the burst of writes to settle
+                while not stop.is_set() and watcher.wait(WATCH_DEBOUNCE):
+                    pass
+                pending = True
+            if not pending:
+                continue
+            digest = _list_digest(list_file)
+            if digest is None or digest == applied_digest:
+                pending = False
+                continue
+            if _is_game_running():
+                if not queued:
+                    print_warn(translate("watch_queued"))
+                    log("List change queued until the game exits")
+                    queued = True
+                continue
+            queued = pending = False
+
+            results = run_batch("apply", profile_files, list_file, 1, verify_mods=verify_mods)
+            applied_digest = digest
+            applies += 1
+            for r in results:
+                name = _profile_display_name(r["profile"])
+                if r["ok"]:
+                    print_ok(f"{translate('watch_applied')}: {name} ({r['total_ms']:.0f} ms)")
+                else:
+                    print_error_msg(f"{name}: {r.get('error', '')}")
+                if on_result:
+                    on_result(r)
+    finally:
+        watcher.close()
+    return applies
+
+# ---------------------------------------------------------------------------
+# SYNC SERVER
+# ---------------------------------------------------------------------------
+# `serve` publishes list.txt over HTTP from memory; `pull` fetches it with
+# If-None-Match, so an unchanged list costs a single 304, and applies it
+# only when it changed. The ETag is a hash of the content, so it survives
+# server restarts.
+
+class _SyncServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, list_file):
+        super().__init__(address, _SyncHandler)
+        self.list_file = list_file
+        self.lock = threading.Lock()
+        self.signature = self.body = self.etag = None
+
+    def snapshot(self):
+        """(body, etag) of the current list, reread only when its size or mtime changed."""
+        try:
+            st = os.stat(self.list_file)
+        except OSError:
+            return None
+        signature = (st.st_size, st.st_mtime_ns)
+        with self.lock:
+            if signature != self.signature:
+                with open(self.list_file, "rb") as f:
+                    body = f.read()
+                self.signature, self.body = signature, body
+                self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+                log(f"serve: list loaded ({len(body)} bytes, ETag {self.etag})")
+            return self.body, self.etag
+
+class _SyncHandler(http.server.BaseHTTPRequestHandler):
+    server_version = "ETS2ModManager"
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        if urllib.parse.urlsplit(self.path).path not in ("/", "/list.txt"):
+            self.send_error(404)
+            return
+        snapshot = self.server.snapshot()
+        if snapshot is None:
+            self.send_error(404, "list.txt not found")
+            return
+        body, etag = snapshot
+        tags = [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]
+        if etag in tags or "*" in tags:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        log(f"serve: {self.address_string()} {fmt % args}")
+
+def make_sync_server(list_file=LIST_FILE, host="0.0.0.0", port=SYNC_PORT):
+    """Binds the sync server (port 0 picks a free one); call serve_forever() on it."""
+    return _SyncServer((host, port), list_file)
+
+def run_serve(list_file=LIST_FILE, host="0.0.0.0", port=SYNC_PORT):
+    """Serves list_file until interrupted."""
+    server = make_sync_server(list_file, host, port)
+    shown = host if host not in ("0.0.0.0", "") else socket.gethostbyname(socket.gethostname())
+    print_info(f"{translate('sync_serving')} {Color.BOLD}http://{shown}:{server.server_address[1]}/list.txt{Color.RESET}")
+    log(f"serve: listening on {host}:{server.server_address[1]} for {list_file}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+def _load_sync_state():
+    try:
+        with open(SYNC_STATE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def run_pull(url, profile_files, list_file=LIST_FILE, verify_mods="warn", timer=None):
+    """
+    Fetches the list at url with the ETag of the last pull. A 304 changes
+    nothing; a new list replaces list_file and is applied to profile_files
+    (queued with "queued" when the game is running: the ETag is only kept
+    once the list has been applied, so the next pull tries again).
+    Must run headless, like run_batch.
+    """
+    timer = timer or PhaseTimer()
+    state = _load_sync_state()
+    etag = state.get(url, {}).get("etag")
+    headers = {"If-None-Match": etag} if etag and os.path.isfile(list_file) else {}
+    result = {"ok": True, "url": url, "unchanged": False}
+    with timer.phase("fetch"):
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=DOWNLOAD_TIMEOUT) as resp:
+                body, etag = resp.read(), resp.headers.get("ETag")
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                handle_fatal(f"{translate('sync_error')}: {e}")
+            body = None
+        except DOWNLOAD_ERRORS as e:
+            handle_fatal(f"{translate('sync_error')}: {e}")
+    if body is None:
+        print_ok(translate("sync_unchanged"))
+        result["unchanged"] = True
+        return result
+
+    with timer.phase("save_list"):
+        fd, tmp_path = tempfile.mkstemp(prefix=".list_", dir=os.path.dirname(os.path.abspath(list_file)))
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, list_file)
+    print_ok(f"{translate('sync_downloaded')} ({len(body)} bytes)")
+    result.update(bytes=len(body), etag=etag)
+
+    if _is_game_running():
+        print_warn(translate("watch_queued"))
+        result["queued"] = True
+        return result
+    with timer.phase("apply"):
+        result["profiles"] = run_batch("apply", profile_files, list_file, 1, verify_mods=verify_mods)
+    result["ok"] = all(r["ok"] for r in result["profiles"])
+    if result["ok"] and etag:
+        state[url] = {"etag": etag, "time": datetime.datetime.now().isoformat(timespec="seconds")}
+        _save_json_atomic(SYNC_STATE, state)
+    return result
+
+# ---------------------------------------------------------------------------
+# CORE LOGIC
+# ---------------------------------------------------------------------------
+
+def _get_mods_from_profile(profile_file, required=True):
+    mods = []
+    try:
+        payload = _open_profile_payload(profile_file)
+        if payload[0] == "bsii":
+            values = _read_bsii_unit(payload[1], "user_profile", ("active_mods",))
+            for raw in values.get("active_mods", []):
+                mods.append(f" active_mods[{len(mods)}]: {_sii_quote(raw)}")
+        else:
+            values = _read_text_active_mods(profile_file, payload)
+            if values is None:
+                with SiiDocument(profile_file) as doc:
+                    unit = doc.find("user_profile")
+                    values = unit.array("active_mods") if unit is not None and "active_mods" in unit else []
+            for raw in values:
+                mods.append(f" active_mods[{len(mods)}]: {raw.decode('utf-8', errors=LIST_ERRORS)}")
+    except (ValueError, zlib.error):
+        handle_fatal("decode_failed")
+    if not mods and required: handle_fatal("no_mods_found")
+    return mods
+
+def _load_mods_from_list_file(list_file=LIST_FILE):
+    pattern = re.compile(r"active_mods\[\d+\]:\s*(.+)")
+    mods = []
+    with open(list_file, "r", encoding="utf-8", errors=LIST_ERRORS) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(("#", "::")): continue
+            m = pattern.match(line)
+            if m:
+                val = m.group(1).strip()
+                mods.append(f" active_mods[{len(mods)}]: {val}")
+    if not mods: handle_fatal("no_mods_found")
+    return mods
+
+def _splice_mod_block(profile_file, new_mods):
+    """
+    Replaces active_mods of the user_profile unit. Every other unit is
+    copied as-is into a temp file in the same folder, which is then fsynced
+    and atomically renamed over the original. Returns the bytes written.
+    """
+    start = time.perf_counter_ns()
+    with SiiDocument(profile_file) as doc:
+        unit = doc.find("user_profile")
+        if unit is None or "active_mods" not in unit:
+            raise LookupError("active_mods block not found")
+        unit["active_mods"] = [_mod_value(mod).encode("utf-8", errors=LIST_ERRORS) for mod in new_mods]
+        written = doc.save()
+    if tracer.enabled:
+        tracer.record("write.splice", start, time.perf_counter_ns(), {"bytes": written})
+    return written
+
+def _fsync_dir(path):
+    """Persists a rename on POSIX; directories cannot be opened this way on Windows."""
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+def _is_game_running():
+    return bool(_find_processes(GAME_PROCESS_NAME))
+
+def _handle_game_running():
+    if not _is_game_running():
+        return True
+    
+    print_warn(translate("game_running"))
+    if headless:
+        handle_fatal("game_running")
+    confirm = input(f"  {Color.BOLD}{translate('ask_close_game')}{Color.RESET}").strip().lower()
+    
+    if confirm in ("s", "si", "y", "yes"):
+        with LoadingSpinner(translate("closing_game")):
+            pids = _find_processes(GAME_PROCESS_NAME)
+            _kill_processes(pids)
+            closed = _wait_for_exit(pids, GAME_EXIT_TIMEOUT)
+        
+        if closed and not _is_game_running():
+            print_ok(translate("game_closed_ok"))
+            return True
+        else:
+            print_error_msg(translate("game_close_failed"))
+            input(translate("press_enter"))
+            return False
+    else:
+        return False
+
+def _decrypt_if_needed(profile_file, for_write=False):
+    with tracer.span("detect_format"):
+        encrypted = _is_encrypted(profile_file)
+    if encrypted:
+        print_info(translate("decrypting_profile"))
+        # ScsC and BSII are read in memory by the readers below; only
+        # rewriting a binary (BSII) payload still needs it as text first.
+        if for_write and _profile_needs_tool(profile_file):
+            _run_sii_decrypt(profile_file)
+    else:
+        print_ok(translate("already_editable"))
+    return encrypted
+
+def _is_encrypted(file_path):
+    return _detect_format(file_path) != "text"
+
+def _run_sii_decrypt(file_path):
+    """Decrypts a copy and renames it over file_path, so a hardlinked backup never changes."""
+    _ensure_tools()
+    with tracer.span("sii_decrypt.exe") as span:
+        span["bytes"] = os.path.getsize(file_path)
+        fd, tmp_path = tempfile.mkstemp(prefix=".profile_", suffix=".sii", dir=os.path.dirname(os.path.abspath(file_path)))
+        os.close(fd)
+        try:
+            shutil.copyfile(file_path, tmp_path)
+            if subprocess.run([SII_DECRYPT_EXE, tmp_path], capture_output=True).returncode != 0: handle_fatal("decrypt_failed")
+            os.replace(tmp_path, file_path)
+        finally:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+
+def is_admin():
+    try:
+        return ctypes.windll.shell32.IsUserAnAdmin()
+    except:
+        return False
+
+def request_admin():
+    if not is_admin():
+        # Determine the correct executable and parameters for relaunch
+        if getattr(sys, 'frozen', False):
+            # If running as an EXE
             executable = sys.executable
             # In EXE mode, argv[0] is the EXE itself, so we only need the remaining args
             params = ' '.join([f'"{arg}"' for arg in sys.argv[1:]])
@@ -760,7 +4334,283 @@ def create_desktop_shortcut():
         # Silently fail if shortcut creation fails to avoid interrupting the user
         pass
 
+# ---------------------------------------------------------------------------
+# HEADLESS CLI
+# ---------------------------------------------------------------------------
+
+CLI_EXIT_UNEXPECTED = 3  # exit code of an unexpected exception (1 is a handled failure, 2 bad usage)
+
+def parse_args(argv):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--profile", help="profile folder (default: most recently saved profile)")
+    common.add_argument("--list", default=LIST_FILE, help="path of list.txt (default: next to the manager)")
+    common.add_argument("--trace", metavar="FILE", help="write a Chrome trace of the run (chrome://tracing)")
+    common.add_argument("--json", action="store_true", help="print a JSON result instead of text")
+    common.add_argument("--lang", choices=sorted(LOCALIZATION), default="en", help="language of messages")
+    common.add_argument("--all-profiles", action="store_true", help="run on every profile in parallel")
+    common.add_argument("--jobs", type=int, default=BATCH_WORKERS, help="profiles processed at once with --all-profiles")
+
+    parser = argparse.ArgumentParser(prog="Manager", description=LOCALIZATION["en"]["title"] + " (headless)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    extract = commands.add_parser("extract", parents=[common], help="export the profile mod order to list.txt")
+    extract.add_argument("--fingerprints", action="store_true", help="add a content hash of each installed mod")
+    apply = commands.add_parser("apply", parents=[common], help="apply list.txt to the profile")
+    apply.add_argument("--strict", action="store_true", help="refuse to apply a list with mods that are not installed")
+    apply.add_argument("--verify", action="store_true", help="CRC-check the listed mods first and refuse to apply a damaged one")
+    commands.add_parser("mods", parents=[common], help="list installed mods and check list.txt against them")
+    watch = commands.add_parser("watch", parents=[common], help="apply list.txt every time it changes (Ctrl+C to stop)")
+    watch.add_argument("--strict", action="store_true", help="refuse to apply a list with mods that are not installed")
+    serve = commands.add_parser("serve", parents=[common], help="share list.txt over HTTP for `pull` (Ctrl+C to stop)")
+    serve.add_argument("--host", default="0.0.0.0", help="address to listen on (default: all)")
+    serve.add_argument("--port", type=int, default=SYNC_PORT, help="TCP port (default: %(default)s)")
+    pull = commands.add_parser("pull", parents=[common], help="download a shared list and apply it if it changed")
+    pull.add_argument("url", help="address printed by `serve`, e.g. http://192.168.1.20:27300/list.txt")
+    pull.add_argument("--every", type=float, default=0, metavar="SECONDS", help="keep pulling at this interval")
+    pull.add_argument("--strict", action="store_true", help="refuse to apply a list with mods that are not installed")
+    diff = commands.add_parser("diff", parents=[common], help="show how one mod list differs from another")
+    diff.add_argument("old", help="list.txt, profile.sii, or a profile folder, number or name")
+    diff.add_argument("new", nargs="?", help="same as old (default: --list)")
+    merge = commands.add_parser("merge", parents=[common], help="three-way merge of mod lists into --list")
+    merge.add_argument("base", help="common ancestor: list.txt, profile.sii, or a profile folder, number or name")
+    merge.add_argument("mine", help="your version (same forms as base)")
+    merge.add_argument("theirs", help="the other version (same forms as base)")
+    merge.add_argument("--prefer", choices=("mine", "theirs"), default="mine", help="side left active in conflicts")
+    merge.add_argument("--apply", action="store_true", help="apply the merged list to the profile if there are no conflicts")
+    merge.add_argument("--strict", action="store_true", help="refuse to apply a list with mods that are not installed")
+    sort = commands.add_parser("sort", parents=[common], help="order mods by manifest dependencies and load_rules.txt into --list")
+    sort.add_argument("source", nargs="?", help="list.txt, profile.sii, or a profile folder, number or name (default: --profile)")
+    sort.add_argument("--rules", default=LOAD_RULES, help="\"<mod> above|below <mod>\" rules (default: load_rules.txt)")
+    sort.add_argument("--apply", action="store_true", help="apply the sorted list to the profile if there is no cycle")
+    sort.add_argument("--strict", action="store_true", help="also refuse to apply when a dependency or listed mod is missing")
+    conflicts = commands.add_parser("conflicts", parents=[common], help="show which mods override each other's files")
+    conflicts.add_argument("source", nargs="?", help="list.txt, profile.sii, or a profile folder, number or name (default: --profile)")
+    verify = commands.add_parser("verify", parents=[common], help="CRC-check every archive of the listed mods")
+    verify.add_argument("source", nargs="?", help="list.txt, profile.sii, or a profile folder, number or name (default: --list)")
+    verify.add_argument("--workers", type=int, default=VERIFY_WORKERS, help="worker processes (default: one per core)")
+    commands.add_parser("profiles", parents=[common], help="list the profiles (--profile takes a number, folder or name)")
+    backups = commands.add_parser("backups", parents=[common], help="list, restore, prune or delete profile backups")
+    backups.add_argument("action", nargs="?", default="list", choices=("list", "restore", "prune", "clean"))
+    backups.add_argument("ref", nargs="?", default="latest", help="backup id or timestamp to restore (default: latest)")
+    return parser.parse_args(argv)
+
+def _resolve_profile(profile_dir):
+    """
+    Returns profile.sii of --profile (a path, or a profile number, folder or
+    name from list_profiles), or of the most recently saved profile.
+    """
+    if profile_dir:
+        profile_file = profile_dir if os.path.isfile(profile_dir) else os.path.join(profile_dir, "profile.sii")
+        if os.path.isfile(profile_file):
+            return profile_file
+        errors = []
+        picked = select_profile(list_profiles(errors), profile_dir)
+        if not picked:
+            handle_fatal(errors[0] if errors else "no_sii_file")
+        return picked["path"]
+    errors = []
+    profile_file = _find_active_profile(errors)
+    if errors: handle_fatal(errors[0])
+    return profile_file
+
+def cli_main(argv):
+    """Non-interactive entry point. Returns the process exit code."""
+    global current_lang, headless, quiet
+    install_signal_handlers()
+    args = parse_args(argv)
+    current_lang, headless, quiet = args.lang, True, args.json
+    if args.trace or os.environ.get(TRACE_ENV):
+        tracer.enable(args.trace or os.environ.get(TRACE_ENV))
+    log(f"Headless run: {' '.join(argv)}")
+
+    timer = PhaseTimer()
+    start = time.perf_counter()
+    result = {"command": args.command, "ok": False}
+    try:
+        if args.command == "watch":
+            return _cli_watch(args)
+        if args.command == "serve":
+            run_serve(args.list, args.host, args.port)
+            return 0
+        if args.command == "pull":
+            return _cli_pull(args, result, timer, start)
+        if args.command in ("diff", "merge", "sort"):
+            _cli_merge(args, result, timer)
+        elif args.command == "conflicts":
+            result.update(run_conflicts(args.source or _resolve_profile(args.profile), timer))
+            if not args.json:
+                _print_conflicts(result)
+        elif args.command == "verify":
+            result.update(run_verify(args.source or args.list, timer, max(1, args.workers)))
+            if not args.json:
+                _print_verify(result)
+        elif args.all_profiles and args.command not in ("mods", "profiles"):
+            return _cli_batch(args, result, timer, start)
+        elif args.command == "profiles":
+            with timer.phase("find_profile"):
+                errors = []
+                result.update(ok=True, profiles=list_profiles(errors))
+                if errors: handle_fatal(errors[0])
+            if not args.json:
+                _print_profile_table(result["profiles"])
+        elif args.command == "mods":
+            result.update(run_mods(args.list, timer))
+            if not args.json:
+                _print_mod_table(result)
+        else:
+            _cli_single(args, result, timer)
+    except ManagerError as e:
+        result["error"] = str(e)
+    except Exception as e:
+        # Headless callers still get a result document, with its own exit code
+        import traceback
+        log(f"Unhandled exception in {args.command}: {traceback.format_exc()}", level="FATAL")
+        result.update(ok=False, error=f"{type(e).__name__}: {e}", unexpected=True)
+    result["timings_ms"] = timer.phases
+    result["total_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    status = _cli_report(args, result)
+    return CLI_EXIT_UNEXPECTED if result.get("unexpected") else status
+
+def _cli_single(args, result, timer):
+    """extract/apply/backups on one profile (--profile or the most recent one)."""
+    with timer.phase("find_profile"):
+        profile_file = _resolve_profile(args.profile)
+    if args.command == "backups":
+        if args.action == "restore":
+            with timer.phase("game_check"):
+                _handle_game_running()
+        result.update(run_backups(profile_file, args.action, args.ref, timer))
+        if args.action == "list" and not args.json:
+            _print_backup_table(result["backups"])
+        return
+    with timer.phase("game_check"):
+        _handle_game_running()
+    if args.command == "extract":
+        result.update(run_extract(profile_file, args.list, timer, args.fingerprints))
+    else:
+        if not os.path.isfile(args.list):
+            handle_fatal("list_not_found")
+        result.update(run_apply(profile_file, args.list, timer, "strict" if args.strict else "warn", args.verify))
+
+def _cli_merge(args, result, timer):
+    """diff, or merge/sort into --list; --apply then applies it like `apply`."""
+    if args.command == "diff":
+        result.update(run_diff(args.old, args.new or args.list, timer))
+        if not args.json:
+            _print_mod_diff(result["changes"], limit=None)
+        return
+    if args.command == "sort":
+        result.update(run_sort(args.source or _resolve_profile(args.profile), args.list, args.rules, timer))
+        if args.strict and result["ok"] and result["missing"]:
+            result.update(ok=False, error=f"{len(result['missing'])} {translate('sort_missing')}")
+    else:
+        result.update(run_merge(args.base, args.mine, args.theirs, args.list, args.prefer, timer))
+    if not (args.apply and result["ok"]):
+        return
+    with timer.phase("find_profile"):
+        profile_files = _cli_profiles(args)
+    with timer.phase("game_check"):
+        _handle_game_running()
+    verify_mods = "strict" if args.strict else "warn"
+    if len(profile_files) == 1:
+        applied = [run_apply(profile_files[0], args.list, timer, verify_mods)]
+    else:
+        applied = run_batch("apply", profile_files, args.list, args.jobs, verify_mods=verify_mods)
+    result.update(ok=all(r["ok"] for r in applied), applied=applied)
+    if not result["ok"]:
+        result["error"] = next(r.get("error", "apply") for r in applied if not r["ok"])
+
+def _cli_profiles(args):
+    """Profiles targeted by --all-profiles or --profile (default: the most recent one)."""
+    if args.all_profiles:
+        errors = []
+        profile_files = _find_all_profiles(errors)
+        if errors: handle_fatal(errors[0])
+        return profile_files
+    return [_resolve_profile(args.profile)]
+
+def _cli_watch(args):
+    """Runs until interrupted; with --json every apply is printed as one JSON line."""
+    try:
+        profile_files = _cli_profiles(args)
+    except ManagerError as e:
+        return _cli_report(args, {"command": "watch", "ok": False, "error": str(e)})
+    on_result = (lambda r: print(json.dumps(r, ensure_ascii=False), flush=True)) if args.json else None
+    run_watch(profile_files, args.list, "strict" if args.strict else "warn", on_result=on_result)
+    return 0
+
+def _cli_pull(args, result, timer, start):
+    """One pull, or one every --every seconds until interrupted (one report each)."""
+    while True:
+        try:
+            with timer.phase("find_profile"):
+                profile_files = _cli_profiles(args)
+            result.update(run_pull(args.url, profile_files, args.list, "strict" if args.strict else "warn", timer))
+        except ManagerError as e:
+            result.update(ok=False, error=str(e))
+        result["timings_ms"] = timer.phases
+        result["total_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        status = _cli_report(args, result)
+        if args.every <= 0:
+            return status
+        time.sleep(args.every)
+        timer, start = PhaseTimer(), time.perf_counter()
+        result = {"command": args.command, "ok": False}
+
+def _cli_batch(args, result, timer, start):
+    global quiet
+    with timer.phase("find_profile"):
+        errors = []
+        profile_files = _find_all_profiles(errors)
+        if errors: handle_fatal(errors[0])
+    if args.command != "backups" or args.action == "restore":
+        with timer.phase("game_check"):
+            _handle_game_running()
+        if args.command == "apply" and not os.path.isfile(args.list):
+            handle_fatal("list_not_found")
+        if args.command == "apply" and args.verify:  # once for every profile
+            with timer.phase("verify_archives"):
+                verified = run_verify(args.list)
+            if not verified["ok"]:
+                handle_fatal(verified["error"])
+
+    # Per-profile messages would interleave; they still reach the log
+    console_quiet, quiet = quiet, True
+    try:
+        with timer.phase("batch"):
+            profiles = run_batch(args.command, profile_files, args.list, args.jobs,
+                                 getattr(args, "action", "list"), getattr(args, "ref", "latest"),
+                                 "strict" if getattr(args, "strict", False) else "warn",
+                                 getattr(args, "fingerprints", False))
+    finally:
+        quiet = console_quiet
+
+    failed = sum(1 for r in profiles if not r["ok"])
+    result.update(ok=not failed, profiles=profiles)
+    if failed:
+        result["error"] = f"{failed}/{len(profiles)} profiles failed"
+    result["timings_ms"] = timer.phases
+    result["total_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    if not args.json:
+        print()
+        _print_batch_table(profiles)
+        print()
+    return _cli_report(args, result)
+
+def _cli_report(args, result):
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif result["ok"]:
+        print_ok(f"{args.command}: {result['total_ms']:.0f} ms")
+    else:
+        print_error_msg(result.get("error", args.command))
+    return 0 if result["ok"] else 1
+
 def main():
+    if len(sys.argv) > 1:
+        sys.exit(cli_main(sys.argv[1:]))
+    install_signal_handlers()
+    if os.environ.get(TRACE_ENV):
+        tracer.enable(os.environ[TRACE_ENV])
     try:
         log("--- INICIANDO SESIÓN / STARTING SESSION ---")
         request_admin()
@@ -774,7 +4624,7 @@ def main():
             if profile_file:
                 main_menu(profile_file)
             else:
-                log("No se pudo cargar el perfil.", is_error=True)
+                log("No se pudo cargar el perfil.", level="ERROR")
         else:
             # This part should theoretically not be reached as request_admin() exits
             pass
@@ -789,4 +4639,5 @@ def main():
         handle_fatal(str(e))
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # verify workers in the PyInstaller build
     main()
@@ -0,0 +1,487 @@
+"""
+Benchmarks for Manager.py on synthetic profiles. Runs headless on any OS,
+no game install or SII_Decrypt.exe needed.
+
+    python benchmark.py                     run the default matrix
+    python benchmark.py --quick             small matrix, a few seconds
+    python benchmark.py --full              adds the 256 MB profiles
+    python benchmark.py --save-baseline     store the results as the baseline
+    python benchmark.py --compare           exit 1 when a phase regressed
+    python benchmark.py generate OUT --format scsc --mods 5000 --size 50MB
+
+Every case runs in a child process so its peak RSS is its own.
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import zipfile
+import random
+import shutil
+import struct
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import Manager as M
+
+# ---------------------------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------------------------
+
+BASELINE_FILE        = os.path.join(BASE_DIR, "bench_baseline.json")
+REGRESSION_THRESHOLD = 0.20   # slower by more than this fraction...
+REGRESSION_FLOOR_MS  = 5.0    # ...and by more than this many ms is a regression
+
+FORMATS = ("text", "crlf", "scsc", "bsii")  # crlf: text with Windows line endings
+
+PRESETS = {
+    "quick"   : {"mods": (10, 2000),        "sizes": ("64KB", "2MB")},
+    "default" : {"mods": (10, 2000, 20000), "sizes": ("64KB", "8MB", "64MB")},
+    "full"    : {"mods": (10, 2000, 20000), "sizes": ("64KB", "8MB", "64MB", "256MB")},
+}
+
+# Installed mods for the verify phases: archives for the first mods of the
+# list, each holding a few compressed entries
+BENCH_MOD_ARCHIVES = 100
+BENCH_ARCHIVE_SIZE = 256 * 1024
+
+# Without the cryptography package ScsC is decrypted in pure Python, which
+# would take minutes on the large cases
+SCSC_PURE_PYTHON_LIMIT = 8 * 1024 * 1024
+
+# Display names mix plain ASCII with UTF-8 that text SII stores as \xNN escapes
+DISPLAY_NAMES = ("Trailer Pack", "Realistic Physics", "Šimon's Tuning", "Скания Interior",
+                 "日本語 Sounds", "Ñandú Skins", "Traffic x2")
+
+# ---------------------------------------------------------------------------
+# GENERATOR
+# ---------------------------------------------------------------------------
+
+def parse_size(text):
+    """'64KB' -> 65536."""
+    text = text.strip().upper()
+    for suffix, factor in (("GB", 1 << 30), ("MB", 1 << 20), ("KB", 1 << 10), ("B", 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+def make_mods(count, seed=0):
+    """Raw active_mods values: b'package|Display name'."""
+    rng = random.Random(seed)
+    mods = []
+    for i in range(count):
+        display = f"{rng.choice(DISPLAY_NAMES)} {i}".encode("utf-8")
+        if i % 3:
+            mods.append(b"mod_workshop_package.%016X|" % rng.getrandbits(60) + display)
+        else:
+            mods.append(b"local_mod_%d|" % i + display)
+    return mods
+
+def _filler_unit(rng, n):
+    """One text unit of plausible save data, about 200 bytes."""
+    return (
+        f"economy_event : _nameless.{n:x} {{\n"
+        f" time: {rng.randrange(1 << 30)}\n"
+        f" unit_link: _nameless.{rng.getrandbits(40):x}\n"
+        f" param: {rng.randrange(1000)}\n"
+        f" city: city.{rng.choice(('berlin', 'praha', 'madrid', 'lyon', 'gdansk'))}\n"
+        f" cargo: cargo.{rng.choice(('wood', 'milk', 'steel', 'fuel', 'glass'))}\n"
+        f"}}\n\n"
+    ).encode("ascii")
+
+def iter_text_payload(mods, size, newline=b"\n", seed=0):
+    """Yields a SiiNunit payload of at least size bytes, user_profile first."""
+    head = [b"SiiNunit", b"{", b"user_profile : _nameless.1 {", b" face: 0",
+            b" active_mods: %d" % len(mods)]
+    head += [b" active_mods[%d]: %s" % (i, M._sii_quote(m).encode("ascii")) for i, m in enumerate(mods)]
+    head += [b' profile_name: "Benchmark"', b" cached_experience: 125000", b"}", b"", b""]
+    data = newline.join(head)
+    yield data
+    produced, rng, n = len(data), random.Random(seed), 0
+    tail = b"}" + newline
+    while produced + len(tail) < size:
+        block = b"".join(_filler_unit(rng, n + k) for k in range(256))
+        if newline != b"\n":
+            block = block.replace(b"\n", newline)
+        n += 256
+        produced += len(block)
+        yield block
+    yield tail
+
+def _bsii_string(raw):
+    return struct.pack("<I", len(raw)) + raw
+
+def iter_bsii_payload(mods, size, seed=0):
+    """Yields a BSII payload: a user_profile unit, then economy_event units up to size."""
+    rng = random.Random(seed)
+    u32 = lambda v: struct.pack("<I", v)
+    yield b"BSII" + u32(3)
+    # Structure 1: user_profile
+    yield (u32(0) + b"\x01" + u32(1) + _bsii_string(b"user_profile")
+           + u32(0x25) + _bsii_string(b"face")
+           + u32(M.BSII_STRING_ARRAY) + _bsii_string(b"active_mods")
+           + u32(M.BSII_STRING) + _bsii_string(b"profile_name")
+           + u32(0))
+    # Structure 2: economy_event
+    yield (u32(0) + b"\x01" + u32(2) + _bsii_string(b"economy_event")
+           + u32(0x27) + _bsii_string(b"time")
+           + u32(M.BSII_STRING) + _bsii_string(b"city")
+           + u32(0x31) + _bsii_string(b"param")
+           + u32(0))
+    unit_id = lambda n: b"\xff" + struct.pack("<Q", n)  # nameless id
+    data = (u32(1) + unit_id(1) + struct.pack("<i", 0) + u32(len(mods))
+            + b"".join(_bsii_string(m) for m in mods) + _bsii_string(b"Benchmark"))
+    yield data
+    produced, n = len(data), 2
+    while produced < size:
+        block = b"".join(
+            u32(2) + unit_id(n + k) + u32(rng.randrange(1 << 30))
+            + _bsii_string(rng.choice((b"city.berlin", b"city.praha", b"city.madrid", b"city.lyon")))
+            + struct.pack("<q", rng.randrange(1000))
+            for k in range(512))
+        n += 512
+        produced += len(block)
+        yield block
+    yield u32(0) + b"\x00"  # end of file marker
+
+def _aes_cbc_encrypt(data, iv):
+    """AES-256-CBC with SII_KEY through cryptography, or the openssl command."""
+    if M.HAS_CRYPTOGRAPHY:
+        encryptor = M.Cipher(M.algorithms.AES(M.SII_KEY), M.modes.CBC(iv)).encryptor()
+        return encryptor.update(data) + encryptor.finalize()
+    if shutil.which("openssl"):
+        return subprocess.run(["openssl", "enc", "-aes-256-cbc", "-nopad", "-K", M.SII_KEY.hex(), "-iv", iv.hex()],
+                              input=data, capture_output=True, check=True).stdout
+    return None
+
+def write_profile(path, fmt, mods, size, seed=0):
+    """Writes a synthetic profile.sii. Returns its size, or None when fmt cannot be produced here."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if fmt == "bsii":
+        chunks = iter_bsii_payload(mods, size, seed)
+    else:
+        chunks = iter_text_payload(mods, size, b"\r\n" if fmt == "crlf" else b"\n", seed)
+
+    if fmt != "scsc":
+        with open(path, "wb") as f:
+            for chunk in chunks: f.write(chunk)
+        return os.path.getsize(path)
+
+    compressor = zlib.compressobj(6)
+    payload_size, parts = 0, []
+    for chunk in chunks:
+        payload_size += len(chunk)
+        parts.append(compressor.compress(chunk))
+    parts.append(compressor.flush())
+    compressed = b"".join(parts)
+    pad = 16 - len(compressed) % 16
+    compressed += bytes([pad]) * pad
+    iv = os.urandom(16)
+    encrypted = _aes_cbc_encrypt(compressed, iv)
+    if encrypted is None:
+        return None
+    with open(path, "wb") as f:
+        f.write(M.SII_SCSC_HEADER.pack(M.SII_SCSC_SIGNATURE, b"\0" * 32, iv, payload_size))
+        f.write(encrypted)
+    return os.path.getsize(path)
+
+def payload_size(path):
+    """Bytes of SiiNunit/BSII the readers go through: the inflated size for ScsC, the file size otherwise."""
+    with open(path, "rb") as f:
+        header = f.read(M.SII_SCSC_HEADER.size)
+    if header.startswith(M.SII_SCSC_SIGNATURE) and len(header) == M.SII_SCSC_HEADER.size:
+        return M.SII_SCSC_HEADER.unpack(header)[3]
+    return os.path.getsize(path)
+
+def write_list(path, mods, seed=1):
+    """Writes a list.txt with the mods in a different order (reversed halves, then shuffled tail)."""
+    rng = random.Random(seed)
+    order = list(mods[len(mods) // 2:]) + list(mods[:len(mods) // 2])
+    tail = order[len(order) * 3 // 4:]
+    rng.shuffle(tail)
+    order[len(order) * 3 // 4:] = tail
+    with open(path, "w", encoding="utf-8") as f:
+        for i, m in enumerate(order):
+            f.write(f" active_mods[{i}]: {M._sii_quote(m)}\n")
+
+# ---------------------------------------------------------------------------
+# HARNESS
+# ---------------------------------------------------------------------------
+
+def write_mod_archives(mod_dir, mods, count=BENCH_MOD_ARCHIVES, size=BENCH_ARCHIVE_SIZE, seed=2):
+    """Writes <key>.scs archives for the first count mods, named the way active_mods refers to them."""
+    os.makedirs(mod_dir, exist_ok=True)
+    rng = random.Random(seed)
+    for raw in mods[:count]:
+        key = raw.split(b"|", 1)[0].decode("ascii")
+        with zipfile.ZipFile(os.path.join(mod_dir, key + ".scs"), "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("manifest.sii", f'SiiNunit\n{{\nmod_package : .package_name\n{{\n display_name: "{key}"\n}}\n}}\n')
+            for n in range(4):
+                # Half random, half repetitive, so inflate has real work to do
+                zf.writestr(f"def/bench/{n}.bin", rng.randbytes(size // 8) + bytes(size // 8))
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        psapi = ctypes.WinDLL("psapi")
+        psapi.GetProcessMemoryInfo.argtypes = (wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD)
+        kernel32 = ctypes.WinDLL("kernel32")
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+    return None
+
+def _timed(phases, name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    phases[name] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+def run_case(fmt, mods_count, size_label, workdir):
+    """Runs every phase of one case in this process. Returns the result dict."""
+    # Keep backups and caches out of the real install
+    M.BACKUPS_DIR = os.path.join(workdir, "Backups")
+    M.CACHE_DIR = os.path.join(workdir, "Cache")
+    M.MOD_INDEX = os.path.join(M.CACHE_DIR, "mod_index.json")
+    M.FINGERPRINT_INDEX = os.path.join(M.CACHE_DIR, "fingerprints.json")
+    M.PROFILE_INDEX = os.path.join(M.CACHE_DIR, "profile_index.json")
+    M.CONFLICT_INDEX = os.path.join(M.CACHE_DIR, "conflict_index.json")
+    M.VERIFY_INDEX = os.path.join(M.CACHE_DIR, "verified.json")
+    M.LOGS_DIR = os.path.join(workdir, "Logs")
+    M.LOG_ROUTES = tuple((os.path.join(M.LOGS_DIR, os.path.basename(path)), levels) for path, levels in M.LOG_ROUTES)
+    M.ETS2_MOD_DIR = os.path.join(workdir, "mod")
+    M._workshop_dirs = lambda: []  # the real Steam libraries are not part of the case
+    M.headless, M.quiet = True, True
+
+    profile = os.path.join(workdir, "profiles", "42656E6368", "profile.sii")
+    list_file = os.path.join(workdir, "list.txt")
+    mods = make_mods(mods_count)
+    phases = {}
+    size = _timed(phases, "generate", write_profile, profile, fmt, mods, parse_size(size_label))
+    if size is None:
+        return {"skipped": "no AES encryptor (install cryptography or openssl)"}
+    if fmt == "scsc" and not M.HAS_CRYPTOGRAPHY and size > SCSC_PURE_PYTHON_LIMIT:
+        return {"skipped": "pure-Python AES; install cryptography for large ScsC cases"}
+    write_list(list_file, mods)
+    write_mod_archives(M.ETS2_MOD_DIR, mods)
+    del phases["generate"]  # setup, not a measured phase
+    payload = payload_size(profile)
+
+    found = _timed(phases, "read_mods", M._get_mods_from_profile, profile)
+    assert len(found) == mods_count, f"read {len(found)} of {mods_count} mods"
+    new_mods = _timed(phases, "read_list", M._load_mods_from_list_file, list_file)
+    _timed(phases, "backup", M._create_profile_backup, profile, "bench", True)  # as apply takes it
+    _timed(phases, "backup_again", M._create_profile_backup, profile, "bench", True)
+
+    _timed(phases, "verify", M.run_verify, list_file)
+    _timed(phases, "verify_cached", M.run_verify, list_file)
+
+    scratch = os.path.join(workdir, "splice", "profile.sii")
+    if fmt == "bsii":
+        # Rewriting BSII goes through SII_Decrypt.exe first; the splice then
+        # works on the text it produces, which is what is timed here
+        write_profile(scratch, "text", mods, parse_size(size_label))
+    else:
+        os.makedirs(os.path.dirname(scratch), exist_ok=True)
+        shutil.copyfile(profile, scratch)
+    _timed(phases, "splice", M._splice_mod_block, scratch, new_mods)
+
+    if fmt != "bsii" or (os.name == "nt" and os.path.isfile(M.SII_DECRYPT_EXE)):
+        checked = os.path.join(workdir, "checked", "42656E6368", "profile.sii")
+        os.makedirs(os.path.dirname(checked), exist_ok=True)
+        shutil.copyfile(profile, checked)
+
+        timer = M.PhaseTimer()
+        result = _timed(phases, "apply", M.run_apply, profile, list_file, timer, "off")
+        assert result["ok"], result
+        phases.update({f"apply.{name}": ms for name, ms in timer.phases.items()})
+        _timed(phases, "apply_noop", M.run_apply, profile, list_file, M.PhaseTimer(), "off")
+        # The default CLI checks: missing mods, then CRC of the (cached) archives
+        result = _timed(phases, "apply_checked", M.run_apply, checked, list_file, M.PhaseTimer(), "warn", True)
+        assert result["ok"], result
+
+    # Throughput over the payload, so ScsC rows compare with text and BSII
+    return {
+        "bytes"         : size,
+        "payload_bytes" : payload,
+        "phases_ms"     : phases,
+        "read_mb_s"     : round(payload / (1024 * 1024) / max(phases["read_mods"] / 1000, 1e-9), 1),
+        "peak_rss_mb"   : _peak_rss_mb(),
+    }
+
+def case_id(fmt, mods_count, size_label):
+    return f"{fmt}-{mods_count}-{size_label}"
+
+def run_case_isolated(fmt, mods_count, size_label):
+    """Runs one case in a child process and returns its result dict."""
+    workdir = tempfile.mkdtemp(prefix="ets2_bench_")
+    try:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "_case", fmt, str(mods_count), size_label, workdir],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {"error": (proc.stderr.strip().splitlines() or ["exit code %d" % proc.returncode])[-1]}
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def merge_runs(runs):
+    """Median of each phase over the repeats, peak RSS as the maximum."""
+    ok = [r for r in runs if "phases_ms" in r]
+    if not ok:
+        return runs[0]
+    phases = {name: round(statistics.median(r["phases_ms"][name] for r in ok), 3) for name in ok[0]["phases_ms"]}
+    rss = [r["peak_rss_mb"] for r in ok if r["peak_rss_mb"] is not None]
+    return {
+        "bytes"         : ok[0]["bytes"],
+        "payload_bytes" : ok[0]["payload_bytes"],
+        "phases_ms"     : phases,
+        "read_mb_s"     : round(ok[0]["payload_bytes"] / (1024 * 1024) / max(phases["read_mods"] / 1000, 1e-9), 1),
+        "peak_rss_mb"   : max(rss) if rss else None,
+        "repeats"       : len(ok),
+    }
+
+def compare(results, baseline):
+    """Returns [(case, phase, old ms, new ms)] for every phase that got slower."""
+    regressions = []
+    for case, result in results.items():
+        old = baseline.get("cases", {}).get(case, {}).get("phases_ms")
+        if not old or "phases_ms" not in result:
+            continue
+        for phase, ms in result["phases_ms"].items():
+            before = old.get(phase)
+            if before is None:
+                continue
+            if ms > before * (1 + REGRESSION_THRESHOLD) and ms - before > REGRESSION_FLOOR_MS:
+                regressions.append((case, phase, before, ms))
+    return regressions
+
+def print_table(results):
+    columns = ("read_mods", "read_list", "backup", "splice", "apply", "apply_noop", "apply_checked", "verify", "verify_cached")
+    print(f"{'case':<22} {'file':>9} {'payload':>9} {'MB/s':>8} " + " ".join(f"{c:>10}" for c in columns) + f" {'RSS MB':>8}")
+    for case, r in results.items():
+        if "phases_ms" not in r:
+            print(f"{case:<22} {r.get('skipped') or 'ERROR: ' + r.get('error', '?')}")
+            continue
+        cells = " ".join(f"{r['phases_ms'][c]:>10.1f}" if c in r["phases_ms"] else f"{'-':>10}" for c in columns)
+        print(f"{case:<22} {r['bytes'] / (1024 * 1024):>8.2f}M {r['payload_bytes'] / (1024 * 1024):>8.2f}M "
+              f"{r['read_mb_s']:>8.1f} {cells} {r['peak_rss_mb'] or '-':>8}")
+    print("(phase times in ms, median of the repeats; MB/s is read_mods over the payload)")
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark Manager.py on synthetic profiles.")
+    preset = parser.add_mutually_exclusive_group()
+    preset.add_argument("--quick", action="store_const", dest="preset", const="quick")
+    preset.add_argument("--full", action="store_const", dest="preset", const="full")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="comma separated, from " + ", ".join(FORMATS))
+    parser.add_argument("--mods", help="comma separated mod counts (overrides the preset)")
+    parser.add_argument("--sizes", help="comma separated profile sizes such as 64KB,8MB (overrides the preset)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the median is reported")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="exit 1 when a phase regressed against the baseline")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.set_defaults(preset="default")
+    return parser.parse_args(argv)
+
+def parse_generate_args(argv):
+    parser = argparse.ArgumentParser(prog="benchmark.py generate", description="Write a synthetic profile.sii and list.txt.")
+    parser.add_argument("out", help="output folder")
+    parser.add_argument("--format", choices=FORMATS, default="text")
+    parser.add_argument("--mods", type=int, default=500)
+    parser.add_argument("--size", default="1MB")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv):
+    if argv[:1] == ["_case"]:
+        fmt, mods_count, size_label, workdir = argv[1:5]
+        print(json.dumps(run_case(fmt, int(mods_count), size_label, workdir)))
+        return 0
+    if argv[:1] == ["generate"]:
+        args = parse_generate_args(argv[1:])
+        mods = make_mods(args.mods, args.seed)
+        size = write_profile(os.path.join(args.out, "profile.sii"), args.format, mods, parse_size(args.size), args.seed)
+        if size is None:
+            print("ScsC needs the cryptography package or the openssl command", file=sys.stderr)
+            return 1
+        write_list(os.path.join(args.out, "list.txt"), mods, args.seed + 1)
+        print(f"{args.out}: profile.sii {size} bytes, {args.mods} mods ({args.format})")
+        return 0
+
+    args = parse_args(argv)
+    preset = PRESETS[args.preset]
+    mods_counts = [int(m) for m in args.mods.split(",")] if args.mods else preset["mods"]
+    sizes = args.sizes.split(",") if args.sizes else preset["sizes"]
+    formats = [f for f in args.formats.split(",") if f]
+
+    results = {}
+    for fmt in formats:
+        for size_label in sizes:
+            for mods_count in mods_counts:
+                case = case_id(fmt, mods_count, size_label)
+                print(f"  {case}", file=sys.stderr, flush=True)
+                results[case] = merge_runs([run_case_isolated(fmt, mods_count, size_label) for _ in range(args.repeat)])
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+    status = 0
+    if args.compare:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+            return 2
+        regressions = compare(results, baseline)
+        for case, phase, before, after in regressions:
+            print(f"REGRESSION {case} {phase}: {before:.1f} ms -> {after:.1f} ms", file=sys.stderr)
+        if not regressions:
+            print(f"No regressions against {args.baseline}")
+        status = 1 if regressions else 0
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "created" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python"  : platform.python_version(),
+                "platform": platform.platform(),
+                "aes"     : "cryptography" if M.HAS_CRYPTOGRAPHY else "pure-python",
+                "cases"   : results,
+            }, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
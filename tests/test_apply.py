@@ -0,0 +1,66 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+PROFILE = b'SiiNunit\n{\nuser_profile : _nameless.1 {\n active_mods: 1\n active_mods[0]: "a|A"\n}\n\n}\n'
+
+
+class ApplyTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = tmp.name
+        patched = {
+            "BACKUPS_DIR": os.path.join(root, "Backups"),
+            "LIST_FILE": os.path.join(root, "list.txt"),
+            "ETS2_MOD_DIR": os.path.join(root, "mod"),
+            "MOD_INDEX": os.path.join(root, "Cache", "mod_index.json"),
+            "_workshop_dirs": lambda: [],
+            "_is_game_running": lambda: False,
+            "clear_screen": lambda: None,
+        }
+        for name, value in patched.items():
+            self.addCleanup(setattr, M, name, getattr(M, name))
+            setattr(M, name, value)
+        os.makedirs(M.ETS2_MOD_DIR)
+        self.profile = os.path.join(root, "profiles", "41", "profile.sii")
+        os.makedirs(os.path.dirname(self.profile))
+        with open(self.profile, "wb") as f:
+            f.write(PROFILE)
+        with open(M.LIST_FILE, "w", encoding="utf-8") as f:
+            f.write(' active_mods[0]: "b|B"\n active_mods[1]: "a|A"\n')
+
+    def test_menu_apply_reads_the_profile_once(self):
+        reads = mock.Mock(wraps=M._get_mods_from_profile)
+        with mock.patch.object(M, "_get_mods_from_profile", reads), \
+             mock.patch("builtins.input", return_value="y"), mock.patch("builtins.print"):
+            M.action_apply(self.profile)
+        self.assertEqual(reads.call_count, 1)
+        self.assertEqual([M._mod_value(m) for m in M._get_mods_from_profile(self.profile)], ['"b|B"', '"a|A"'])
+
+    def test_cli_apply_reports_no_changes(self):
+        with open(M.LIST_FILE, "w", encoding="utf-8") as f:
+            f.write(' active_mods[0]: "a|A"\n')
+        out = io.StringIO()
+        self.addCleanup(setattr, M, "headless", M.headless)
+        self.addCleanup(setattr, M, "quiet", M.quiet)
+        self.addCleanup(setattr, M, "current_lang", M.current_lang)
+        with contextlib.redirect_stdout(out), mock.patch.object(M, "install_signal_handlers"):
+            status = M.cli_main(["apply", "--profile", self.profile, "--list", M.LIST_FILE, "--lang", "en"])
+        self.assertEqual(status, 0)
+        self.assertIn(M.LOCALIZATION["en"]["list_unchanged"], out.getvalue())
+        with open(self.profile, "rb") as f:
+            self.assertEqual(f.read(), PROFILE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+PROFILE = b'SiiNunit\n{\nuser_profile : _nameless.1 {\n active_mods: 1\n active_mods[0]: "a|A"\n}\n\n}\n'
+
+
+class RestoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.backups_dir, M.BACKUPS_DIR = M.BACKUPS_DIR, os.path.join(self.tmp.name, "Backups")
+        self.addCleanup(setattr, M, "BACKUPS_DIR", self.backups_dir)
+        M.headless, M.quiet = True, True
+        self.profile = os.path.join(self.tmp.name, "profiles", "41", "profile.sii")
+        os.makedirs(os.path.dirname(self.profile))
+        with open(self.profile, "wb") as f:
+            f.write(PROFILE)
+
+    def _replace_profile(self, data):
+        """Writes the profile the way apply does: temp file and rename."""
+        tmp_path = self.profile + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.profile)
+
+    def _read_profile(self):
+        with open(self.profile, "rb") as f:
+            return f.read()
+
+    def test_restored_profile_does_not_share_the_backup(self):
+        backup_id = M._create_profile_backup(self.profile, "apply", replacing=True)
+        self._replace_profile(PROFILE.replace(b"a|A", b"b|B"))
+
+        M._restore_profile_backup(self.profile, backup_id)
+        self.assertEqual(self._read_profile(), PROFILE)
+        self.assertEqual(os.stat(self.profile).st_nlink, 1)
+
+        # The game saving in place must not reach the stored copy
+        with open(self.profile, "ab") as f:
+            f.write(b"x\n")
+        M._restore_profile_backup(self.profile, backup_id)
+        self.assertEqual(self._read_profile(), PROFILE)
+
+    def test_gzip_backup_round_trip(self):
+        M.BACKUP_LINKS, links = False, M.BACKUP_LINKS
+        self.addCleanup(setattr, M, "BACKUP_LINKS", links)
+        backup_id = M._create_profile_backup(self.profile, "extract")
+        self._replace_profile(b"SiiNunit\n{\n}\n")
+        os.chmod(self.profile, 0o644)
+        M._restore_profile_backup(self.profile, backup_id)
+        self.assertEqual(self._read_profile(), PROFILE)
+        self.assertEqual(os.stat(self.profile).st_mode & 0o777, 0o644)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+
+class ConflictTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        patched = {
+            "ETS2_MOD_DIR": os.path.join(self.root, "mod"),
+            "MOD_INDEX": os.path.join(self.root, "Cache", "mod_index.json"),
+            "CONFLICT_INDEX": os.path.join(self.root, "Cache", "conflict_index.json"),
+            "_workshop_dirs": lambda: [],  # only the mods built here
+            "headless": True,
+            "quiet": True,
+        }
+        for name, value in patched.items():
+            self.addCleanup(setattr, M, name, getattr(M, name))
+            setattr(M, name, value)
+        os.makedirs(M.ETS2_MOD_DIR)
+        self._mod("trucks", ["def/vehicle/truck.sii", "material/ui/truck.mat", "def/shared.sii"])
+        self._mod("sounds", ["sound/truck.bank", "def/vehicle/truck.sii", "def/shared.sii"])
+        self._mod("map", ["map/europe.mbd"])
+        with open(os.path.join(M.ETS2_MOD_DIR, "hashed.scs"), "wb") as f:
+            f.write(M.HASHFS_SIGNATURE + bytes(64))
+
+    def _mod(self, key, names):
+        with zipfile.ZipFile(os.path.join(M.ETS2_MOD_DIR, key + ".scs"), "w") as zf:
+            zf.writestr("manifest.sii", "SiiNunit\n{\n}\n")
+            for name in names:
+                zf.writestr(name, key)
+
+    def _conflicts(self, keys):
+        list_file = os.path.join(self.root, "list.txt")
+        with open(list_file, "w", encoding="utf-8") as f:
+            for i, key in enumerate(keys):
+                f.write(f' active_mods[{i}]: "{key}|{key}"\n')
+        return M.run_conflicts(list_file)
+
+    def test_overlap_and_winner_by_load_order(self):
+        result = self._conflicts(["sounds", "map", "trucks", "hashed", "gone"])
+        self.assertEqual(result["conflicts"], [
+            {"file": "def/shared.sii", "winner": "sounds", "overridden": ["trucks"]},
+            {"file": "def/vehicle/truck.sii", "winner": "sounds", "overridden": ["trucks"]},
+        ])
+        self.assertEqual(result["pairs"], [{"winner": "sounds", "loser": "trucks", "files": 2}])
+        self.assertEqual(result["missing"], ["gone"])
+        self.assertEqual(result["unread"], ["hashed"])
+
+        # Reversed order: the other mod wins, now from the cached index
+        result = self._conflicts(["trucks", "sounds"])
+        self.assertEqual([c["winner"] for c in result["conflicts"]], ["trucks", "trucks"])
+        self.assertTrue(os.path.isfile(M.CONFLICT_INDEX))
+
+    def test_no_overlap(self):
+        self.assertEqual(self._conflicts(["map", "trucks"])["conflicts"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
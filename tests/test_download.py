@@ -0,0 +1,126 @@
+import hashlib
+import http.server
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+DATA = random.Random(0).randbytes(200 * 1024)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Serves DATA, with or without Range support; drops the first request for each offset in drop."""
+
+    def do_GET(self):
+        server = self.server
+        m = re.match(r"bytes=(\d+)-(\d*)$", self.headers.get("Range", ""))
+        with server.lock:
+            server.requests.append(self.headers.get("Range"))
+        if m and server.ranged:
+            first = int(m.group(1))
+            last = int(m.group(2)) if m.group(2) else len(DATA) - 1
+            if first >= len(DATA):
+                self.send_error(416)
+                return
+            body = DATA[first:last + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {first}-{last}/{len(DATA)}")
+        else:
+            first, body = 0, DATA
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        with server.lock:
+            drop = first in server.drop
+            server.drop.discard(first)
+        if drop:
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True  # the client sees the body end early
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DownloadTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dest = os.path.join(tmp.name, "sii_tools.zip")
+        for name, value in {"DOWNLOAD_BACKOFF": 0, "DOWNLOAD_MIN_SEGMENT": 32 * 1024}.items():
+            self.addCleanup(setattr, M, name, getattr(M, name))
+            setattr(M, name, value)
+        self.progress = []
+
+    def _serve(self, ranged=True, drop=()):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        server.ranged, server.drop, server.requests, server.lock = ranged, set(drop), [], threading.Lock()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        return f"http://127.0.0.1:{server.server_port}/sii_tools.zip"
+
+    def _download(self, url, **kwargs):
+        kwargs.setdefault("timeout", 5)
+        kwargs.setdefault("retries", 3)
+        return M._download_file(url, self.dest, progress=lambda done, total: self.progress.append((done, total)), **kwargs)
+
+    def _read_dest(self):
+        with open(self.dest, "rb") as f:
+            return f.read()
+
+    def _leftovers(self):
+        return [name for name in os.listdir(os.path.dirname(self.dest)) if name != os.path.basename(self.dest)]
+
+    def test_ranged_server_in_segments(self):
+        self.assertTrue(self._download(self._serve(), sha256=hashlib.sha256(DATA).hexdigest()))
+        self.assertEqual(self._read_dest(), DATA)
+        self.assertEqual(len([r for r in self.server.requests if r and r != "bytes=0-0"]), M.DOWNLOAD_SEGMENTS)
+        self.assertEqual(self.progress[-1], (len(DATA), len(DATA)))
+        self.assertEqual(self._leftovers(), [])
+
+    def test_server_without_range_support(self):
+        self.assertTrue(self._download(self._serve(ranged=False)))
+        self.assertEqual(self._read_dest(), DATA)
+        self.assertEqual(self.progress[-1][0], len(DATA))
+
+    def test_dropped_segment_resumes(self):
+        step = -(-len(DATA) // M.DOWNLOAD_SEGMENTS)
+        self.assertTrue(self._download(self._serve(drop={step})))
+        self.assertEqual(self._read_dest(), DATA)
+        # The second request for that segment starts after the bytes already on disk
+        resumed = [r for r in self.server.requests if r and r.startswith("bytes=") and r.endswith(f"-{2 * step - 1}")]
+        self.assertEqual(len(resumed), 2)
+        self.assertGreater(int(resumed[1][6:].split("-")[0]), step)
+        self.assertEqual(max(done for done, _total in self.progress), len(DATA))
+
+    def test_hash_mismatch(self):
+        self.assertFalse(self._download(self._serve(), sha256="0" * 64))
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertEqual(self._leftovers(), [])
+
+    def test_stale_parts_are_removed_and_progress_restarts(self):
+        with open(self.dest + ".part", "wb") as f:
+            f.write(b"stale bytes")
+        with open(f"{self.dest}.999-0.part", "wb") as f:
+            f.write(b"from another layout")
+        self.assertTrue(self._download(self._serve(ranged=False)))
+        self.assertEqual(self._read_dest(), DATA)
+        self.assertEqual(self._leftovers(), [])
+        self.assertEqual(self.progress[0][0], len(b"stale bytes"))
+        self.assertEqual(max(done for done, _total in self.progress), len(DATA))
+        self.assertEqual(self.progress[-1], (len(DATA), len(DATA)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_manager(logs_dir, body):
+    """Runs body in a fresh interpreter with Manager imported as M and its logs in logs_dir."""
+    script = textwrap.dedent("""
+        import os, sys
+        sys.path.insert(0, {root!r})
+        import Manager as M
+        M.LOGS_DIR = {logs!r}
+        M.LOG_ROUTES = tuple((os.path.join(M.LOGS_DIR, os.path.basename(path)), levels) for path, levels in M.LOG_ROUTES)
+    """).format(root=ROOT, logs=logs_dir) + textwrap.dedent(body)
+    return subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60)
+
+
+class LoggingTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.logs_dir = tmp.name
+
+    def _main_log(self):
+        with open(os.path.join(self.logs_dir, "main.log"), encoding="utf-8") as f:
+            return f.read()
+
+    def test_trace_summary_reaches_the_log(self):
+        proc = run_manager(self.logs_dir, """
+            M.tracer.enable(os.path.join(M.LOGS_DIR, "t.json"))
+            with M.tracer.span("extract"):
+                pass
+        """)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertTrue(os.path.isfile(os.path.join(self.logs_dir, "t.json")))
+        self.assertIn("Trace written to", self._main_log())
+
+    def test_undecodable_mod_name_is_logged(self):
+        list_file = os.path.join(self.logs_dir, "list.txt")
+        with open(list_file, "wb") as f:
+            f.write(b' active_mods[0]: "caf\xff_pack|Caf\xff"\n')
+        proc = run_manager(self.logs_dir, """
+            M.quiet = True
+            mods = M._load_mods_from_list_file({list_file!r})
+            M._print_mod_diff({{"remove": [], "insert": [(0, M._mod_value(mods[0]))], "move": []}})
+        """.format(list_file=list_file))
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stderr, "")
+        self.assertIn('diff: + [0] "caf\\udcff_pack|Caf\\udcff"', self._main_log())
+
+
+if __name__ == "__main__":
+    unittest.main()
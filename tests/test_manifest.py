@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+# The layout the game writes: each array's count line comes before its items
+MANIFEST = """SiiNunit
+{
+mod_package : .package_name
+{
+	package_version: "2.1"
+	display_name: "Trailer Pack"
+	author: "someone"
+	category[]: "trailers"
+	compatible_versions: 2
+	compatible_versions[0]: "1.49.*"
+	compatible_versions[1]: "1.50.*"
+	dependencies: 1
+	dependencies[0]: "base_map"
+	icon: "icon.jpg"
+}
+}
+"""
+
+
+class ManifestTest(unittest.TestCase):
+
+    def test_count_line_before_items(self):
+        manifest = M._parse_manifest(MANIFEST)
+        self.assertEqual(manifest["dependencies"], ["base_map"])
+        self.assertEqual(manifest["compatible_versions"], ["1.49.*", "1.50.*"])
+        self.assertEqual(manifest["category"], ["trailers"])
+        self.assertEqual(manifest["display_name"], "Trailer Pack")
+
+    def test_count_line_without_items(self):
+        manifest = M._parse_manifest("dependencies: 0\n")
+        self.assertEqual(M._manifest_list(manifest, "dependencies"), [])
+
+    def test_catalog_scan_and_solver(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            mod_dir, cache_dir = os.path.join(tmp, "mod"), os.path.join(tmp, "Cache")
+            os.makedirs(mod_dir)
+            with zipfile.ZipFile(os.path.join(mod_dir, "trailers.scs"), "w") as zf:
+                zf.writestr("manifest.sii", MANIFEST)
+            with zipfile.ZipFile(os.path.join(mod_dir, "base_map.scs"), "w") as zf:
+                zf.writestr("manifest.sii", MANIFEST.replace('\tdependencies: 1\n\tdependencies[0]: "base_map"\n', ""))
+
+            saved = M.ETS2_MOD_DIR, M.MOD_INDEX
+            M.ETS2_MOD_DIR, M.MOD_INDEX = mod_dir, os.path.join(cache_dir, "mod_index.json")
+            try:
+                catalog = M.scan_mod_catalog()
+            finally:
+                M.ETS2_MOD_DIR, M.MOD_INDEX = saved
+
+        self.assertEqual(catalog["trailers"]["manifest"]["dependencies"], ["base_map"])
+        keys = ["base_map", "trailers"]
+        solved = M.solve_load_order(keys, catalog)
+        self.assertEqual([keys[i] for i in solved["order"]], ["trailers", "base_map"])
+        self.assertEqual(solved["missing"], [])
+        self.assertEqual(M._incompatible_mods(keys, catalog, "1.50.2.3"), [])
+        self.assertEqual(M._incompatible_mods(keys, catalog, "1.48.5.1"), keys)
+
+
+if __name__ == "__main__":
+    unittest.main()
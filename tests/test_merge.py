@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+BASE = list("abcdef")
+
+
+def merge(mine, theirs, prefer="mine"):
+    return M.merge_mod_lists(BASE, list(mine), list(theirs), prefer)
+
+
+class MergeTest(unittest.TestCase):
+
+    def test_unchanged(self):
+        self.assertEqual(merge("abcdef", "abcdef"), (BASE, []))
+
+    def test_move_on_one_side(self):
+        self.assertEqual(merge("abdcef", "abcdef"), (list("abdcef"), []))
+        self.assertEqual(merge("abcdef", "abdcef"), (list("abdcef"), []))
+
+    def test_moves_on_both_sides(self):
+        self.assertEqual(merge("abdcef", "abcdfe"), (list("abdcfe"), []))
+
+    def test_adds_at_the_same_spot_come_out_mine_first(self):
+        self.assertEqual(merge("xabcdef", "yabcdef"), (list("xyabcdef"), []))
+
+    def test_conflicting_move(self):
+        merged, conflicts = merge("aebcdf", "abcedf")
+        self.assertEqual(merged, list("aebcdf"))
+        self.assertEqual(conflicts, [{"mod": "e", "at": 1, "mine": "a", "theirs": "c"}])
+
+        merged, conflicts = merge("aebcdf", "abcedf", prefer="theirs")
+        self.assertEqual(merged, list("abcedf"))
+        self.assertEqual(conflicts, [{"mod": "e", "at": 3, "mine": "a", "theirs": "c"}])
+
+    def test_removal_beats_a_move_on_the_other_side(self):
+        self.assertEqual(merge("abcdf", "aebcdf"), (list("abcdf"), []))
+        self.assertEqual(merge("aebcdf", "abcdf"), (list("abcdf"), []))
+
+    def test_add_after_a_mod_the_other_side_removed(self):
+        # x hangs on the mod before its anchor once d is gone
+        self.assertEqual(merge("abcef", "abcdxef"), (list("abcxef"), []))
+
+    def test_repeated_mods_are_kept_apart(self):
+        base = ["a", "b", "a"]
+        self.assertEqual(M.merge_mod_lists(base, ["b", "a", "a"], base), (["b", "a", "a"], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+
+@unittest.skipUnless(os.path.isdir("/proc") and shutil.which("sleep"), "needs /proc and sleep")
+class GameProcessTest(unittest.TestCase):
+    """A sleep started under the game's image name stands in for the game."""
+
+    def _spawn(self, argv0):
+        proc = subprocess.Popen([argv0, "60"], executable=shutil.which("sleep"))
+        self.addCleanup(proc.wait)
+        self.addCleanup(proc.kill)
+        return proc
+
+    def test_detect_kill_and_wait(self):
+        proc = self._spawn(M.GAME_PROCESS_NAME)
+        self.assertIn(proc.pid, M._find_processes("EuroTrucks2.exe"))
+        self.assertTrue(M._is_game_running())
+
+        self.assertEqual(M._kill_processes([proc.pid]), [proc.pid])
+        # Not reaped yet: the zombie must already count as gone
+        self.assertTrue(M._wait_for_exit([proc.pid], 5))
+        self.assertNotIn(proc.pid, M._find_processes(M.GAME_PROCESS_NAME))
+
+    def test_wine_path_in_argv0(self):
+        proc = self._spawn("C:\\Program Files\\Euro Truck Simulator 2\\bin\\win_x64\\eurotrucks2.exe")
+        self.assertIn(proc.pid, M._find_processes(M.GAME_PROCESS_NAME))
+
+    def test_wait_times_out_while_running(self):
+        proc = self._spawn(M.GAME_PROCESS_NAME)
+        self.assertFalse(M._wait_for_exit([proc.pid], 0.2))
+
+
+if __name__ == "__main__":
+    unittest.main()
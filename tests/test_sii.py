@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+PROFILE = (b'SiiNunit\r\n{\r\nuser_profile : _nameless.1 {\r\n profile_name: "Jos\\xc3\\xa9"\r\n'
+           b' active_mods: 2\r\n active_mods[0]: "a|A"\r\n active_mods[1]: "b|B"\r\n}\r\n\r\n'
+           + b"".join(b"economy : _nameless.%d {\r\n value: %d\r\n}\r\n\r\n" % (i, i) for i in range(2, 200))
+           + b"}\r\n")
+
+
+class ScscDocumentTest(unittest.TestCase):
+    """ScsC profiles, with the decrypted payload handed out in small chunks."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.scsc = os.path.join(tmp.name, "scsc", "profile.sii")
+        self.text = os.path.join(tmp.name, "text", "profile.sii")
+        for path, data in ((self.scsc, M.SII_SCSC_SIGNATURE), (self.text, PROFILE)):
+            os.makedirs(os.path.dirname(path))
+            with open(path, "wb") as f:
+                f.write(data)
+        self.pulled = 0
+        iter_scsc_payload = M._iter_scsc_payload
+        self.addCleanup(setattr, M, "_iter_scsc_payload", iter_scsc_payload)
+        M._iter_scsc_payload = self._payload
+
+    def _payload(self, file_path, chunk_size=None):
+        # The first chunk carries the signature; the rest cut through headers and "}\r\n" lines
+        for start, end in zip([0] + list(range(16, len(PROFILE), 7)), list(range(16, len(PROFILE), 7)) + [None]):
+            self.pulled += 1
+            yield PROFILE[start:end]
+
+    def test_header_stops_after_user_profile(self):
+        self.assertEqual(M._read_profile_header(self.scsc), ("José", 2))
+        self.assertLess(self.pulled * 7, len(PROFILE) // 4)
+
+    def test_every_unit_is_indexed(self):
+        with M.SiiDocument(self.scsc) as doc, M.SiiDocument(self.text) as text:
+            self.assertEqual([(u.kind, u.unit_id) for u in doc.iter_units()],
+                             [(u.kind, u.unit_id) for u in text.iter_units()])
+
+    def test_splice_matches_the_text_profile(self):
+        mods = [' active_mods[0]: "c|C"']
+        written = M._splice_mod_block(self.scsc, mods)
+        M._splice_mod_block(self.text, mods)
+        with open(self.scsc, "rb") as f, open(self.text, "rb") as g:
+            data = f.read()
+            self.assertEqual(data, g.read())
+        self.assertEqual(written, len(data))
+        self.assertIn(b' active_mods: 1\r\n active_mods[0]: "c|C"\r\n}', data)
+
+
+if __name__ == "__main__":
+    unittest.main()
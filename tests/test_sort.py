@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+KEYS = ["a", "b", "c", "d", "e"]
+
+
+def depends(**deps):
+    """Catalog where each mod lists its dependencies in its manifest."""
+    return {key: {"manifest": {"dependencies": list(values)}} for key, values in deps.items()}
+
+
+class LoadOrderTest(unittest.TestCase):
+
+    def order(self, keys, catalog, rules=()):
+        solved = M.solve_load_order(keys, catalog, rules)
+        self.assertEqual(sorted(solved["order"]), list(range(len(keys))))
+        return [keys[i] for i in solved["order"]], solved
+
+    def test_order_kept_without_constraints(self):
+        ordered, solved = self.order(KEYS, depends(a=["dlc_east"]))
+        self.assertEqual(ordered, KEYS)
+        self.assertEqual((solved["missing"], solved["cycles"]), ([], []))
+
+    def test_dependency_goes_below(self):
+        # d moves up just above b; the rest keeps its order
+        ordered, _ = self.order(KEYS, depends(d=["b"]))
+        self.assertEqual(ordered, ["a", "d", "b", "c", "e"])
+
+    def test_dependency_already_satisfied(self):
+        ordered, _ = self.order(KEYS, depends(b=["d"]))
+        self.assertEqual(ordered, KEYS)
+
+    def test_rules_and_wildcards(self):
+        ordered, _ = self.order(KEYS, {}, [("e", "a")])
+        self.assertEqual(ordered, ["e", "a", "b", "c", "d"])
+        ordered, _ = self.order(["p1", "p2", "x"], {}, [("x", "p*")])
+        self.assertEqual(ordered, ["x", "p1", "p2"])
+
+    def test_workshop_id_dependency(self):
+        workshop = "mod_workshop_package.00000000000004D2"
+        ordered, solved = self.order([workshop, "base"], depends(base=["1234"]))
+        self.assertEqual(ordered, ["base", workshop])
+        self.assertEqual(solved["missing"], [])
+
+    def test_missing_dependency_is_reported(self):
+        catalog = depends(a=["zz", "c"])
+        catalog["zz"] = {"manifest": {}}
+        ordered, solved = self.order(["a", "b"], catalog)
+        self.assertEqual(ordered, ["a", "b"])
+        self.assertEqual(solved["missing"], [
+            {"mod": "a", "requires": "zz", "installed": True},
+            {"mod": "a", "requires": "c", "installed": False},
+        ])
+
+    def test_cycle_is_reported(self):
+        ordered, solved = self.order(KEYS, depends(e=["d"]), [("a", "c"), ("c", "b"), ("b", "a")])
+        self.assertEqual(solved["cycles"], [["a", "b", "c"]])
+        self.assertLess(ordered.index("e"), ordered.index("d"))
+
+    def test_rules_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "load_rules.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("# comment\n\nmap_* above trucks\ntrucks below sounds\n")
+            self.assertEqual(M._load_load_rules(path), [("map_*", "trucks"), ("sounds", "trucks")])
+            self.assertEqual(M._load_load_rules(os.path.join(tmp, "none.txt")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
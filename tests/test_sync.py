@@ -0,0 +1,99 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+PROFILE = b'SiiNunit\n{\nuser_profile : _nameless.1 {\n active_mods: 1\n active_mods[0]: "a|A"\n}\n\n}\n'
+
+
+class PullTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = tmp.name
+        patched = {
+            "BACKUPS_DIR": os.path.join(root, "Backups"),
+            "SYNC_STATE": os.path.join(root, "Cache", "sync.json"),
+            "MOD_INDEX": os.path.join(root, "Cache", "mod_index.json"),
+            "FINGERPRINT_INDEX": os.path.join(root, "Cache", "fingerprints.json"),
+            "PROFILE_INDEX": os.path.join(root, "Cache", "profile_index.json"),
+            "headless": True,
+            "quiet": True,
+        }
+        for name, value in patched.items():
+            self.addCleanup(setattr, M, name, getattr(M, name))
+            setattr(M, name, value)
+        self.game_running = False
+        self.addCleanup(setattr, M, "_is_game_running", M._is_game_running)
+        M._is_game_running = lambda: self.game_running
+
+        self.profile = os.path.join(root, "profiles", "41", "profile.sii")
+        os.makedirs(os.path.dirname(self.profile))
+        with open(self.profile, "wb") as f:
+            f.write(PROFILE)
+        self.shared = os.path.join(root, "shared.txt")
+        self.list_file = os.path.join(root, "list.txt")
+        self._publish(["b|B", "a|A"])
+
+        server = M.make_sync_server(self.shared, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f"http://127.0.0.1:{server.server_address[1]}/list.txt"
+
+    def _publish(self, mods):
+        with open(self.shared, "w", encoding="utf-8") as f:
+            for i, mod in enumerate(mods):
+                f.write(f' active_mods[{i}]: "{mod}"\n')
+        # A new mtime even within the same clock tick, so the server rereads it
+        st = os.stat(self.shared)
+        os.utime(self.shared, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def _pull(self):
+        return M.run_pull(self.url, [self.profile], self.list_file, verify_mods="off")
+
+    def _profile_mods(self):
+        return [M._mod_value(m) for m in M._get_mods_from_profile(self.profile)]
+
+    def _stored_etag(self):
+        return M._load_sync_state().get(self.url, {}).get("etag")
+
+    def test_pull_then_not_modified(self):
+        first = self._pull()
+        self.assertTrue(first["ok"])
+        self.assertFalse(first["unchanged"])
+        self.assertTrue(first["profiles"][0]["ok"])
+        self.assertEqual(self._profile_mods(), ['"b|B"', '"a|A"'])
+        self.assertEqual(self._stored_etag(), first["etag"])
+
+        second = self._pull()
+        self.assertTrue(second["unchanged"])
+        self.assertNotIn("profiles", second)
+
+    def test_queued_pull_keeps_the_stored_etag(self):
+        applied = self._pull()["etag"]
+        self._publish(["c|C", "b|B", "a|A"])
+
+        self.game_running = True
+        queued = self._pull()
+        self.assertTrue(queued["queued"])
+        self.assertNotEqual(queued["etag"], applied)
+        self.assertEqual(self._stored_etag(), applied)
+        self.assertEqual(self._profile_mods(), ['"b|B"', '"a|A"'])
+
+        # Once the game is closed the next pull downloads and applies it again
+        self.game_running = False
+        retried = self._pull()
+        self.assertFalse(retried["unchanged"])
+        self.assertEqual(self._stored_etag(), queued["etag"])
+        self.assertEqual(self._profile_mods(), ['"c|C"', '"b|B"', '"a|A"'])
+
+
+if __name__ == "__main__":
+    unittest.main()
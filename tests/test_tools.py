@@ -0,0 +1,92 @@
+import functools
+import hashlib
+import http.server
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.request
+import zipfile
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+EXE = b"MZ not really an exe"
+
+
+class ToolCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        tools_dir = os.path.join(self.root, "Tools")
+        patched = {
+            "TOOLS_DIR": tools_dir,
+            "TOOLS_MANIFEST": os.path.join(tools_dir, "manifest.json"),
+            "SII_DECRYPT_EXE": os.path.join(tools_dir, "SII_Decrypt.exe"),
+            "SII_ZIP": os.path.join(tools_dir, "sii_tools.zip"),
+            "SII_DECRYPT_SHA256": hashlib.sha256(EXE).hexdigest(),
+            "DOWNLOAD_BACKOFF": 0,
+            "headless": True,
+            "quiet": True,
+        }
+        for name, value in patched.items():
+            self.addCleanup(setattr, M, name, getattr(M, name))
+            setattr(M, name, value)
+
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("SII_Decrypt.exe", EXE)
+        self.bundle = buf.getvalue()
+        M.SII_TOOLS_SHA256 = hashlib.sha256(self.bundle).hexdigest()
+        with open(os.path.join(self.root, "sii_tools.zip"), "wb") as f:
+            f.write(self.bundle)
+
+    def _serve(self):
+        handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=self.root)
+        handler.log_message = lambda *args: None
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_port}/sii_tools.zip"
+
+    def test_cache_hit_skips_the_network(self):
+        os.makedirs(M.TOOLS_DIR)
+        with open(M.SII_DECRYPT_EXE, "wb") as f:
+            f.write(EXE)
+        with mock.patch.object(urllib.request, "urlopen", side_effect=AssertionError("network used")) as urlopen:
+            M._ensure_tools()
+        urlopen.assert_not_called()
+
+    def test_pinned_download_is_extracted(self):
+        errors = []
+        M._download_tools(errors, self._serve())
+        M._extract_tools(errors)
+        self.assertEqual(errors, [])
+        self.assertTrue(M._tools_cached())
+
+    def test_bundle_hash_mismatch_is_refused(self):
+        M.SII_TOOLS_SHA256 = "0" * 64
+        errors = []
+        M._download_tools(errors, self._serve())
+        M._extract_tools(errors)
+        self.assertEqual(errors, [M.translate("download_error")])
+        self.assertFalse(os.path.exists(M.SII_DECRYPT_EXE))
+
+    def test_unpinned_tools_are_not_downloaded(self):
+        M.SII_TOOLS_SHA256 = None
+        errors = []
+        with mock.patch.object(urllib.request, "urlopen", side_effect=AssertionError("network used")):
+            M._download_tools(errors, self._serve())
+        self.assertEqual(errors, [M.translate("tools_unpinned")])
+        self.assertFalse(M._tools_cached())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Manager as M
+
+PROFILE = b'SiiNunit\n{\nuser_profile : _nameless.1 {\n active_mods: 1\n active_mods[0]: "a|A"\n}\n\n}\n'
+
+
+class WatchTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = tmp.name
+        patched = {
+            "BACKUPS_DIR": os.path.join(root, "Backups"),
+            "PROFILE_INDEX": os.path.join(root, "Cache", "profile_index.json"),
+            "WATCH_DEBOUNCE": 0.3,
+            "WATCH_WAKE_INTERVAL": 0.05,
+            "WATCH_POLL_INTERVAL": 0.02,
+            "headless": True,
+            "quiet": True,
+        }
+        for name, value in patched.items():
+            self.addCleanup(setattr, M, name, getattr(M, name))
+            setattr(M, name, value)
+        self.game_running = False
+        self.addCleanup(setattr, M, "_is_game_running", M._is_game_running)
+        M._is_game_running = lambda: self.game_running
+
+        self.profile = os.path.join(root, "profiles", "41", "profile.sii")
+        os.makedirs(os.path.dirname(self.profile))
+        with open(self.profile, "wb") as f:
+            f.write(PROFILE)
+        self.list_file = os.path.join(root, "list", "list.txt")
+        os.makedirs(os.path.dirname(self.list_file))
+        self._write_list(["b|B", "a|A"])
+        self.results = []
+
+    def _write_list(self, mods, path=None):
+        with open(path or self.list_file, "w", encoding="utf-8") as f:
+            for i, mod in enumerate(mods):
+                f.write(f' active_mods[{i}]: "{mod}"\n')
+
+    def _profile_mods(self):
+        return [M._mod_value(m) for m in M._get_mods_from_profile(self.profile)]
+
+    def _wait_for(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while len(self.results) < count and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(len(self.results), count)
+
+    def _start(self):
+        stop = threading.Event()
+        outcome = {}
+        def watch():
+            outcome["applies"] = M.run_watch([self.profile], self.list_file, "off", stop, self.results.append)
+        thread = threading.Thread(target=watch, daemon=True)
+        thread.start()
+        def finish():
+            stop.set()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            return outcome["applies"]
+        return finish
+
+    def _exercise(self):
+        finish = self._start()
+        self._wait_for(1)  # the apply at start
+        self.assertEqual(self._profile_mods(), ['"b|B"', '"a|A"'])
+
+        # A burst of saves is applied once, with its last content
+        for n in range(5):
+            self._write_list(["b|B", "a|A"] + [f"x{i}|X" for i in range(n + 1)])
+            time.sleep(0.03)
+        self._wait_for(2)
+        time.sleep(2 * M.WATCH_DEBOUNCE)
+        self.assertEqual(len(self.results), 2)
+        self.assertEqual(len(self._profile_mods()), 7)
+
+        # Replaced by rename, as sync tools and editors do
+        tmp_path = self.list_file + ".tmp"
+        self._write_list(["c|C"], tmp_path)
+        os.replace(tmp_path, self.list_file)
+        self._wait_for(3)
+        self.assertEqual(self._profile_mods(), ['"c|C"'])
+
+        # Queued while the game runs, applied once it exits
+        self.game_running = True
+        self._write_list(["d|D", "c|C"])
+        time.sleep(3 * M.WATCH_DEBOUNCE)
+        self.assertEqual(len(self.results), 3)
+        self.game_running = False
+        self._wait_for(4)
+        self.assertEqual(self._profile_mods(), ['"d|D"', '"c|C"'])
+
+        self.assertEqual(finish(), 4)
+        self.assertTrue(all(r["ok"] for r in self.results))
+
+    def test_native_watcher(self):
+        self._exercise()
+
+    def test_polling_watcher(self):
+        self.addCleanup(setattr, M, "_open_list_watcher", M._open_list_watcher)
+        M._open_list_watcher = M._PollingWatcher
+        self._exercise()
+
+
+if __name__ == "__main__":
+    unittest.main()